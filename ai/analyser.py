@@ -3,7 +3,6 @@
 AI Job Analyser - Phân tích job, scoring, category detection, trend extraction
 """
 
-import yaml
 import json
 import sys
 from pathlib import Path
@@ -13,34 +12,17 @@ from typing import Dict, List
 # Add parent directory to path for utils
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.config import get_profile, ollama_settings
 from utils.logger import setup_logger
+from utils.job_fields import job_budget
+from utils.keywords import analysis_trend_matcher, get_matcher
 
 # Setup logger
 logger = setup_logger('ai_analyser')
 
-# Load config
-config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
-
-ollama_config = config.get('ollama', {})
-ollama_model = ollama_config.get('model', 'qwen2.5:7b-instruct-q4_K_M')
-ollama_base_url = ollama_config.get('base_url', 'http://localhost:11434')
-
-# Load AI rules
-ai_rules_path = Path(__file__).parent.parent / 'ai_rules'
-analysis_rules = (ai_rules_path / 'analysis.md').read_text(encoding='utf-8')
-upwork_rules = (ai_rules_path / 'upwork_rules.md').read_text(encoding='utf-8')
-hardware_rules = (ai_rules_path / 'hardware.md').read_text(encoding='utf-8')
-profile_context = (ai_rules_path / 'profile_context.md').read_text(encoding='utf-8') if (ai_rules_path / 'profile_context.md').exists() else ""
-
 def load_profile():
     """Load CEO profile"""
-    profile_path = Path(__file__).parent.parent / 'config' / 'profile.yaml'
-    if profile_path.exists():
-        with open(profile_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    return {}
+    return get_profile()
 
 def analyse_job(job_data: Dict) -> Dict:
     """
@@ -98,6 +80,7 @@ Trả về CHỈ JSON:
         from ollama import Client
         import time
         
+        ollama_model, ollama_base_url = ollama_settings()
         client = Client(host=ollama_base_url, timeout=60.0)  # Tăng lên 60s
         
         # Retry logic với exponential backoff
@@ -245,33 +228,15 @@ Trả về CHỈ JSON:
 
 def detect_category(job_data: Dict, keywords: List[str]) -> str:
     """Detect category từ keywords"""
-    title_lower = (job_data.get('title', '') or '').lower()
-    desc_lower = (job_data.get('description', '') or '').lower()
-    
-    text = f"{title_lower} {desc_lower}"
-    
-    for keyword in keywords:
-        if keyword.lower() in text:
-            return keyword
-    
-    return "General"
+    text = f"{job_data.get('title', '') or ''} {job_data.get('description', '') or ''}"
+    return get_matcher(keywords).first(text) or "General"
 
 def extract_trends(job_data: Dict) -> List[str]:
     """Extract trending keywords từ job"""
     text = f"{job_data.get('title', '')} {job_data.get('description', '')}"
-    text_lower = text.lower()
     
-    # Common tech keywords
-    tech_keywords = [
-        'python', 'javascript', 'react', 'node.js', 'laravel', 'wordpress',
-        'api', 'automation', 'scraping', 'ai', 'ml', 'data processing',
-        'e-commerce', 'shopify', 'full stack', 'frontend', 'backend'
-    ]
-    
-    found_keywords = []
-    for keyword in tech_keywords:
-        if keyword in text_lower:
-            found_keywords.append(keyword)
+    # analysis_trend_keywords trong config.yaml, theo thứ tự ưu tiên
+    found_keywords = analysis_trend_matcher().find_all(text)
     
     return found_keywords[:5]  # Top 5
 
@@ -286,17 +251,15 @@ def score_job(job_data: Dict, analysis: Dict) -> int:
     elif 'KHÔNG NÊN' in verdict:
         score -= 30
     
-    # Budget impact
-    budget = job_data.get('budget')
-    if budget:
-        try:
-            budget_num = float(str(budget).replace('$', '').replace(',', ''))
-            if budget_num > 1000:
-                score += 10
-            elif budget_num < 100:
-                score -= 10
-        except:
-            pass
+    # Budget impact (budget_min/budget_max có sẵn từ lúc crawl)
+    _, budget_max, budget_type = job_budget(job_data)
+    if budget_max is not None:
+        # Hourly so theo rate, còn lại theo tổng budget
+        high, low = (50, 15) if budget_type == 'hourly' else (1000, 100)
+        if budget_max > high:
+            score += 10
+        elif budget_max < low:
+            score -= 10
     
     # Scope creep penalty
     scope_text = analysis.get('scope_creep_detection', '').lower()
@@ -3,39 +3,24 @@
 AI Proposal Generator - Generate proposal draft từ template
 """
 
-import yaml
 import json
 from pathlib import Path
 from typing import Dict, Optional
-import ollama
+import sys
 
-# Load config
-config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-ollama_config = config.get('ollama', {})
-ollama_model = ollama_config.get('model', 'qwen2.5:7b-instruct-q4_K_M')
-ollama_base_url = ollama_config.get('base_url', 'http://localhost:11434')
-
-# Load AI rules
-ai_rules_path = Path(__file__).parent.parent / 'ai_rules'
-profile_context = (ai_rules_path / 'profile_context.md').read_text(encoding='utf-8') if (ai_rules_path / 'profile_context.md').exists() else ""
+from utils.config import ROOT, ai_rule, get_profile, ollama_settings, read_text
+from utils.job_store import JobStore
 
 def load_profile():
     """Load freelancer profile (Tuấn Anh)"""
-    profile_path = Path(__file__).parent.parent / 'config' / 'profile.yaml'
-    if profile_path.exists():
-        with open(profile_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    return {}
+    return get_profile()
 
 def load_template() -> str:
     """Load proposal template"""
-    template_path = Path(__file__).parent.parent / 'config' / 'proposal_template.txt'
-    if template_path.exists():
-        return template_path.read_text(encoding='utf-8')
-    return """Hi [CLIENT_NAME],
+    return read_text(ROOT / 'config' / 'proposal_template.txt', default="""Hi [CLIENT_NAME],
 
 I saw your job posting for [JOB_TITLE] and I'm interested.
 
@@ -47,25 +32,16 @@ Let me know if you'd like to discuss further.
 
 Best regards,
 [YOUR_NAME]
-"""
+""")
 
 def find_job(job_id: str = None, job_link: str = None) -> Optional[Dict]:
-    """Find job từ job_id hoặc job_link"""
-    jobs_file = Path(__file__).parent.parent / 'data' / 'raw_jobs.jsonl'
-    if not jobs_file.exists():
-        return None
-    
-    with open(jobs_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                try:
-                    job = json.loads(line)
-                    if job_id and job.get('job_id') == job_id:
-                        return job
-                    if job_link and job.get('link') == job_link:
-                        return job
-                except:
-                    pass
+    """Find job từ job_id hoặc job_link (duyệt từ segment mới nhất)"""
+    # Tìm theo job_id thì bỏ qua segment có khoảng min_id..max_id không chứa ID
+    for job in JobStore().iter_jobs(job_id=job_id, newest_first=True):
+        if job_id and job.get('job_id') == job_id:
+            return job
+        if job_link and job.get('link') == job_link:
+            return job
     
     return None
 
@@ -85,9 +61,11 @@ def generate_proposal(job_id: str = None, job_link: str = None, job_data: Dict =
     if not job_data:
         return {'error': 'Không tìm thấy job'}
     
-    # Load profile và template
+    # Load profile, template và rules (đọc file lần đầu cần)
     profile = load_profile()
     template = load_template()
+    profile_context = ai_rule('profile_context')
+    ollama_model, ollama_base_url = ollama_settings()
     
     # Build prompt với creativity và không rập khuôn
     prompt = f"""Bạn là Lysa - AI hỗ trợ viết proposal chuyên nghiệp, sáng tạo, không rập khuôn. Bạn hỗ trợ Tuấn Anh (freelancer).
@@ -3,78 +3,79 @@
 AI Trend Summarizer - Tóm tắt trend hàng ngày/tuần từ feeds
 """
 
-import yaml
 import json
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
 from datetime import datetime, timedelta
-from collections import Counter
-import ollama
+import sys
+import time
 
-# Load config
-config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-ollama_config = config.get('ollama', {})
-ollama_model = ollama_config.get('model', 'qwen2.5:7b-instruct-q4_K_M')
+from utils.config import ollama_settings
+from utils.job_fields import format_budget, job_created_ts
+from utils.job_store import JobStore
+from utils.keywords import trend_matcher
+
+if TYPE_CHECKING:
+    from utils.job_columns import JobColumns
 
 def load_jobs_from_period(days: int = 1) -> List[Dict]:
-    """Load jobs từ N ngày gần đây"""
-    jobs_file = Path(__file__).parent.parent / 'data' / 'raw_jobs.jsonl'
-    if not jobs_file.exists():
-        return []
-    
+    """Load jobs từ N ngày gần đây (chỉ đọc các segment giao với cửa sổ)"""
     cutoff_date = datetime.utcnow() - timedelta(days=days)
+    cutoff_ts = int(time.time()) - days * 86400
     jobs = []
     
-    with open(jobs_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                try:
-                    job = json.loads(line)
-                    created_at = job.get('created_at', '')
-                    if created_at:
-                        try:
-                            job_date = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                            if job_date >= cutoff_date:
-                                jobs.append(job)
-                        except:
-                            pass
-                except:
-                    pass
+    # Job tạo sau cutoff thì cũng được crawl sau cutoff nên lọc segment theo crawled_at là đủ
+    for job in JobStore().iter_jobs(since=cutoff_date):
+        created_ts = job_created_ts(job)  # created_ts có sẵn từ lúc crawl, job cũ mới parse created_at
+        if created_ts is not None and created_ts >= cutoff_ts:
+            jobs.append(job)
     
     return jobs
 
+def load_snapshot() -> 'JobColumns':
+    """Snapshot cột của mọi jobs (data/jobs/columns.npz), chỉ đọc thêm jobs mới từ lần trước"""
+    from utils.job_columns import JobColumns  # numpy chỉ import khi tạo summary
+
+    snapshot = JobColumns()
+    snapshot.refresh()
+    return snapshot
+
+def period_mask(snapshot: 'JobColumns', days: int, offset_days: int = 0):
+    """Jobs đăng trong N ngày (lùi offset_days ngày, vd. tuần trước) - cùng điều kiện với load_jobs_from_period"""
+    now = int(time.time()) - offset_days * 86400
+    return snapshot.mask(since_ts=now - days * 86400, until_ts=None if not offset_days else now)
+
+def describe_budgets(budgets: Dict[str, Dict]) -> str:
+    """Dòng budget cho prompt, vd. 'hourly: median $35/hr (25-50, 40 jobs)'"""
+    parts = []
+    for budget_type, stats in sorted(budgets.items(), key=lambda item: -item[1]['count']):
+        median = format_budget({'budget_min': round(stats['median']), 'budget_type': budget_type})
+        parts.append(f"{budget_type}: median {median} ({stats['p25']:,.0f}-{stats['p75']:,.0f}, {stats['count']} jobs)")
+    return '; '.join(parts) or 'không có dữ liệu budget'
+
 def extract_top_keywords(jobs: List[Dict], top_n: int = 10) -> List[tuple]:
     """Extract top keywords từ jobs"""
     all_text = ' '.join([
         f"{j.get('title', '')} {j.get('description', '')}" 
         for j in jobs
-    ]).lower()
-    
-    # Common tech keywords
-    tech_keywords = [
-        'python', 'javascript', 'react', 'node.js', 'laravel', 'wordpress',
-        'api', 'automation', 'scraping', 'ai', 'machine learning', 'ml',
-        'data processing', 'e-commerce', 'shopify', 'full stack',
-        'frontend', 'backend', 'typescript', 'vue', 'angular',
-        'docker', 'kubernetes', 'aws', 'cloud', 'devops'
-    ]
-    
-    keyword_counts = Counter()
-    for keyword in tech_keywords:
-        count = all_text.count(keyword)
-        if count > 0:
-            keyword_counts[keyword] = count
+    ])
+    
+    # Một lần chuẩn hóa + quét với matcher đã compile từ trend_keywords trong config.yaml
+    keyword_counts = trend_matcher().counts(all_text)
     
     return keyword_counts.most_common(top_n)
 
 def generate_daily_summary() -> Dict:
     """Generate daily summary"""
-    jobs = load_jobs_from_period(days=1)
+    # Số lượng / category / source / budget tính trên snapshot cột, chỉ keywords + mẫu jobs cần text
+    snapshot = load_snapshot()
+    today = period_mask(snapshot, days=1)
+    total_jobs = int(today.sum())
     
-    if not jobs:
+    if not total_jobs:
         return {
             'date': datetime.utcnow().isoformat(),
             'total_jobs': 0,
@@ -84,15 +85,19 @@ def generate_daily_summary() -> Dict:
         }
     
     # Top keywords
+    jobs = load_jobs_from_period(days=1)
     top_keywords = extract_top_keywords(jobs, top_n=10)
     
     # Top categories
-    categories = Counter([j.get('category', 'General') for j in jobs])
-    top_categories = categories.most_common(5)
+    top_categories = snapshot.top('category', today, 5)
     
     # Top sources
-    sources = Counter([j.get('source', 'Unknown') for j in jobs])
-    top_sources = sources.most_common(3)
+    sources = snapshot.top('source', today)
+    top_sources = sources[:3]
+    
+    # Budget theo loại (fixed / hourly / ...): hôm nay so với 7 ngày trước đó
+    budgets = snapshot.budget_summary(today)
+    previous_budgets = snapshot.budget_summary(period_mask(snapshot, days=7, offset_days=1))
     
     # Generate AI summary
     jobs_sample = jobs[:10]  # Lấy 10 jobs đầu để summarize
@@ -103,10 +108,12 @@ def generate_daily_summary() -> Dict:
     
     prompt = f"""Bạn là Lysa - AI phân tích trend job market.
 
-Hôm nay có {len(jobs)} jobs mới từ {len(set(j.get('source') for j in jobs))} nguồn.
+Hôm nay có {total_jobs} jobs mới từ {len(sources)} nguồn.
 
 Top keywords: {', '.join([k[0] for k in top_keywords[:5]])}
 Top categories: {', '.join([c[0] for c in top_categories])}
+Budget hôm nay: {describe_budgets(budgets)}
+Budget 7 ngày trước: {describe_budgets(previous_budgets)}
 
 Mẫu jobs:
 {jobs_text}
@@ -120,8 +127,10 @@ Hãy tóm tắt trend hôm nay trong 3-5 câu:
 Trả lời ngắn gọn, thực tế, không vòng vo."""
 
     try:
+        import ollama
+        
         response = ollama.chat(
-            model=ollama_model,
+            model=ollama_settings()[0],
             messages=[
                 {
                     'role': 'system',
@@ -140,11 +149,12 @@ Trả lời ngắn gọn, thực tế, không vòng vo."""
     
     result = {
         'date': datetime.utcnow().isoformat(),
-        'total_jobs': len(jobs),
+        'total_jobs': total_jobs,
         'summary': summary_text,
         'top_keywords': [{'keyword': k[0], 'count': k[1]} for k in top_keywords],
         'top_categories': [{'category': c[0], 'count': c[1]} for c in top_categories],
-        'top_sources': [{'source': s[0], 'count': s[1]} for s in top_sources]
+        'top_sources': [{'source': s[0], 'count': s[1]} for s in top_sources],
+        'budgets': budgets
     }
     
     # Save summary
@@ -159,9 +169,12 @@ Trả lời ngắn gọn, thực tế, không vòng vo."""
 
 def generate_weekly_summary() -> Dict:
     """Generate weekly summary"""
-    jobs = load_jobs_from_period(days=7)
+    snapshot = load_snapshot()
+    week = period_mask(snapshot, days=7)
+    previous_week = period_mask(snapshot, days=7, offset_days=7)
+    total_jobs = int(week.sum())
     
-    if not jobs:
+    if not total_jobs:
         return {
             'week_start': (datetime.utcnow() - timedelta(days=7)).isoformat(),
             'week_end': datetime.utcnow().isoformat(),
@@ -169,17 +182,21 @@ def generate_weekly_summary() -> Dict:
             'summary': 'Không có job trong tuần này'
         }
     
-    # Similar to daily but aggregate over 7 days
-    top_keywords = extract_top_keywords(jobs, top_n=15)
-    categories = Counter([j.get('category', 'General') for j in jobs])
-    top_categories = categories.most_common(10)
+    # Similar to daily but aggregate over 7 days, so với tuần trước để thấy tăng/giảm
+    top_keywords = extract_top_keywords(load_jobs_from_period(days=7), top_n=15)
+    top_categories = snapshot.compare('category', week, previous_week, 10)
+    sources_count = len(snapshot.top('source', week))
+    budgets = snapshot.budget_summary(week)
+    previous_budgets = snapshot.budget_summary(previous_week)
     
     prompt = f"""Bạn là Lysa - AI phân tích trend job market.
 
-Tuần này có {len(jobs)} jobs từ {len(set(j.get('source') for j in jobs))} nguồn.
+Tuần này có {total_jobs} jobs từ {sources_count} nguồn (tuần trước: {int(previous_week.sum())} jobs).
 
 Top keywords tuần: {', '.join([k[0] for k in top_keywords[:10]])}
-Top categories: {', '.join([c[0] for c in top_categories[:5]])}
+Top categories (tuần này / tuần trước): {', '.join([f'{c[0]} {c[1]}/{c[2]}' for c in top_categories[:5]])}
+Budget tuần này: {describe_budgets(budgets)}
+Budget tuần trước: {describe_budgets(previous_budgets)}
 
 Hãy tóm tắt trend tuần này:
 - Job nào tăng/giảm?
@@ -190,8 +207,10 @@ Hãy tóm tắt trend tuần này:
 Trả lời 5-7 câu, thực tế, có insight."""
 
     try:
+        import ollama
+        
         response = ollama.chat(
-            model=ollama_model,
+            model=ollama_settings()[0],
             messages=[
                 {
                     'role': 'system',
@@ -211,10 +230,11 @@ Trả lời 5-7 câu, thực tế, có insight."""
     result = {
         'week_start': (datetime.utcnow() - timedelta(days=7)).isoformat(),
         'week_end': datetime.utcnow().isoformat(),
-        'total_jobs': len(jobs),
+        'total_jobs': total_jobs,
         'summary': summary_text,
         'top_keywords': [{'keyword': k[0], 'count': k[1]} for k in top_keywords],
-        'top_categories': [{'category': c[0], 'count': c[1]} for c in top_categories]
+        'top_categories': [{'category': c[0], 'count': c[1], 'previous_week': c[2]} for c in top_categories],
+        'budgets': budgets
     }
     
     # Save summary
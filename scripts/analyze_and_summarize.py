@@ -13,6 +13,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from ai.analyser import analyse_job
 from ai.summarizer import generate_daily_summary, generate_weekly_summary
 from utils.logger import setup_logger
+from utils.job_fields import job_crawled_ts
+from utils.job_store import JobStore
 import json
 
 # Setup logger
@@ -25,31 +27,22 @@ def main():
     print("=" * 60)
     
     # Load new jobs
-    jobs_file = Path(__file__).parent.parent / 'data' / 'raw_jobs.jsonl'
-    if not jobs_file.exists():
-        print("❌ Không tìm thấy data/raw_jobs.jsonl")
+    job_store = JobStore()
+    if not job_store.exists() and not job_store.needs_migration():
+        print("❌ Không tìm thấy data/jobs/manifest.json")
         return
     
-    # Load jobs từ 24h gần đây
+    # Load jobs từ 24h gần đây (chỉ đọc segment giao với cửa sổ 24h)
+    import time
     from datetime import datetime, timedelta
     cutoff = datetime.utcnow() - timedelta(hours=24)
+    cutoff_ts = int(time.time()) - 24 * 3600
     new_jobs = []
     
-    with open(jobs_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                try:
-                    job = json.loads(line)
-                    crawled_at = job.get('crawled_at', '')
-                    if crawled_at:
-                        try:
-                            job_date = datetime.fromisoformat(crawled_at.replace('Z', '+00:00'))
-                            if job_date >= cutoff:
-                                new_jobs.append(job)
-                        except:
-                            pass
-                except:
-                    pass
+    for job in job_store.iter_jobs(since=cutoff):
+        crawled_ts = job_crawled_ts(job)
+        if crawled_ts is not None and crawled_ts >= cutoff_ts:
+            new_jobs.append(job)
     
     print(f"\n📊 Tìm thấy {len(new_jobs)} jobs mới trong 24h")
     
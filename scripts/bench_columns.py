@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark thống kê tuần: duyệt JSON từng dòng (cách cũ) vs snapshot cột (utils/job_columns.py)
+Usage:
+    python scripts/bench_columns.py
+    python scripts/bench_columns.py --jobs 1000000 --days 90
+
+Lưu ý: 1M jobs giả cần ~0.7GB đĩa tạm và vài phút để ghi + dựng snapshot lần đầu.
+"""
+
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.job_columns import JobColumns
+from utils.job_fields import job_budget, job_created_ts
+from utils.job_store import JobStore
+
+SOURCES = ('We Work Remotely', 'RemoteOK API', 'Remotive', 'Himalayas', 'Jobicy', 'Upwork RSS')
+CATEGORIES = ('python', 'web scraping', 'react', 'node.js', 'wordpress', 'shopify', 'General')
+COUNTRIES = ('United States', 'Germany', 'India', 'Vietnam', 'United Kingdom', 'Remote', 'Unknown')
+WORDS = "python developer scraping react api integration automation data pipeline remote contract".split()
+
+
+def synthetic_jobs(rng, count, days):
+    """Jobs giả như crawler ghi (mô tả ngắn để file tạm không quá lớn)"""
+    now = datetime.utcnow()
+    for i in range(count):
+        created = now - timedelta(seconds=int(days * 86400 * i / count))
+        low = rng.choice((15, 25, 40, 300, 500, 1500))
+        yield {
+            'job_id': '%016x' % rng.getrandbits(64),
+            'title': ' '.join(rng.choices(WORDS, k=6)),
+            'description': ' '.join(rng.choices(WORDS, k=40)),
+            'source': rng.choice(SOURCES),
+            'category': rng.choice(CATEGORIES),
+            'client_country': rng.choice(COUNTRIES),
+            'budget_min': float(low),
+            'budget_max': float(low * rng.choice((1, 2))),
+            'currency': 'USD',
+            'budget_type': 'hourly' if low < 100 else 'fixed',
+            'created_at': created.isoformat(),
+            'created_ts': int(created.timestamp()),
+            'crawled_at': created.isoformat(),
+            'crawled_ts': int(created.timestamp()),
+        }
+
+
+def weekly_scan(store, now):
+    """Cách cũ: đọc + json.loads jobs của các segment trong cửa sổ, đếm bằng Counter"""
+    cutoff = now - 7 * 86400
+    categories, sources, budgets = Counter(), Counter(), {}
+    total = 0
+    for job in store.iter_jobs(since=datetime.utcfromtimestamp(cutoff)):
+        created_ts = job_created_ts(job)
+        if created_ts is None or created_ts < cutoff:
+            continue
+        total += 1
+        categories[job.get('category', 'General')] += 1
+        sources[job.get('source', 'Unknown')] += 1
+        budget_min, budget_max, budget_type = job_budget(job)
+        if budget_min is not None:
+            budgets.setdefault(budget_type, []).append((budget_min + budget_max) / 2)
+    return total, categories.most_common(10), sources.most_common(5)
+
+
+def weekly_columns(snapshot, now):
+    """Snapshot: mask + bincount / percentile trên mảng"""
+    week = snapshot.mask(since_ts=now - 7 * 86400)
+    previous = snapshot.mask(since_ts=now - 14 * 86400, until_ts=now - 7 * 86400)
+    snapshot.compare('category', week, previous, 10)
+    snapshot.top('source', week, 5)
+    snapshot.budget_summary(week)
+    return int(week.sum())
+
+
+def timed(fn, repeat=1):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark snapshot cột cho thống kê jobs')
+    parser.add_argument('--jobs', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=60, help='Jobs trải đều trên số ngày này')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_columns_') as tmp:
+        work_dir = Path(tmp)
+        # Ghi dạng raw_jobs.jsonl cũ rồi tách thành segment theo ngày như data thật
+        legacy_file = work_dir / 'raw_jobs.jsonl'
+        with open(legacy_file, 'w', encoding='utf-8') as f:
+            for job in reversed(list(synthetic_jobs(random.Random(args.seed), args.jobs, args.days))):
+                f.write(json.dumps(job, ensure_ascii=False) + '\n')
+        store = JobStore(base_dir=work_dir / 'jobs', legacy_file=legacy_file)
+        store.migrate_legacy()
+        size_mb = store.complete_size() / 1024 / 1024
+        print(f"🧪 {store.count()} jobs giả trong {len(store.all_segments)} segment ({size_mb:.0f}MB JSONL)\n")
+
+        now = int(time.time())
+        snapshot = JobColumns(store)
+        _, build_time = timed(snapshot.refresh)
+        snapshot_mb = snapshot.path.stat().st_size / 1024 / 1024
+
+        store.append(list(synthetic_jobs(random.Random(args.seed + 1), 1000, 0)))
+        snapshot = JobColumns(store)
+        added, refresh_time = timed(snapshot.refresh)
+
+        _, load_time = timed(lambda: JobColumns(store).load(), repeat=3)
+        week_total, columns_time = timed(lambda: weekly_columns(snapshot, now), repeat=5)
+        (scan_total, _, _), scan_time = timed(lambda: weekly_scan(store, now))
+
+    print(f"{'bước':<42} {'thời gian':>10}")
+    print('-' * 53)
+    print(f"{'dựng snapshot lần đầu (' + format(snapshot_mb, '.1f') + 'MB .npz)':<42} {build_time:>9.2f}s")
+    print(f"{'refresh sau khi append ' + str(added) + ' jobs':<42} {refresh_time:>9.2f}s")
+    print(f"{'load snapshot':<42} {load_time * 1000:>8.1f}ms")
+    print(f"{'thống kê tuần - duyệt JSON (' + str(scan_total) + ' jobs)':<42} {scan_time:>9.2f}s")
+    print(f"{'thống kê tuần - snapshot (' + str(week_total) + ' jobs)':<42} {columns_time * 1000:>8.1f}ms")
+    print(f"\nNhanh hơn x{scan_time / columns_time:.0f} (không tính load; gồm so sánh tuần trước + percentile budget)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark dedup job_id: Python set (cách cũ) vs index mmap + bloom filter
+Usage:
+    python scripts/bench_dedup.py
+    python scripts/bench_dedup.py --sizes 100000 1000000 --probes 200000
+
+Lưu ý: 10M IDs cần vài GB đĩa tạm và vài phút để dựng file (chỉ làm một lần, không tính vào load).
+"""
+
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.job_index import JobIndex
+
+def random_ids(n, rng):
+    return ['%012x' % rng.getrandbits(48) for _ in range(n)]
+
+def write_jsonl(path, ids):
+    with open(path, 'w', encoding='utf-8') as f:
+        for job_id in ids:
+            f.write(json.dumps({'job_id': job_id}) + '\n')
+
+def measure(fn):
+    """Chạy fn, return (kết quả, giây, peak Python heap bytes)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def bench_size(n, probes, capacity, error_rate, rng, work_dir):
+    ids = random_ids(n, rng)
+    jsonl_path = work_dir / f"jobs_{n}.jsonl"
+    write_jsonl(jsonl_path, ids)
+
+    # Dựng index + bloom một lần (tương đương rebuild-index), không tính vào load time
+    build_start = time.perf_counter()
+    JobIndex(jsonl_path, bloom_capacity=capacity, bloom_error_rate=error_rate).update()
+    build_time = time.perf_counter() - build_start
+
+    hits = rng.sample(ids, min(probes // 2, n))
+    misses = random_ids(probes - len(hits), rng)
+    queries = hits + misses
+    rng.shuffle(queries)
+
+    # Cách cũ: đọc toàn bộ JSONL vào set
+    def load_set():
+        existing = set()
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                existing.add(json.loads(line)['job_id'])
+        return existing
+    id_set, set_load, set_mem = measure(load_set)
+    start = time.perf_counter()
+    set_found = sum(1 for q in queries if q in id_set)
+    set_lookup = time.perf_counter() - start
+    del id_set
+
+    # Cách mới: mmap index + bloom (load chỉ đọc header)
+    def load_index():
+        index = JobIndex(jsonl_path, bloom_capacity=capacity, bloom_error_rate=error_rate)
+        index.update()
+        return index
+    index, idx_load, idx_mem = measure(load_index)
+    start = time.perf_counter()
+    idx_found = sum(1 for q in queries if q in index)
+    idx_lookup = time.perf_counter() - start
+    bloom_fp = sum(1 for q in misses if q.encode() in index.bloom)
+    disk = index.index_path.stat().st_size + index.bloom.size_bytes()
+
+    assert set_found == idx_found, "set và index cho kết quả khác nhau"
+
+    return {
+        'n': n,
+        'build': build_time,
+        'set_load': set_load,
+        'set_mem': set_mem,
+        'set_lookup_us': set_lookup / len(queries) * 1e6,
+        'idx_load': idx_load,
+        'idx_mem': idx_mem,
+        'idx_lookup_us': idx_lookup / len(queries) * 1e6,
+        'idx_disk': disk,
+        'bloom_fp_rate': bloom_fp / max(1, len(misses)),
+    }
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark dedup: set vs index + bloom filter')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000],
+                        help='Số job_id lịch sử cần test')
+    parser.add_argument('--probes', type=int, default=100_000, help='Số lần tra cứu (50%% hit)')
+    parser.add_argument('--capacity', type=int, default=100_000, help='Bloom capacity layer đầu')
+    parser.add_argument('--error-rate', type=float, default=0.001, help='Bloom false positive rate')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='bench_dedup_') as tmp:
+        for n in args.sizes:
+            print(f"⏱  {n:,} IDs...", flush=True)
+            rows.append(bench_size(n, args.probes, args.capacity, args.error_rate, rng, Path(tmp)))
+
+    print()
+    print(f"{'IDs':>12} | {'set load':>9} {'set heap':>10} {'set/lookup':>11} | "
+          f"{'idx load':>9} {'idx heap':>10} {'idx/lookup':>11} {'disk':>10} {'bloom FP':>9} | {'build':>8}")
+    print('-' * 120)
+    for r in rows:
+        print(f"{r['n']:>12,} | {r['set_load']:>8.3f}s {r['set_mem'] / 1e6:>8.1f}MB {r['set_lookup_us']:>9.2f}us | "
+              f"{r['idx_load']:>8.3f}s {r['idx_mem'] / 1e6:>8.2f}MB {r['idx_lookup_us']:>9.2f}us "
+              f"{r['idx_disk'] / 1e6:>8.1f}MB {r['bloom_fp_rate']:>8.4%} | {r['build']:>7.1f}s")
+    print("\nset load = đọc lại toàn bộ JSONL như trước; idx load = mở index + bloom qua mmap")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark encode embedding: số text/giây theo số worker process (utils/embedding.EncodePool)
+Dùng mô tả job giả; worker đã load model trước khi đo (chỉ tính thời gian encode).
+Usage:
+    python scripts/bench_embedding.py
+    python scripts/bench_embedding.py --texts 4000 --workers 1 2 4 8 --batch-size 32 64
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.embedding import DEFAULT_MODEL, EncodePool, physical_cores
+
+WORDS = (
+    "senior python developer needed for web scraping project budget remote team react frontend "
+    "node.js backend api integration automation machine learning data pipeline long term contract "
+    "experience required shopify store wordpress plugin laravel django fastapi postgres docker aws"
+).split()
+
+
+def synthetic_descriptions(rng, count):
+    """Title + mô tả 80-300 từ, như text sync embed (title + description)"""
+    return [
+        ' '.join(rng.choices(WORDS, k=rng.randint(4, 9))).title() + ' ' + ' '.join(rng.choices(WORDS, k=rng.randint(80, 300)))
+        for _ in range(count)
+    ]
+
+
+def bench(texts, workers, batch_size, model_name):
+    """(texts/giây, embeddings) với số worker; 0 = process chính"""
+    with EncodePool(model_name, workers=workers, batch_size=batch_size, min_texts=0) as pool:
+        # Warm-up: tạo worker + load model ở mọi worker (không tính vào thời gian đo)
+        pool.encode(texts[:max(1, workers) * batch_size])
+        start = time.perf_counter()
+        embeddings = pool.encode(texts)
+        elapsed = time.perf_counter() - start
+    return len(texts) / elapsed, embeddings
+
+
+def main():
+    import argparse
+
+    cores = physical_cores()
+    parser = argparse.ArgumentParser(description='Benchmark encode embedding theo số worker process')
+    parser.add_argument('--texts', type=int, default=2000, help='Số mô tả job giả')
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({0, 2, cores}),
+                        help='Số worker cần đo (0 = process chính)')
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[64])
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    texts = synthetic_descriptions(random.Random(args.seed), args.texts)
+    print(f"🧪 {len(texts)} mô tả job giả, model {args.model}, {cores} core vật lý\n")
+    print(f"{'workers':>7} | {'batch':>5} | {'threads/worker':>14} | {'texts/s':>8} | {'x so với 0':>10} | {'lệch max':>8}")
+    print('-' * 68)
+    baseline = reference = None
+    for batch_size in args.batch_size:
+        for workers in args.workers:
+            rate, embeddings = bench(texts, workers, batch_size, args.model)
+            pool = EncodePool(args.model, workers=workers)
+            threads = pool.threads_per_worker if workers > 1 else '-'
+            baseline = baseline or rate
+            if reference is None:
+                reference = embeddings
+            drift = float(abs(embeddings - reference).max())
+            print(f"{workers:>7} | {batch_size:>5} | {threads:>14} | {rate:>8.0f} | {rate / baseline:>9.2f}x | {drift:>8.1e}")
+    print("\nHàng đầu là mốc so sánh; 'lệch max' = sai khác lớn nhất so với embedding của hàng đầu")
+
+
+if __name__ == '__main__':
+    main()
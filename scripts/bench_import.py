@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark thời gian khởi động của các entry point CLI (python -X importtime)
+Mỗi entry point được import trong một interpreter mới; import vượt ngân sách thì exit code 1
+(dùng được trong CI để bắt import nặng - chromadb, sentence_transformers, ollama, aiohttp... - bị kéo lên đầu module).
+Usage:
+    python scripts/bench_import.py
+    python scripts/bench_import.py --repeat 5 --top 5
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Entry point -> (module import được với PYTHONPATH=ROOT:scripts, script chạy --help hoặc None, ngân sách import ms)
+ENTRY_POINTS = {
+    'crawl_multi_source': ('crawl_multi_source', 'scripts/crawl_multi_source.py', 150),
+    'query_ai': ('query_ai', 'scripts/query_ai.py', 150),
+    'write_proposal': ('write_proposal', 'scripts/write_proposal.py', 150),
+    'maintain_data': ('maintain_data', 'scripts/maintain_data.py', 150),
+    'analyze_and_summarize': ('analyze_and_summarize', None, 150),
+    'ai.analyser': ('ai.analyser', None, 150),
+    'ai.generator': ('ai.generator', None, 150),
+    'ai.summarizer': ('ai.summarizer', None, 150),
+}
+# --help = interpreter khởi động + import + argparse, không đọc config / data
+HELP_BUDGET_MS = 300
+
+
+def python_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([str(ROOT), str(ROOT / 'scripts'), env.get('PYTHONPATH', '')]).rstrip(os.pathsep)
+    return env
+
+
+def import_profile(module):
+    """
+    Import module trong interpreter mới với -X importtime
+
+    Returns:
+        (ms cumulative của module, [(ms, tên)] các import trực tiếp giảm dần), (None, lỗi) nếu import lỗi
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=ROOT, env=python_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:]
+    total, children = None, []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            continue  # Dòng tiêu đề
+        depth = (len(name) - len(name.lstrip())) // 2
+        ms = int(cumulative) / 1000
+        # importtime in theo thứ tự hậu tố: con (depth 1) in trước module (depth 0)
+        if depth == 1:
+            children.append((ms, name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                total = ms
+                break
+            children = []  # Import của site / module khác, không tính
+    return total, sorted(children, reverse=True)
+
+
+def help_wall(script, repeat):
+    """Thời gian thật (ms, min của repeat lần) chạy `python script --help`"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, '--help'], cwd=ROOT, env=python_env(), capture_output=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Đo thời gian import / --help của các entry point CLI')
+    parser.add_argument('--repeat', type=int, default=3, help='Số lần đo mỗi entry point (lấy min)')
+    parser.add_argument('--top', type=int, default=3, help='Số import trực tiếp nặng nhất cần liệt kê')
+    args = parser.parse_args()
+
+    print(f"{'entry point':<22} {'import':>9} {'ngân sách':>9} {'--help':>9}   import nặng nhất")
+    print('-' * 100)
+    over_budget = []
+    for name, (module, script, budget) in ENTRY_POINTS.items():
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        failed = [children for total, children in runs if total is None]
+        if failed:
+            print(f"{name:<22} {'lỗi':>9}   {' '.join(failed[0])}")
+            over_budget.append(name)
+            continue
+        total, children = min(runs)
+        help_ms = help_wall(script, args.repeat) if script else None
+        heaviest = ', '.join(f"{child} {ms:.0f}ms" for ms, child in children[:args.top])
+        help_text = f"{help_ms:.0f}ms" if help_ms is not None else '-'
+        status = ''
+        if total > budget or (help_ms is not None and help_ms > HELP_BUDGET_MS):
+            over_budget.append(name)
+            status = ' ⚠'
+        print(f"{name:<22} {total:>7.1f}ms {budget:>7}ms {help_text:>9}   {heaviest}{status}")
+
+    print(f"\n--help tính cả khởi động interpreter (ngân sách {HELP_BUDGET_MS}ms)")
+    if over_budget:
+        print(f"⚠ Vượt ngân sách / lỗi import: {', '.join(over_budget)}")
+        sys.exit(1)
+    print("✓ Mọi entry point trong ngân sách")
+
+
+if __name__ == '__main__':
+    main()
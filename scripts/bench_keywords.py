@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark keyword matching: vòng lặp `keyword.lower() in text` (cách cũ) vs KeywordMatcher
+Usage:
+    python scripts/bench_keywords.py
+    python scripts/bench_keywords.py --docs 200000 --seed 7
+"""
+
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.keywords import KeywordMatcher, analysis_trend_matcher, category_matcher, trend_matcher
+
+FILLER = (
+    "we need an experienced developer to help with our project the work includes email "
+    "support html templates detailed documentation daily communication remote team "
+    "budget is flexible for the right candidate please include examples of previous work "
+    "maintain existing codebase fix bugs improve performance write clean code"
+).split()
+
+def synthetic_docs(n, keywords, rng):
+    """Mô tả job giả: 40-120 từ filler, rải vài keyword (có cả hoa/thường)"""
+    docs = []
+    for _ in range(n):
+        words = rng.choices(FILLER, k=rng.randint(40, 120))
+        for keyword in rng.sample(keywords, rng.randint(0, 4)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice([keyword, keyword.lower(), keyword.upper()]))
+        title = ' '.join(rng.choices(FILLER, k=5))
+        docs.append((title, ' '.join(words)))
+    return docs
+
+def old_category(title, description, keywords):
+    description_lower = description.lower()
+    for keyword in keywords:
+        if keyword.lower() in description_lower or keyword.lower() in title.lower():
+            return keyword
+    return "General"
+
+def old_trends(text, tech_keywords):
+    text_lower = text.lower()
+    return [k for k in tech_keywords if k in text_lower][:5]
+
+def old_counts(texts, tech_keywords):
+    all_text = ' '.join(texts).lower()
+    counts = Counter()
+    for keyword in tech_keywords:
+        count = all_text.count(keyword)
+        if count > 0:
+            counts[keyword] = count
+    return counts
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark keyword matching: loop vs compiled matcher')
+    parser.add_argument('--docs', type=int, default=100_000, help='Số mô tả job giả')
+    parser.add_argument('--large-list', type=int, default=500,
+                        help='Cỡ danh sách keyword lớn để xem chi phí tăng theo số keyword')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    categories = category_matcher()
+    trends = trend_matcher()
+    analysis_trends = analysis_trend_matcher()
+    rng = random.Random(args.seed)
+    docs = synthetic_docs(args.docs, categories.keywords + trends.keywords, rng)
+    texts = [f"{title} {description}" for title, description in docs]
+    print(f"⏱  {len(docs):,} mô tả, {len(categories.keywords)} search_keywords, "
+          f"{len(trends.keywords)} trend_keywords, {len(analysis_trends.keywords)} analysis_trend_keywords\n")
+
+    rows = []
+    old, t_old = timed(lambda: [old_category(t, d, categories.keywords) for t, d in docs])
+    new, t_new = timed(lambda: [categories.first(text) or "General" for text in texts])
+    rows.append(('category (normalize_job)', t_old, t_new, sum(a != b for a, b in zip(old, new))))
+
+    old, t_old = timed(lambda: [old_trends(text, analysis_trends.keywords) for text in texts])
+    new, t_new = timed(lambda: [analysis_trends.find_all(text)[:5] for text in texts])
+    rows.append(('extract_trends', t_old, t_new, sum(a != b for a, b in zip(old, new))))
+
+    old, t_old = timed(lambda: old_counts(texts, trends.keywords))
+    new, t_new = timed(lambda: trends.counts(' '.join(texts)))
+    rows.append(('extract_top_keywords', t_old, t_new, sum(abs(old[k] - new[k]) for k in set(old) | set(new))))
+
+    # Danh sách lớn: keyword thật + keyword giả không xuất hiện trong text
+    large_keywords = trends.keywords + [f"skill{i:04d}" for i in range(max(0, args.large_list - len(trends.keywords)))]
+    large = KeywordMatcher(large_keywords)
+    old, t_old = timed(lambda: [old_trends(text, large_keywords) for text in texts])
+    new, t_new = timed(lambda: [large.find_all(text)[:5] for text in texts])
+    rows.append((f'extract_trends ({len(large_keywords)} kw)', t_old, t_new, sum(a != b for a, b in zip(old, new))))
+
+    print(f"{'call site':<26} | {'loop':>8} | {'matcher':>8} | {'speedup':>7} | {'khác kết quả':>12}")
+    print('-' * 76)
+    for name, t_old, t_new, diff in rows:
+        print(f"{name:<26} | {t_old:>7.2f}s | {t_new:>7.2f}s | {t_old / t_new:>6.1f}x | {diff:>12,}")
+    print("\nkhác kết quả = match substring sai của cách cũ (vd. 'ai' trong 'email', 'ml' trong 'html')")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark stage parse: throughput parse + normalize feed theo số worker process
+Chạy trên body feed đã ghi lại (thư mục file .xml/.rss/.json) hoặc feed RSS giả nếu không có
+Usage:
+    python scripts/bench_parse.py
+    python scripts/bench_parse.py --bodies recorded_feeds/ --workers 0 1 2 4
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.feed_parser import parse_source
+from utils.keywords import category_matcher
+from utils.pipeline import resolve_workers, start_pool
+
+WORDS = (
+    "senior python developer needed for web scraping project budget $500 remote team "
+    "react frontend node.js backend api integration 12 proposals location: Germany "
+    "shopify store wordpress plugin laravel automation machine learning data pipeline"
+).split()
+
+
+def synthetic_feed(rng, entries=50):
+    """RSS giả cỡ feed job board thật: mỗi entry có mô tả HTML 150-400 từ"""
+    items = []
+    for i in range(entries):
+        description = ' '.join(rng.choices(WORDS, k=rng.randint(150, 400)))
+        items.append(
+            f"<item><title>{' '.join(rng.choices(WORDS, k=6))}</title>"
+            f"<link>https://jobs.example.com/{rng.randrange(10**9)}</link>"
+            f"<guid>job-{rng.randrange(10**9)}</guid>"
+            f"<pubDate>Mon, 0{1 + i % 9} Sep 2026 10:00:00 GMT</pubDate>"
+            f"<description><![CDATA[<p>{description}</p><ul><li>{description[:200]}</li></ul>]]></description></item>"
+        )
+    return ("<?xml version='1.0'?><rss version='2.0'><channel><title>Bench</title>"
+            + ''.join(items) + "</channel></rss>").encode()
+
+
+def load_tasks(bodies_dir, count, seed):
+    """Task parse cho parse_source: body ghi lại (lặp cho đủ count) hoặc feed giả"""
+    keywords = category_matcher().keywords
+    if bodies_dir:
+        files = sorted(p for p in Path(bodies_dir).iterdir()
+                       if p.suffix in ('.xml', '.rss', '.json') and p.is_file())
+        if not files:
+            sys.exit(f"Không có file .xml/.rss/.json trong {bodies_dir}")
+        bodies = [(p.name, 'api' if p.suffix == '.json' else 'job_board', p.read_bytes()) for p in files]
+    else:
+        rng = random.Random(seed)
+        bodies = [(f"synthetic_{i}", 'job_board', synthetic_feed(rng)) for i in range(min(count, 16))]
+    tasks = []
+    for i in range(count):
+        name, kind, body = bodies[i % len(bodies)]
+        tasks.append({'name': f"{name}#{i}", 'kind': kind, 'config': {'name': name}, 'body': body,
+                      'body_path': None, 'headers': {}, 'keywords': keywords, 'mark': None, 'watermark': None})
+    return tasks
+
+
+def run(tasks, workers):
+    """Parse tất cả tasks, return (giây, số entry)"""
+    executor = start_pool(workers)  # Fork worker trước khi đo
+    start = time.perf_counter()
+    try:
+        if executor is None:
+            outputs = [parse_source(task) for task in tasks]
+        else:
+            outputs = list(executor.map(parse_source, tasks))
+    finally:
+        elapsed = time.perf_counter() - start
+        if executor is not None:
+            executor.shutdown()
+    return elapsed, sum(output['entries'] for output in outputs)
+
+
+def main():
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='Benchmark parse feed theo số worker process')
+    parser.add_argument('--bodies', help='Thư mục body feed đã ghi lại (.xml/.rss = RSS, .json = API)')
+    parser.add_argument('--feeds', type=int, default=64, help='Số lượt parse (body được lặp lại)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4, 8])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tasks = load_tasks(args.bodies, args.feeds, args.seed)
+    total_mb = sum(len(task['body']) for task in tasks) / 1024 / 1024
+    print(f"⏱  {len(tasks)} feed ({total_mb:.1f} MB), {os.cpu_count()} CPU\n")
+    print(f"{'workers':>8} | {'time':>7} | {'feeds/s':>8} | {'entries/s':>9} | {'speedup':>7}")
+    print('-' * 52)
+    baseline = None
+    for workers in args.workers:
+        effective = resolve_workers(workers)
+        elapsed, entries = run(tasks, effective)
+        baseline = baseline or elapsed
+        label = 'inline' if effective == 0 else str(effective)
+        print(f"{label:>8} | {elapsed:>6.2f}s | {len(tasks) / elapsed:>8.1f} | {entries / elapsed:>9.0f} | "
+              f"{baseline / elapsed:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
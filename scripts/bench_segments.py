@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark segment nén: dung lượng trên đĩa và tốc độ đọc JSONL thường vs .gz
+Chạy trên bản copy của data/jobs/ (nếu có) hoặc jobs giả cỡ job board thật
+Usage:
+    python scripts/bench_segments.py
+    python scripts/bench_segments.py --days 60 --jobs-per-day 300 --levels 1 6 9
+"""
+
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.job_index import JobIndex
+from utils.job_store import JOBS_DIR, JobStore
+
+WORDS = (
+    "senior python developer needed for web scraping project budget remote team react frontend "
+    "node.js backend api integration proposals location germany shopify store wordpress plugin "
+    "laravel automation machine learning data pipeline long term contract experience required"
+).split()
+SOURCES = ('We Work Remotely', 'RemoteOK API', 'Remotive', 'Himalayas', 'Jobicy')
+
+
+def synthetic_jobs(rng, days, per_day):
+    """Jobs giả như crawler ghi: mô tả 80-300 từ, field số, crawled_at trải trên `days` ngày"""
+    start = datetime.utcnow() - timedelta(days=days)
+    for day in range(days):
+        for i in range(per_day):
+            crawled = start + timedelta(days=day, seconds=i * 60)
+            low = rng.choice((15, 25, 40, 500, 1500, 60000))
+            yield {
+                'job_id': '%016x' % rng.getrandbits(64),
+                'title': ' '.join(rng.choices(WORDS, k=rng.randint(4, 9))).title(),
+                'description': ' '.join(rng.choices(WORDS, k=rng.randint(80, 300))),
+                'link': f"https://example.com/jobs/{rng.getrandbits(40):x}?utm_source=rss",
+                'source': rng.choice(SOURCES),
+                'category': rng.choice(('python', 'web', 'data', 'devops')),
+                'budget': f"${low}",
+                'budget_min': float(low),
+                'budget_max': float(low),
+                'currency': 'USD',
+                'budget_type': 'hourly' if low < 100 else 'fixed',
+                'created_at': crawled.isoformat(),
+                'created_ts': int(crawled.timestamp()),
+                'crawled_at': crawled.isoformat(),
+                'crawled_ts': int(crawled.timestamp()),
+            }
+
+
+def disk_bytes(store):
+    return sum(store.segment_path(s).stat().st_size for s in store.all_segments)
+
+
+def read_all(store):
+    """Đọc + json.loads mọi job (như summary / sync), return (jobs, giây)"""
+    start = time.perf_counter()
+    count = sum(1 for _ in store.iter_jobs())
+    return count, time.perf_counter() - start
+
+
+def rebuild_index(store):
+    start = time.perf_counter()
+    JobIndex(store, index_path=store.base_dir / 'bench.idx').rebuild()
+    return time.perf_counter() - start
+
+
+def bench_level(source_dir, level, work_dir):
+    base_dir = work_dir / f"level{level}"
+    shutil.copytree(source_dir, base_dir)
+    store = JobStore(base_dir=base_dir, legacy_file=work_dir / 'none.jsonl')
+    logical = store.complete_size()
+    fingerprint = store.fingerprint(logical)
+    plain_disk = disk_bytes(store)
+    plain_jobs, plain_read = read_all(store)
+    plain_index = rebuild_index(store)
+
+    start = time.perf_counter()
+    stats = store.compact(level=level)
+    compact_time = time.perf_counter() - start
+
+    store = JobStore(base_dir=base_dir, legacy_file=work_dir / 'none.jsonl')
+    packed_disk = disk_bytes(store)
+    packed_jobs, packed_read = read_all(store)
+    packed_index = rebuild_index(store)
+    assert packed_jobs == plain_jobs, "số job đọc được khác nhau sau khi nén"
+    assert store.fingerprint(logical) == fingerprint, "fingerprint đổi sau khi nén (index sẽ bị dựng lại)"
+
+    mb = logical / 1024 / 1024
+    return {
+        'level': level,
+        'segments': stats['segments'],
+        'plain_mb': plain_disk / 1024 / 1024,
+        'disk_mb': packed_disk / 1024 / 1024,
+        'ratio': plain_disk / packed_disk if packed_disk else 0,
+        'compact_s': compact_time,
+        'plain_mbs': mb / plain_read,
+        'gz_mbs': mb / packed_read,
+        'jobs_s': packed_jobs / packed_read,
+        'plain_index_s': plain_index,
+        'gz_index_s': packed_index,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark nén segment data/jobs/')
+    parser.add_argument('--days', type=int, default=30, help='Số segment ngày (jobs giả)')
+    parser.add_argument('--jobs-per-day', type=int, default=200)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 6, 9], help='Mức nén gzip cần đo')
+    parser.add_argument('--synthetic', action='store_true', help='Dùng jobs giả kể cả khi có data/jobs/')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_segments_') as tmp:
+        work_dir = Path(tmp)
+        source_dir = work_dir / 'source'
+        if (JOBS_DIR / 'manifest.json').exists() and not args.synthetic:
+            # Chỉ manifest + segment, bỏ index / lock của data thật
+            shutil.copytree(JOBS_DIR, source_dir, ignore=shutil.ignore_patterns('*.idx', '*.bloom', '*.lsh', '.*'))
+            print(f"📂 Dữ liệu: bản copy của {JOBS_DIR}")
+        else:
+            # Ghi dạng raw_jobs.jsonl cũ rồi tách: mỗi ngày crawl thành một segment như data thật
+            legacy_file = work_dir / 'raw_jobs.jsonl'
+            with open(legacy_file, 'w', encoding='utf-8') as f:
+                for job in synthetic_jobs(random.Random(args.seed), args.days, args.jobs_per_day):
+                    f.write(json.dumps(job, ensure_ascii=False) + '\n')
+            stats = JobStore(base_dir=source_dir, legacy_file=legacy_file).migrate_legacy()
+            print(f"🧪 Dữ liệu giả: {stats['jobs']} jobs trong {stats['segments']} segment ngày")
+
+        rows = [bench_level(source_dir, level, work_dir) for level in args.levels]
+
+    first = rows[0]
+    print(f"   {first['segments'] + 1} segment, {first['plain_mb']:.1f}MB JSONL (segment cuối giữ nguyên không nén)\n")
+    header = (f"{'level':>5} | {'trên đĩa':>9} | {'tỷ lệ':>6} | {'compact':>8} | {'đọc JSONL':>10} | "
+              f"{'đọc .gz':>9} | {'jobs/s .gz':>10} | {'index JSONL':>11} | {'index .gz':>9}")
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print(f"{row['level']:>5} | {row['disk_mb']:>7.2f}MB | x{row['ratio']:>5.1f} | {row['compact_s']:>7.2f}s | "
+              f"{row['plain_mbs']:>6.0f}MB/s | {row['gz_mbs']:>5.0f}MB/s | {row['jobs_s']:>10.0f} | "
+              f"{row['plain_index_s']:>10.2f}s | {row['gz_index_s']:>8.2f}s")
+    print("\nMB/s tính trên byte JSONL chưa nén (đọc + json.loads mọi job); fingerprint index không đổi sau khi nén")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,352 +4,127 @@ Script crawl jobs từ nhiều nguồn uy tín (không chỉ Upwork)
 Hỗ trợ RSS feeds, APIs, và có thể mở rộng cho web scraping
 """
 
-import feedparser
-import yaml
 import json
 import os
-import re
-import requests
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 # urlencode, quote không dùng nữa sau khi refactor
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import sys
 
+# Mốc thời gian cho stage 'init' (import + load index/state) trong --stats-file
+script_start = time.perf_counter()
+
 # Add parent directory to path for utils
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Module nhẹ; aiohttp / feedparser / pipeline và config, index, state chỉ load trong main()
+# để `--help` không phải import hay đọc file nào
+from utils.config import get_config
 from utils.logger import setup_logger
-from utils.validation import validate_job, sanitize_job
+from utils.validation import validate_job
+from utils.http_cache import HttpCache
+from utils.job_index import open_job_index, snapshot_spec
+from utils.job_store import JobStore
+from utils.near_dup import SimHashIndex, append_duplicates
+from utils.scheduler import PollScheduler
+from utils.health import HealthRegistry
+from utils.trends import TrendArchive
+from utils.watermark import HighWaterMarks
 
 # Setup logger
 logger = setup_logger('crawl_multi_source')
 
-# Load config
-config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
-
-sources = config.get('sources', {})
-keywords = config.get('search_keywords', [])
-crawl_config = config.get('crawl', {})
-timeout_per_source = crawl_config.get('timeout_per_source', 5)
-max_workers = crawl_config.get('max_workers', 8)
-
-# Load existing jobs
-existing_job_ids = set()
-raw_jobs_file = Path(__file__).parent.parent / 'data' / 'raw_jobs.jsonl'
-
-if raw_jobs_file.exists():
-    with open(raw_jobs_file, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            if line.strip():
-                # Skip git conflict markers
-                if line.strip().startswith('<<<<<<<') or line.strip().startswith('=======') or line.strip().startswith('>>>>>>>'):
-                    logger.warning(f"Skipping git conflict marker at line {line_num} in raw_jobs.jsonl")
-                    continue
-                try:
-                    job = json.loads(line)
-                    job_id = job.get('job_id', '')
-                    if job_id:
-                        existing_job_ids.add(job_id)
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Invalid JSON at line {line_num} in raw_jobs.jsonl: {e}")
-                except Exception as e:
-                    logger.error(f"Error loading existing job at line {line_num}: {e}")
-
-def generate_job_id(title, link, source):
-    """Generate unique job ID từ title, link và source"""
-    import hashlib
-    combined = f"{source}_{title}_{link}"
-    return hashlib.md5(combined.encode()).hexdigest()[:12]
-
-def parse_budget(text):
-    """Parse budget từ text"""
-    # Tìm $XXX hoặc $XXX - $YYY
-    budget_match = re.search(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', text, re.IGNORECASE)
-    if budget_match:
-        return budget_match.group(1)
-    return None
-
-def parse_proposals(text):
-    """Parse số proposals/bids từ text"""
-    prop_match = re.search(r'(\d+)\s*(?:proposal|bid|applicant)', text, re.IGNORECASE)
-    if prop_match:
-        return int(prop_match.group(1))
-    return None
-
-def normalize_job(entry, source_name, source_type):
-    """Normalize job data từ các nguồn khác nhau về cùng format"""
-    title = entry.get('title', '')
-    link = entry.get('link', entry.get('url', ''))
-    description = entry.get('summary', entry.get('description', entry.get('content', '')))
-    
-    job_id = generate_job_id(title, link, source_name)
-    
-    if job_id in existing_job_ids:
-        return None
-    
-    # Parse metadata
-    budget = parse_budget(description or title)
-    proposals = parse_proposals(description or title)
-    
-    # Extract location/client country
-    location = entry.get('location', entry.get('where', ''))
-    if not location:
-        location_match = re.search(r'(?:from|in|location)[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 
-                                  description or '', re.IGNORECASE)
-        if location_match:
-            location = location_match.group(1)
-    
-    # Determine category từ keywords
-    category = "General"
-    description_lower = (description or '').lower()
-    for keyword in keywords:
-        if keyword.lower() in description_lower or keyword.lower() in title.lower():
-            category = keyword
-            break
-    
-    job_data = {
-        'job_id': job_id,
-        'title': title,
-        'description': description or '',
-        'link': link,
-        'budget': budget,
-        'proposals': proposals,
-        'client_country': location or 'Unknown',
-        'category': category,
-        'source': source_name,
-        'source_type': source_type,
-        'created_at': entry.get('published', entry.get('created_at', datetime.utcnow().isoformat())),
-        'crawled_at': datetime.utcnow().isoformat()
-    }
-    
-    # Sanitize and validate
-    job_data = sanitize_job(job_data)
-    is_valid, errors = validate_job(job_data)
-    
-    if not is_valid:
-        logger.warning(f"Invalid job data from {source_name}: {', '.join(errors)}")
-        return None
-    
-    return job_data
-
-def crawl_rss_feed(feed_config, retry_attempts=3):
-    """Crawl từ RSS feed với retry logic, return (jobs, error_msg)"""
-    if not feed_config.get('enabled', False):
-        return ([], None)
-    
-    url = feed_config['url']
-    name = feed_config['name']
-    
-    # Headers để tránh bị block
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'application/rss+xml, application/xml, text/xml, */*',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Cache-Control': 'no-cache'
-    }
-    
-    # Retry logic
-    for attempt in range(retry_attempts):
-        try:
-            # Parse với headers và timeout
-            feed = feedparser.parse(url, request_headers=headers)
-            
-            status = feed.get('status', 200)
-            error_msg = None
-            
-            # Check HTTP status
-            if status not in [200, 301, 302]:  # Allow redirects
-                if attempt < retry_attempts - 1:
-                    logger.warning(f"RSS feed {name} returned status {status}, retrying ({attempt + 1}/{retry_attempts})...")
-                    import time
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    continue
-                error_msg = f"HTTP {status}"
-                logger.warning(f"RSS feed {name} returned status {status} after {retry_attempts} attempts")
-                return ([], error_msg)
-            
-            # Check bozo (parsing errors)
-            if hasattr(feed, 'bozo') and feed.bozo:
-                if attempt < retry_attempts - 1:
-                    logger.warning(f"RSS feed {name} parse error, retrying ({attempt + 1}/{retry_attempts})...")
-                    import time
-                    time.sleep(2 ** attempt)
-                    continue
-                if hasattr(feed, 'bozo_exception'):
-                    error_msg = f"Parse error: {str(feed.bozo_exception)[:40]}"
-                    logger.warning(f"RSS feed {name} parse error: {feed.bozo_exception}")
-                else:
-                    error_msg = "Parse error"
-                    logger.warning(f"RSS feed {name} parse error (unknown)")
-                return ([], error_msg)
-            
-            # Check if feed has entries
-            if not feed.entries:
-                logger.debug(f"RSS feed {name} has no entries")
-                return ([], None)
-            
-            # Process entries
-            jobs = []
-            for entry in feed.entries:
-                try:
-                    job = normalize_job(entry, name, 'rss')
-                    if job:
-                        jobs.append(job)
-                        existing_job_ids.add(job['job_id'])
-                except Exception as e:
-                    logger.error(f"Error normalizing job from {name}: {e}", exc_info=True)
-                    continue
-            
-            logger.info(f"RSS feed {name}: found {len(jobs)} new jobs")
-            return (jobs, None)
-        
-        except (requests.RequestException, Exception) as e:
-            if attempt < retry_attempts - 1:
-                logger.warning(f"RSS feed {name} error, retrying ({attempt + 1}/{retry_attempts}): {e}")
-                import time
-                time.sleep(2 ** attempt)
-                continue
-            error_msg = f"Error: {str(e)[:50]}"
-            logger.error(f"Error crawling RSS feed {name} after {retry_attempts} attempts: {e}", exc_info=True)
-            return ([], error_msg)
+def main(fetch_all_sources=False, replay_server=None, stats_file=None):
+    """
+    Main crawl function - tải song song bằng asyncio, parse sau khi tải xong
+    
+    Args:
+        fetch_all_sources: Bỏ qua lịch của scheduler, tải mọi nguồn đang bật
+        replay_server: URL replay server (scripts/crawl_replay.py serve) - tải từ cassette thay vì nguồn thật
+        stats_file: Ghi thời gian từng stage + số jobs/bytes ra file JSON (cho benchmark)
+    """
+    from utils.fetcher import build_request, connection_stats
+    from utils.feed_parser import parse_source
+    from utils.pipeline import peak_rss_mb, run_pipeline
+    
+    if replay_server:
+        from utils.replay import is_sandbox
+        if not is_sandbox(Path(__file__).parent.parent):
+            print("❌ --replay-server chỉ chạy trên bản copy tạm của crawler (python scripts/crawl_replay.py serve / bench),")
+            print("   không ghi jobs, index, HTTP cache, watermark từ cassette vào data/ thật")
+            sys.exit(2)
+    
+    # Load config
+    config = get_config()
+    
+    sources = config.get('sources', {})
+    crawl_config = config.get('crawl', {})
+    timeout_per_source = crawl_config.get('timeout_per_source', 5)
+    connect_timeout = crawl_config.get('connect_timeout', 5)
+    read_timeout = crawl_config.get('read_timeout', timeout_per_source)
+    retry_attempts = crawl_config.get('retry_attempts', 3)
+    max_connections = crawl_config.get('max_connections', 20)
+    max_connections_per_host = crawl_config.get('max_connections_per_host', 4)
+    parse_workers = crawl_config.get('parse_workers')  # None = số CPU, 0 = parse trong process chính
+    parse_queue_size = crawl_config.get('parse_queue_size', 8)
+    scheduler_config = crawl_config.get('scheduler', {})
+    circuit_config = crawl_config.get('circuit_breaker', {})
+    
+    # Raw jobs lưu theo segment ngày trong data/jobs/ (tự tách raw_jobs.jsonl cũ nếu còn)
+    storage_config = config.get('storage', {})
+    job_store = JobStore(max_segment_bytes=storage_config.get('max_segment_mb', 50) * 1024 * 1024)
+    if job_store.needs_migration():
+        stats = job_store.migrate_legacy()
+        print(f"📦 Đã tách raw_jobs.jsonl thành {stats['segments']} segment ({stats['jobs']} jobs)")
+        if not stats['removed']:
+            print("⚠ raw_jobs.jsonl đổi cỡ trong lúc tách nên được giữ lại")
+    
+    # Load existing job IDs từ index nhị phân của store (chỉ đọc phần mới append)
+    dedup_config = config.get('dedup', {})
+    existing_job_ids = open_job_index(
+        job_store,
+        bloom_capacity=dedup_config.get('bloom_capacity', 100000),
+        bloom_error_rate=dedup_config.get('bloom_error_rate', 0.001)
+    )
+    
+    # Near-duplicate: cùng job đăng qua nguồn khác (job_id khác) được link tới job canonical
+    # trong data/jobs/duplicates.jsonl thay vì lưu/embed/phân tích lại
+    near_dup_config = config.get('near_dup', {})
+    near_dup_enabled = near_dup_config.get('enabled', True)
+    duplicates_file = job_store.base_dir / 'duplicates.jsonl'
+    duplicate_job_ids = open_job_index(duplicates_file, bloom_capacity=10000)
+    near_dup_index = SimHashIndex(
+        job_store.base_dir / 'simhash.lsh',
+        max_distance=near_dup_config.get('max_distance', 4),
+        window_days=near_dup_config.get('window_days', 30)
+    )
+    if near_dup_enabled:
+        if not near_dup_index.load() and job_store.exists():
+            # Lần đầu bật (hoặc mất file / layout cũ): dựng từ các segment trong cửa sổ thời gian
+            since = datetime.utcnow() - timedelta(days=near_dup_index.window_days)
+            count = near_dup_index.rebuild(job_store.iter_jobs(since=since))
+            print(f"🧬 Đã dựng SimHash index từ {count} jobs gần đây")
+    
+    # High-water mark: chỉ normalize các entry trước vùng đã xử lý ở run trước
+    watermark_config = crawl_config.get('high_water_mark', {})
+    watermarks = HighWaterMarks(
+        margin_entries=watermark_config.get('margin_entries', 3),
+        margin_hours=watermark_config.get('margin_hours', 24),
+        keep_keys=watermark_config.get('keep_keys', 50)
+    ) if watermark_config.get('enabled', True) else None
+    
+    stage_start = time.perf_counter()
+    stage_times = {'init': round(stage_start - script_start, 3)}
     
-    return ([], "Max retries exceeded")
-
-def crawl_api_source(api_config):
-    """Crawl từ API"""
-    if not api_config.get('enabled', False):
-        return []
-    
-    url = api_config['url']
-    name = api_config['name']
-    params = api_config.get('params', {})
-    
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        
-        if not isinstance(data, list):
-            data = [data]
-        
-        # Filter out invalid entries
-        valid_data = [item for item in data if item and isinstance(item, dict)]
-        
-        # Return count, don't print here (will print in main)
-        
-        jobs = []
-        for item in valid_data:
-            try:
-                # RemoteOK API format
-                if 'slug' in item or 'id' in item:
-                    entry = {
-                        'title': item.get('position', item.get('title', item.get('name', ''))),
-                        'link': item.get('url', item.get('apply_url', f"https://remoteok.io/remote-jobs/{item.get('id', '')}")),
-                        'description': item.get('description', item.get('summary', '')),
-                        'location': item.get('location', item.get('location_name', 'Remote')),
-                        'published': item.get('epoch', item.get('created_at', item.get('date', '')))
-                    }
-                else:
-                    # Generic API format
-                    entry = {
-                        'title': item.get('title', item.get('name', '')),
-                        'link': item.get('url', item.get('link', item.get('apply_url', ''))),
-                        'description': item.get('description', item.get('summary', '')),
-                        'location': item.get('location', ''),
-                        'published': item.get('created_at', item.get('date', ''))
-                    }
-                
-                job = normalize_job(entry, name, 'api')
-                if job:
-                    jobs.append(job)
-                    existing_job_ids.add(job['job_id'])
-            except Exception as e:
-                logger.error(f"Error processing API item from {name}: {e}")
-                continue
-        
-        logger.info(f"API source {name}: found {len(jobs)} new jobs")
-        return jobs
-    
-    except requests.RequestException as e:
-        logger.error(f"API request error for {name}: {e}")
-        raise Exception(f"{name}: {str(e)[:50]}")
-    except Exception as e:
-        logger.error(f"Error crawling API source {name}: {e}", exc_info=True)
-        raise Exception(f"{name}: {str(e)[:50]}")
-
-def main():
-    """Main crawl function với parallel processing"""
     print("=" * 60)
     print("🔄 Bắt đầu crawl jobs từ nhiều nguồn uy tín...")
     print("=" * 60)
     
     all_jobs = []
     
-    # Crawl job boards RSS
     job_boards = sources.get('job_boards', [])
     enabled_job_boards = [f for f in job_boards if f.get('enabled', False)]
-    print(f"\n📡 Crawling {len(enabled_job_boards)} job board feeds (parallel, timeout {timeout_per_source}s each)...")
-    
-    def crawl_with_timeout(feed_config, index, total):
-        """Crawl với timeout"""
-        try:
-            jobs, error_msg = crawl_rss_feed(feed_config)
-            return (index, feed_config['name'], jobs, error_msg)
-        except Exception as e:
-            return (index, feed_config['name'], [], str(e)[:50])
-    
-    # Chạy song song
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(crawl_with_timeout, feed, i+1, len(enabled_job_boards)): feed 
-            for i, feed in enumerate(enabled_job_boards)
-        }
-        
-        results = []
-        try:
-            # Tăng overall timeout để đủ cho tất cả feeds
-            overall_timeout = (timeout_per_source * len(enabled_job_boards) // max_workers) + (timeout_per_source * 2)
-            for future in as_completed(futures, timeout=overall_timeout):
-                try:
-                    result = future.result(timeout=timeout_per_source)
-                    results.append(result)
-                except Exception as e:
-                    feed_name = futures[future]['name']
-                    results.append((0, feed_name, [], f"Timeout: {str(e)[:30]}"))
-        except Exception as e:
-            # Nếu timeout toàn bộ, lấy kết quả đã có
-            print(f"⚠ Overall timeout, using partial results: {str(e)[:50]}")
-            for future in futures:
-                if future.done():
-                    try:
-                        results.append(future.result())
-                    except:
-                        pass
-        
-        # Sort theo index và print (loại bỏ duplicate)
-        results_dict = {}
-        for result in results:
-            index, name, jobs, error = result
-            # Chỉ giữ kết quả đầu tiên nếu có duplicate
-            if index not in results_dict:
-                results_dict[index] = result
-        
-        # Sort và print
-        sorted_results = sorted(results_dict.values(), key=lambda x: x[0])
-        for index, name, jobs, error in sorted_results:
-            if error:
-                print(f"[{index}/{len(enabled_job_boards)}] {name}... ✗ {error}")
-            else:
-                all_jobs.extend(jobs)
-                print(f"[{index}/{len(enabled_job_boards)}] {name}... ✓ {len(jobs)} jobs")
     
     # Crawl tech blogs (trends) - chỉ lưu metadata, không phải jobs
     # Skip trong GitHub Actions để tiết kiệm thời gian
@@ -358,92 +133,274 @@ def main():
     
     tech_blogs = sources.get('tech_blogs', [])
     enabled_blogs = [f for f in tech_blogs if f.get('enabled', False)]
+    crawl_blogs = bool(enabled_blogs) and not (skip_tech_blogs and is_ci)
     
-    if skip_tech_blogs and is_ci:
+    api_sources = sources.get('api_sources', [])
+    enabled_apis = [a for a in api_sources if a.get('enabled', False)]
+    
+    # Scheduler: chỉ tải nguồn đã đến hạn (lịch riêng theo số job mới của từng nguồn)
+    scheduled_sources = enabled_job_boards + (enabled_blogs if crawl_blogs else []) + enabled_apis
+    scheduler = None
+    if scheduler_config.get('enabled', True):
+        scheduler = PollScheduler(
+            min_interval_minutes=scheduler_config.get('min_interval_minutes', crawl_config.get('interval_minutes', 15)),
+            max_interval_minutes=scheduler_config.get('max_interval_minutes', 360),
+            target_new_per_fetch=scheduler_config.get('target_new_per_fetch', 3),
+            jitter=scheduler_config.get('jitter', 0.1),
+            history_size=scheduler_config.get('history_size', 20)
+        )
+        enabled_job_boards = scheduler.select(enabled_job_boards, force=fetch_all_sources)
+        enabled_blogs = scheduler.select(enabled_blogs, force=fetch_all_sources)
+        enabled_apis = scheduler.select(enabled_apis, force=fetch_all_sources)
+        due_count = len(enabled_job_boards) + (len(enabled_blogs) if crawl_blogs else 0) + len(enabled_apis)
+        print(f"🗓️  {due_count}/{len(scheduled_sources)} nguồn đến hạn tải" + (" (--all)" if fetch_all_sources else ""))
+    new_by_source = {}
+    
+    # Circuit breaker: bỏ qua nguồn lỗi liên tiếp đang trong cool-down, nguồn hết cool-down chỉ thử 1 lần
+    health = HealthRegistry(
+        failure_threshold=circuit_config.get('failure_threshold', 3),
+        cooldown_minutes=circuit_config.get('cooldown_minutes', 60),
+        max_cooldown_minutes=circuit_config.get('max_cooldown_minutes', 1440),
+        history_size=circuit_config.get('history_size', 50)
+    )
+    blocked_sources = []
+    if circuit_config.get('enabled', True):
+        enabled_job_boards, blocked = health.select(enabled_job_boards)
+        blocked_sources += blocked
+        if crawl_blogs:
+            enabled_blogs, blocked = health.select(enabled_blogs)
+            blocked_sources += blocked
+        enabled_apis, blocked = health.select(enabled_apis)
+        blocked_sources += blocked
+        if blocked_sources:
+            print(f"⛔ Circuit open, bỏ qua {len(blocked_sources)} nguồn: {', '.join(s['name'] for s in blocked_sources)}")
+    # Lỗi fetch/parse theo nguồn, dùng cho health registry
+    source_errors = {}
+    
+    # Tải tất cả nguồn cùng lúc trong một event loop, mỗi request có deadline connect/read riêng
+    fetch_requests = [build_request(f, 'job_board') for f in enabled_job_boards]
+    if crawl_blogs:
+        fetch_requests += [build_request(b, 'tech_blog') for b in enabled_blogs]
+    fetch_requests += [build_request(a, 'api') for a in enabled_apis]
+    for request in fetch_requests:
+        if health.is_probe(request['name']):
+            request['retry_attempts'] = 1  # Half-open probe: không tốn retry budget cho nguồn vừa hỏng
+    if replay_server:
+        from utils.replay import point_at_replay
+        for request in fetch_requests:
+            point_at_replay(request, replay_server)
+        print(f"📼 Replay: tải {len(fetch_requests)} nguồn từ {replay_server}")
+    
+    # Conditional GET: gửi ETag / Last-Modified của lần trước
+    http_cache = HttpCache()
+    for request in fetch_requests:
+        request['headers'].update(http_cache.conditional_headers(request['name'], request['url']))
+    
+    search_keywords = config.get('search_keywords', [])
+    # Worker mở read-only index job_id đã đồng bộ ở trên, bỏ entry đã có trước khi normalize
+    known_ids = [snapshot_spec(existing_job_ids), snapshot_spec(duplicate_job_ids)]
+    sources_by_name = {s['name']: s for s in enabled_job_boards + enabled_blogs + enabled_apis}
+    
+    def prepare_parse(result):
+        """Chạy ở process chính khi một nguồn tải xong: kiểm tra HTTP cache, tạo task cho worker parse"""
+        http_cache.apply(result)
+        if result['error'] or result.get('not_modified'):
+            return None
+        use_mark = watermarks is not None and result['kind'] != 'tech_blog'
+        return {
+            'name': result['name'],
+            'kind': result['kind'],
+            'config': sources_by_name[result['name']],
+            'body': result['body'],
+            'body_path': result['body_path'],
+            'headers': result['headers'],
+            'keywords': search_keywords,
+            'known_ids': known_ids,
+            'mark': watermarks.entries.get(result['name']) if use_mark else None,
+            'watermark': watermarks.options() if use_mark else None,
+        }
+    
+    # Stage tải (asyncio) và stage parse (process pool) nối bằng queue giới hạn, chạy chồng lên nhau
+    print(f"\n🌐 Đang tải {len(fetch_requests)} nguồn song song (connect {connect_timeout}s, read {read_timeout}s, tối đa {timeout_per_source}s mỗi request)...")
+    overall_timeout = (timeout_per_source + 2 ** retry_attempts) * retry_attempts + timeout_per_source
+    fetch_results, parse_outputs, pipeline_stats = run_pipeline(
+        fetch_requests,
+        prepare_parse,
+        parse_source,
+        workers=parse_workers,
+        queue_size=parse_queue_size,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        total_timeout=timeout_per_source,
+        retry_attempts=retry_attempts,
+        max_connections=max_connections,
+        max_per_host=max_connections_per_host,
+        overall_timeout=overall_timeout
+    )
+    outputs_by_name = {r['name']: (r, output) for r, output in zip(fetch_results, parse_outputs)}
+    workers_label = f"{pipeline_stats['workers']} worker process" if pipeline_stats['workers'] else "process chính"
+    print(f"⚙️  Tải + parse xong trong {pipeline_stats['elapsed']}s (parse bằng {workers_label})")
+    stage_times['fetch'] = pipeline_stats['fetch_elapsed']
+    stage_times['parse_busy'] = pipeline_stats['parse_busy']
+    stage_times['fetch_parse'] = round(time.perf_counter() - stage_start, 3)
+    stage_start = time.perf_counter()
+    
+    fetched_ok = sum(1 for r in fetch_results if not r['error'])
+    print(f"📦 {http_cache.hits}/{fetched_ok} nguồn không đổi (dùng cache, bỏ qua parse), tiết kiệm ~{http_cache.bytes_saved // 1024} KB tải về")
+    logger.info(f"HTTP cache: {http_cache.hits}/{fetched_ok} sources not modified, ~{http_cache.bytes_saved} bytes saved")
+    
+    # Kết nối dùng lại từ pool keep-alive (theo host)
+    conn_stats = connection_stats(fetch_results)
+    total_new = sum(s['new'] for s in conn_stats.values())
+    total_reused = sum(s['reused'] for s in conn_stats.values())
+    print(f"🔌 {len(conn_stats)} host: {total_new} kết nối mới, {total_reused} lần dùng lại kết nối")
+    for host, stats in sorted(conn_stats.items()):
+        logger.info(f"Connections {host}: {stats['requests']} requests, {stats['new']} new, {stats['reused']} reused")
+    
+    def source_output(name):
+        """Kết quả parse của nguồn, None nếu lỗi (ghi vào source_errors) hoặc không đổi"""
+        result, output = outputs_by_name[name]
+        if isinstance(output, Exception):
+            output = {'error': f"Parse worker error: {str(output)[:50]}"}
+        error = result['error'] or (output or {}).get('error')
+        if error:
+            source_errors[name] = error
+            return None
+        return output
+    
+    def collect_jobs(source):
+        """Dedup jobs worker trả về theo job_id, cập nhật high-water mark, return dòng trạng thái"""
+        name = source['name']
+        output = source_output(name)
+        if name in source_errors:
+            return f"✗ {source_errors[name]}"
+        if output is None:
+            logger.info(f"{name}: not modified, skipped parsing")
+            return "✓ không đổi (cache)"
+        jobs = []
+        for job in output['jobs']:
+            if job['job_id'] in existing_job_ids or job['job_id'] in duplicate_job_ids:
+                continue
+            existing_job_ids.add(job['job_id'])
+            jobs.append(job)
+        if watermarks:
+            watermarks.advance(name, output['head'])
+            watermarks.skipped += output['skipped']
+        new_by_source[name] = len(jobs)
+        all_jobs.extend(jobs)
+        http_cache.commit(name)  # Parse xong mới ghi nhận validators / body hash
+        logger.info(f"{name}: found {len(jobs)} new jobs ({output['processed']}/{output['entries']} entries processed)")
+        return f"✓ {len(jobs)} jobs"
+    
+    # Crawl job boards RSS
+    print(f"\n📡 Parsing {len(enabled_job_boards)} job board feeds...")
+    for i, feed_config in enumerate(enabled_job_boards, 1):
+        print(f"[{i}/{len(enabled_job_boards)}] {feed_config['name']}... {collect_jobs(feed_config)}")
+    
+    if enabled_blogs and not crawl_blogs:
         print(f"\n⏭️  Skipping {len(enabled_blogs)} tech blog feeds (CI mode - chỉ crawl job boards)")
-    elif enabled_blogs:
-        print(f"\n📚 Crawling {len(enabled_blogs)} tech blog feeds (trends)...")
-        feeds_dir = Path(__file__).parent.parent / 'data' / 'feeds'
-        feeds_dir.mkdir(parents=True, exist_ok=True)
+    elif crawl_blogs:
+        print(f"\n📚 Parsing {len(enabled_blogs)} tech blog feeds (trends)...")
+        # Bài đã lưu (theo link chuẩn hóa) trong data/feeds/trends_*.jsonl, chỉ ghi bài chưa thấy
+        trend_archive = TrendArchive()
+        seen_articles = open_job_index(trend_archive, bloom_capacity=20000)
+        new_articles = []
         
         for i, blog in enumerate(enabled_blogs, 1):
             print(f"[{i}/{len(enabled_blogs)}] {blog['name']}...", end=' ', flush=True)
-            try:
-                feed = feedparser.parse(blog['url'])
-                if feed.entries:
-                    # Lưu trends vào file riêng
-                    trends_file = feeds_dir / f"trends_{datetime.utcnow().strftime('%Y%m%d')}.jsonl"
-                    with open(trends_file, 'a', encoding='utf-8') as f:
-                        for entry in feed.entries[:5]:  # Lấy 5 bài mới nhất
-                            trend_data = {
-                                'title': entry.get('title', ''),
-                                'link': entry.get('link', ''),
-                                'summary': entry.get('summary', '')[:500],
-                                'source': blog['name'],
-                                'published': entry.get('published', ''),
-                                'crawled_at': datetime.utcnow().isoformat()
-                            }
-                            f.write(json.dumps(trend_data, ensure_ascii=False) + '\n')
-                    print(f"✓ {len(feed.entries)} articles")
-                else:
-                    print("✓ 0 articles")
-            except Exception as e:
-                print(f"✗ {str(e)[:50]}")
+            output = source_output(blog['name'])
+            if blog['name'] in source_errors:
+                print(f"✗ {source_errors[blog['name']]}")
+                continue
+            if output is None:
+                print("✓ không đổi (cache)")
+                continue
+            unseen = []
+            for article in output['articles']:
+                if article['article_id'] in seen_articles:
+                    continue
+                seen_articles.add(article['article_id'])  # Cùng bài trong nhiều feed chỉ ghi một lần
+                unseen.append(article)
+            new_articles.extend(unseen)
+            new_by_source[blog['name']] = len(unseen)
+            http_cache.commit(blog['name'])
+            print(f"✓ {output['entries']} articles, {len(unseen)} mới")
+        
+        saved_articles = trend_archive.append(new_articles)
+        seen_articles.update()
+        print(f"📰 Đã lưu {saved_articles} bài mới vào {trend_archive.name}")
+        if storage_config.get('compress_closed', True):
+            trend_archive.compact(level=storage_config.get('compress_level', 6))
     
     # Crawl API sources
-    api_sources = sources.get('api_sources', [])
-    enabled_apis = [a for a in api_sources if a.get('enabled', False)]
     if enabled_apis:
-        print(f"\n🔌 Crawling {len(enabled_apis)} API sources...")
+        print(f"\n🔌 Parsing {len(enabled_apis)} API sources...")
         for i, api_config in enumerate(enabled_apis, 1):
-            print(f"[{i}/{len(enabled_apis)}] {api_config['name']}...", end=' ', flush=True)
-            try:
-                jobs = crawl_api_source(api_config)
-                all_jobs.extend(jobs)
-                print(f"✓ {len(jobs)} jobs")
-            except Exception as e:
-                print(f"✗ {str(e)[:50]}")
+            print(f"[{i}/{len(enabled_apis)}] {api_config['name']}... {collect_jobs(api_config)}")
     
     # TODO: HackerNews "Who is Hiring" parser (cần BeautifulSoup)
     # Có thể implement sau nếu cần
     
+    stage_times['collect'] = round(time.perf_counter() - stage_start, 3)
+    stage_start = time.perf_counter()
+    
     # Save jobs
     print(f"\n💾 Đang lưu {len(all_jobs)} jobs...")
-    logger.info(f"Saving {len(all_jobs)} new jobs to {raw_jobs_file}")
+    logger.info(f"Saving {len(all_jobs)} new jobs to {job_store.base_dir}")
     
     # Debug: Print summary
     if len(all_jobs) == 0:
         print("⚠️  WARNING: Không tìm thấy jobs mới!")
         print(f"   - Đã crawl {len(enabled_job_boards)} job boards")
-        if not (skip_tech_blogs and is_ci):
+        if crawl_blogs:
             print(f"   - Đã crawl {len(enabled_blogs)} tech blogs")
         print(f"   - Đã crawl {len(enabled_apis)} API sources")
         print("   - Có thể tất cả jobs đã tồn tại (duplicate)")
         logger.warning("No new jobs found after crawling all sources")
     
+    saved_count = 0
     if all_jobs:
-        saved_count = 0
+        valid_jobs = []
         skipped_count = 0
         
-        with open(raw_jobs_file, 'a', encoding='utf-8') as f:
-            for job in all_jobs:
-                try:
-                    # Final validation before saving
-                    is_valid, errors = validate_job(job)
-                    if not is_valid:
-                        logger.warning(f"Skipping invalid job {job.get('job_id', 'unknown')}: {', '.join(errors)}")
-                        skipped_count += 1
-                        continue
-                    
-                    f.write(json.dumps(job, ensure_ascii=False) + '\n')
-                    saved_count += 1
-                except Exception as e:
-                    logger.error(f"Error saving job {job.get('job_id', 'unknown')}: {e}")
-                    skipped_count += 1
-                    continue
+        for job in all_jobs:
+            # Final validation before saving
+            is_valid, errors = validate_job(job)
+            if not is_valid:
+                logger.warning(f"Skipping invalid job {job.get('job_id', 'unknown')}: {', '.join(errors)}")
+                skipped_count += 1
+                continue
+            valid_jobs.append(job)
+        
+        # Near-duplicate: so SimHash với jobs gần đây (và các job trước trong batch này)
+        duplicate_links = []
+        if near_dup_enabled:
+            unique_jobs = []
+            for job in valid_jobs:
+                match = near_dup_index.link(job)
+                if match:
+                    canonical_id, distance = match
+                    duplicate_links.append({
+                        'job_id': job['job_id'],
+                        'duplicate_of': canonical_id,
+                        'distance': distance,
+                        'title': job['title'],
+                        'link': job['link'],
+                        'source': job['source'],
+                        'crawled_at': job['crawled_at']
+                    })
+                    logger.info(f"Near-duplicate {job['job_id']} ({job['source']}) -> {canonical_id}, distance {distance}")
+                else:
+                    unique_jobs.append(job)
+            valid_jobs = unique_jobs
+        
+        saved_count = job_store.append(valid_jobs)
+        append_duplicates(duplicates_file, duplicate_links)
         
         sources_count = len(set(j['source'] for j in all_jobs))
         print(f"\n✅ Đã thêm {saved_count} jobs mới từ {sources_count} nguồn")
+        if duplicate_links:
+            print(f"🔗 {len(duplicate_links)} jobs trùng với job đã có từ nguồn khác (link trong {duplicates_file.name}, không lưu lại)")
         if skipped_count > 0:
             print(f"⚠️  Đã bỏ qua {skipped_count} jobs không hợp lệ")
             logger.warning(f"Skipped {skipped_count} invalid jobs")
@@ -462,8 +419,76 @@ def main():
         print("   - Có lỗi trong quá trình crawl (check logs)")
         logger.info("No new jobs found")
     
+    # Segment ngày trước đã đóng: nén .gz (index không đổi vì offset tính trên byte chưa nén)
+    if storage_config.get('compress_closed', True):
+        compact_stats = job_store.compact(level=storage_config.get('compress_level', 6))
+        if compact_stats['segments']:
+            print(f"🗜️  Đã nén {compact_stats['segments']} segment cũ: "
+                  f"{compact_stats['bytes_in'] / 1024:.0f}KB → {compact_stats['bytes_out'] / 1024:.0f}KB")
+    
+    stage_times['save'] = round(time.perf_counter() - stage_start, 3)
+    stage_start = time.perf_counter()
+    
+    # Ghi lịch sử từng nguồn đã tải và tính lần tải kế tiếp
+    if scheduler:
+        for result in fetch_results:
+            scheduler.record(result['name'], new_by_source.get(result['name'], 0),
+                             result['elapsed'] if result['status'] else None, result['error'])
+        scheduler.save()
+        print("\n🗓️  Lịch tải theo nguồn:")
+        notes = {s['name']: 'skip (circuit open)' for s in blocked_sources}
+        notes.update({r['name']: 'probe (half-open)' for r in fetch_requests if r['retry_attempts'] == 1})
+        for line in scheduler.table(scheduled_sources, [r['name'] for r in fetch_results], notes):
+            print(line)
+    
+    # Health registry: ghi kết quả fetch + parse, cập nhật circuit breaker
+    for result in fetch_results:
+        health.record(result['name'], result['name'] not in source_errors,
+                      result['elapsed'] if result['status'] else None, source_errors.get(result['name']))
+    health.save()
+    print("\n🩺 Health theo nguồn:")
+    for line in health.table(scheduled_sources):
+        print(line)
+    
+    # Cập nhật index job_id với các dòng vừa append vào segment
+    existing_job_ids.update()
+    duplicate_job_ids.update()
+    if near_dup_enabled:
+        near_dup_index.save()
+    # High-water marks lưu sau khi jobs đã ghi - crash giữa chừng thì run sau xử lý lại
+    if watermarks:
+        watermarks.save()
+        if watermarks.skipped:
+            print(f"⏩ Bỏ qua {watermarks.skipped} entries đã xử lý ở run trước (high-water mark)")
+    
+    # Lưu validators sau khi jobs đã ghi xong - crash giữa chừng thì run sau tải lại đầy đủ
+    http_cache.save()
+    stage_times['state'] = round(time.perf_counter() - stage_start, 3)
+    
+    if stats_file:
+        with open(stats_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'stages': stage_times,
+                'parse_workers': pipeline_stats['workers'],
+                'sources': len(fetch_results),
+                'sources_failed': len(source_errors),
+                'bytes': sum(r['size'] for r in fetch_results),
+                'jobs_found': len(all_jobs),
+                'jobs_saved': saved_count,
+                # Sau executor.shutdown(): RUSAGE_CHILDREN đã tính cả worker parse
+                'peak_mb': peak_rss_mb(),
+            }, f, indent=1)
+    
     print("=" * 60)
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Crawl jobs & trends từ các nguồn trong config.yaml')
+    parser.add_argument('--all', action='store_true', help='Tải tất cả nguồn, bỏ qua lịch của scheduler')
+    parser.add_argument('--replay-server', metavar='URL',
+                        help='Tải từ replay server local thay vì nguồn thật (chỉ trong thư mục tạm của crawl_replay.py serve / bench)')
+    parser.add_argument('--stats-file', metavar='PATH', help='Ghi thời gian từng stage, số jobs/bytes ra file JSON')
+    args = parser.parse_args()
+    main(fetch_all_sources=args.all, replay_server=args.replay_server, stats_file=args.stats_file)
 
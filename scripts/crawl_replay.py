@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Record / replay nguồn crawl để benchmark crawler không cần mạng
+Usage:
+    python scripts/crawl_replay.py record                 # Ghi response mọi nguồn đang bật vào cassette
+    python scripts/crawl_replay.py serve --port 8765      # Phát lại cassette + tạo bản copy tạm của crawler,
+                                                          # in lệnh chạy crawler trong bản copy đó
+    python scripts/crawl_replay.py bench --runs 3 --warm  # Chạy crawler trên bản copy sạch, in bảng thời gian
+
+Crawler chạy với --replay-server luôn nằm trong bản copy tạm (data/ riêng): data/ thật không bị ghi
+jobs, index, HTTP cache hay watermark từ cassette.
+
+Latency / lỗi / timeout theo nguồn: mục replay trong config.yaml (hoặc --profile FILE cùng format).
+"""
+
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.fetcher import build_request, fetch_all
+from utils.replay import ReplayServer, make_sandbox, write_cassette
+
+ROOT = Path(__file__).parent.parent
+config_path = ROOT / 'config' / 'config.yaml'
+with open(config_path, 'r', encoding='utf-8') as f:
+    config = yaml.safe_load(f)
+
+replay_config = config.get('replay', {})
+DEFAULT_CASSETTE = ROOT / replay_config.get('cassette_dir', 'data/cassettes/default')
+
+# Phần của repo cần để chạy crawler trong thư mục tạm (data/ và logs/ riêng cho mỗi lượt)
+CRAWLER_DIRS = ('scripts', 'utils', 'config')
+
+STAGES = ('init', 'fetch', 'fetch_parse', 'collect', 'save', 'state')
+
+
+def enabled_requests():
+    """Fetch request cho mọi nguồn đang bật (kể cả tech blog, bỏ qua lịch scheduler)"""
+    sources = config.get('sources', {})
+    requests_list = []
+    for key, kind in (('job_boards', 'job_board'), ('tech_blogs', 'tech_blog'), ('api_sources', 'api')):
+        requests_list += [build_request(s, kind) for s in sources.get(key, []) if s.get('enabled', False)]
+    return requests_list
+
+
+def record(args):
+    crawl_config = config.get('crawl', {})
+    requests_list = enabled_requests()
+    print(f"📼 Ghi {len(requests_list)} nguồn vào {args.cassette}...")
+    results = fetch_all(
+        requests_list,
+        connect_timeout=crawl_config.get('connect_timeout', 5),
+        read_timeout=crawl_config.get('read_timeout', 10),
+        total_timeout=crawl_config.get('timeout_per_source', 15),
+        retry_attempts=crawl_config.get('retry_attempts', 1),
+        max_connections=crawl_config.get('max_connections', 20),
+        max_per_host=crawl_config.get('max_connections_per_host', 4)
+    )
+    entries = write_cassette(args.cassette, results)
+    for entry in entries.values():
+        status = f"✗ {entry['error']}" if entry['error'] else f"✓ {entry['size'] // 1024} KB"
+        print(f"   {entry['name'][:45]:<45} {status}")
+    recorded = sum(1 for e in entries.values() if e['file'])
+    print(f"✅ {recorded}/{len(entries)} nguồn có body ({sum(e['size'] for e in entries.values()) // 1024} KB)")
+
+
+def load_profile(args):
+    profile = {k: v for k, v in replay_config.items() if k != 'cassette_dir'}
+    if args.profile:
+        with open(args.profile, 'r', encoding='utf-8') as f:
+            profile = yaml.safe_load(f) or {}
+    if args.latency_ms is not None:
+        profile['latency_ms'] = args.latency_ms
+    return profile
+
+
+def serve(args):
+    workdir = prepare_workdir(args)
+    server = ReplayServer(args.cassette, profile=load_profile(args), port=args.port).start()
+    print(f"📼 Replay {len(server.sources)} nguồn tại {server.url} (Ctrl+C để dừng)")
+    print(f"   Crawler + data/ riêng trong {workdir}:")
+    print(f"   python {workdir / 'scripts' / 'crawl_multi_source.py'} --all --replay-server {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"\n{server.requests} requests, {server.bytes_sent // 1024} KB đã phát")
+        if args.keep:
+            print(f"📁 Giữ thư mục chạy: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def prepare_workdir(args):
+    """Copy crawler (và data/ nếu --with-data) sang thư mục tạm; mọi path data/ của utils đi theo"""
+    workdir = make_sandbox(ROOT, CRAWLER_DIRS, with_data=args.with_data)
+    if args.workers is not None:
+        bench_config_path = workdir / 'config' / 'config.yaml'
+        with open(bench_config_path, 'r', encoding='utf-8') as f:
+            bench_config = yaml.safe_load(f)
+        bench_config.setdefault('crawl', {})['parse_workers'] = args.workers
+        with open(bench_config_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(bench_config, f, allow_unicode=True, sort_keys=False)
+    return workdir
+
+
+def run_crawler(workdir, server_url, label):
+    """Chạy crawler một lượt, return dict số đo (None nếu crawler lỗi)"""
+    stats_path = workdir / f"stats_{label}.json"
+    log_path = workdir / f"crawl_{label}.log"
+    command = [sys.executable, str(workdir / 'scripts' / 'crawl_multi_source.py'), '--all',
+               '--replay-server', server_url, '--stats-file', str(stats_path)]
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        process = subprocess.run(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - start
+    if process.returncode != 0 or not stats_path.exists():
+        print(f"❌ Crawler lỗi (exit {process.returncode}), xem {log_path}")
+        return None
+    with open(stats_path, 'r', encoding='utf-8') as f:
+        stats = json.load(f)
+    # peak_mb do crawler tự đo (utils.pipeline.peak_rss_mb), None nếu nền tảng không hỗ trợ
+    return {'label': label, 'wall': wall, **stats}
+
+
+def print_rows(rows):
+    header = (f"{'run':>6} | {'wall':>6} | " + ' | '.join(f"{s:>11}" for s in STAGES)
+              + f" | {'jobs':>5} | {'jobs/s':>7} | {'failed':>6} | {'peak RSS':>8}")
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        stages = ' | '.join(f"{row['stages'].get(s, 0):>10.2f}s" for s in STAGES)
+        peak = f"{row['peak_mb']:>6.1f}MB" if row.get('peak_mb') is not None else f"{'-':>8}"
+        print(f"{row['label']:>6} | {row['wall']:>5.2f}s | {stages} | {row['jobs_found']:>5} | "
+              f"{row['jobs_found'] / row['wall']:>7.1f} | {row['sources_failed']:>6} | {peak}")
+
+
+def median_row(rows, label):
+    peaks = [r['peak_mb'] for r in rows if r.get('peak_mb') is not None]
+    return {
+        'label': label,
+        'wall': statistics.median(r['wall'] for r in rows),
+        'peak_mb': statistics.median(peaks) if peaks else None,
+        'stages': {s: statistics.median(r['stages'].get(s, 0) for r in rows) for s in STAGES},
+        'jobs_found': int(statistics.median(r['jobs_found'] for r in rows)),
+        'sources_failed': int(statistics.median(r['sources_failed'] for r in rows)),
+    }
+
+
+def bench(args):
+    profile = load_profile(args)
+    rows = {'cold': [], 'warm': []}
+    with ReplayServer(args.cassette, profile=profile) as server:
+        print(f"📼 Replay {len(server.sources)} nguồn tại {server.url}, "
+              f"latency mặc định {profile.get('latency_ms', 0)}ms, {args.runs} lượt\n")
+        for i in range(1, args.runs + 1):
+            workdir = prepare_workdir(args)
+            keep = args.keep
+            try:
+                # Lượt cold: data trống (hoặc copy từ --with-data), mọi job đều mới
+                server.reset_counters()
+                row = run_crawler(workdir, server.url, f"cold{i}")
+                keep = keep or row is None
+                if row:
+                    rows['cold'].append(row)
+                # Lượt warm: chạy lại trên cùng data (304 / high-water mark / dedup)
+                if args.warm and row:
+                    server.reset_counters()
+                    row = run_crawler(workdir, server.url, f"warm{i}")
+                    keep = keep or row is None
+                    if row:
+                        rows['warm'].append(row)
+            finally:
+                if keep:
+                    print(f"📁 Giữ thư mục chạy: {workdir}")
+                else:
+                    shutil.rmtree(workdir, ignore_errors=True)
+
+    all_rows = rows['cold'] + rows['warm']
+    if not all_rows:
+        sys.exit(1)
+    first = all_rows[0]
+    workers_label = f"{first['parse_workers']} worker process" if first['parse_workers'] else "process chính"
+    print(f"{first['sources']} nguồn, {first['bytes'] // 1024} KB, parse bằng {workers_label}\n")
+    if args.runs > 1:
+        for kind in ('cold', 'warm'):
+            if rows[kind]:
+                all_rows.append(median_row(rows[kind], f"{kind}~"))
+    print_rows(all_rows)
+    print("\nfetch = tới lúc nguồn cuối tải xong; fetch_parse = tải + parse (chồng lên nhau); ~ = median")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Record / replay nguồn crawl và benchmark crawler offline')
+    parser.add_argument('--cassette', type=Path, default=DEFAULT_CASSETTE, help='Thư mục cassette')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('record', help='Ghi response thật của mọi nguồn đang bật')
+
+    for name, help_text in (('serve', 'Phát lại cassette qua HTTP server local'),
+                            ('bench', 'Chạy crawler với replay server, đo thời gian / jobs/s / RAM')):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('--profile', help='YAML profile latency/lỗi theo nguồn (mặc định: mục replay trong config.yaml)')
+        sub.add_argument('--latency-ms', type=float, help='Ghi đè latency mặc định mỗi response')
+        sub.add_argument('--workers', type=int, help='Ghi đè crawl.parse_workers')
+        sub.add_argument('--with-data', action='store_true',
+                         help='Copy data/ hiện tại (index dedup, state) vào bản copy thay vì bắt đầu trống')
+        sub.add_argument('--keep', action='store_true', help='Giữ thư mục chạy (log, stats, data)')
+        if name == 'serve':
+            sub.add_argument('--port', type=int, default=8765)
+        else:
+            sub.add_argument('--runs', type=int, default=3, help='Số lượt, mỗi lượt trên bản copy sạch')
+            sub.add_argument('--warm', action='store_true', help='Chạy thêm một lượt trên data của lượt cold')
+
+    args = parser.parse_args()
+    {'record': record, 'serve': serve, 'bench': bench}[args.command](args)
+
+
+if __name__ == '__main__':
+    main()
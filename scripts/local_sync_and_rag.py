@@ -2,47 +2,90 @@
 """
 Script local sync: pull data từ repo, embed và update ChromaDB
 Chạy mỗi ngày hoặc khi cần update knowledge base
+
+Cursor (data/chroma_db/sync_cursor.json) nhớ phần luồng byte của data/jobs/ đã sync: mỗi run chỉ
+đọc jobs append sau đó. Segment bị ghi lại (git rebase, sửa tay) thì fingerprint lệch -> quét lại toàn bộ.
 """
 
 import os
 import sys
 import json
 import subprocess
-import yaml
 from pathlib import Path
 from datetime import datetime
-import chromadb
-from chromadb.config import Settings
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# chromadb, numpy (embedding cache) và config chỉ được load khi cần: import module không đọc file / tạo object nào
+from utils.config import get_config
 from utils.logger import setup_logger
-from utils.embedding import get_embedding_model
+from utils.embedding import EncodePool, get_embedding_model
 from utils.validation import validate_job, sanitize_job
+from utils.job_store import JobStore
+from utils.file_lock import file_lock
+from utils.job_fields import job_budget, job_created_ts, job_crawled_ts
 
 # Setup logger
 logger = setup_logger('local_sync_and_rag')
 
-# Load config
-config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+ROOT = Path(__file__).parent.parent
+CURSOR_VERSION = 1
+# Số ID mỗi lần collection.get(ids=...): Chroma dịch thành IN (?, ...) của SQLite, lô quá lớn vượt giới hạn tham số
+EXISTS_BATCH_SIZE = 500
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+_job_store = None
+
+def chromadb_settings():
+    """Mục chromadb trong config.yaml"""
+    return get_config()['chromadb']
+
+def get_job_store():
+    """JobStore của data/jobs/ (tạo lần đầu cần dùng)"""
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
 
-chromadb_config = config['chromadb']
-raw_jobs_file = Path(__file__).parent.parent / 'data' / 'raw_jobs.jsonl'
+def get_cursor_path():
+    return ROOT / chromadb_settings()['persist_directory'] / 'sync_cursor.json'
 
-# Use embedding utility module (already imported above)
+def get_sync_chunk_size():
+    """Số jobs mỗi chunk embed + upsert + checkpoint (RAM giới hạn theo chunk, không theo số jobs mới)"""
+    return chromadb_settings().get('sync_chunk_size', 256)
+
+def create_encode_pool():
+    """EncodePool theo mục embedding: encode song song trên nhiều process CPU khi chunk đủ lớn (worker chỉ tạo khi cần)"""
+    embedding_config = get_config().get('embedding', {})
+    return EncodePool(
+        EMBEDDING_MODEL,
+        workers=embedding_config.get('encode_workers'),
+        threads_per_worker=embedding_config.get('threads_per_worker'),
+        batch_size=embedding_config.get('batch_size', 64),
+        min_texts=embedding_config.get('pool_min_texts', 256)
+    )
+
+def create_embedding_cache():
+    """Cache embedding trên đĩa (data/embeddings/): dựng lại collection không phải encode lại; None nếu tắt"""
+    embedding_cache_config = get_config().get('embedding_cache', {})
+    if not embedding_cache_config.get('enabled', True):
+        return None
+    from utils.embedding_cache import EmbeddingCache
+    
+    return EmbeddingCache(EMBEDDING_MODEL, max_mb=embedding_cache_config.get('max_mb', 512))
 
 def git_pull():
     """Pull data mới từ GitHub repo"""
     try:
-        result = subprocess.run(
-            ['git', 'pull'],
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True
-        )
+        # Giữ write lock của job store: crawler chạy local không append giữa lúc git ghi đè segment
+        with file_lock(get_job_store().lock_path):
+            result = subprocess.run(
+                ['git', 'pull'],
+                cwd=Path(__file__).parent.parent,
+                capture_output=True,
+                text=True
+            )
         if result.returncode == 0:
             print("✓ Git pull thành công")
             logger.info("Git pull successful")
@@ -57,59 +100,131 @@ def git_pull():
         logger.error(f"Git pull error: {e}", exc_info=True)
         return False
 
-def load_jobs():
-    """Load jobs từ raw_jobs.jsonl"""
-    jobs = []
+def load_cursor():
+    """Cursor của lần sync thành công trước, None nếu chưa có / hỏng / của collection khác"""
+    cursor_path = get_cursor_path()
+    if not cursor_path.exists():
+        return None
+    try:
+        with open(cursor_path, 'r', encoding='utf-8') as f:
+            cursor = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Cannot read {cursor_path.name}: {e}")
+        return None
+    if cursor.get('version') != CURSOR_VERSION or cursor.get('collection') != chromadb_settings()['collection_name']:
+        return None
+    return cursor
+
+def save_cursor(size):
+    """Ghi cursor (atomic): jobs trong [0, size) của luồng byte data/jobs/ đã có trong ChromaDB"""
+    cursor = {
+        'version': CURSOR_VERSION,
+        'collection': chromadb_settings()['collection_name'],
+        'covered_size': size,
+        'fingerprint': get_job_store().fingerprint(size).hex(),
+        'synced_at': datetime.utcnow().isoformat(),
+    }
+    cursor_path = get_cursor_path()
+    cursor_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cursor_path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cursor, f, indent=1)
+    os.replace(tmp_path, cursor_path)
+    logger.info(f"Sync cursor saved at byte {size}")
+
+def sync_start_offset(collection, size):
+    """
+    Offset bắt đầu đọc trên luồng byte của data/jobs/: cuối phần đã sync nếu cursor còn khớp, 0 nếu phải quét lại
+    
+    Args:
+        collection: ChromaDB collection (collection rỗng mà có cursor thì DB đã bị xóa / dựng lại)
+        size: complete_size() hiện tại của job store
+    """
+    cursor = load_cursor()
+    if cursor is None:
+        return 0
+    job_store = get_job_store()
+    covered = cursor['covered_size']
+    if covered > size or job_store.fingerprint(covered).hex() != cursor['fingerprint']:
+        print("⚠ data/jobs/ đã bị ghi lại (vd. git rebase) kể từ lần sync trước, quét lại toàn bộ")
+        logger.warning(f"{job_store.name} rewritten since last sync (cursor at byte {covered}), full rescan")
+        return 0
+    if covered and collection.count() == 0:
+        print("⚠ ChromaDB collection rỗng nhưng có cursor, quét lại toàn bộ")
+        logger.warning("Collection is empty but sync cursor exists, full rescan")
+        return 0
+    return covered
+
+def iter_job_chunks(offset=0, size=None, chunk_size=None):
+    """
+    Đọc jobs từ các segment trong data/jobs/ theo từng chunk (sanitize + validate, bỏ trùng trong store)
+    
+    Args:
+        offset: Chỉ đọc jobs append sau byte này (cursor của lần sync trước)
+        size: Dừng ở byte này (complete_size() lúc bắt đầu sync, bỏ qua jobs append trong lúc sync)
+        chunk_size: Số jobs hợp lệ mỗi chunk (mặc định: chromadb.sync_chunk_size trong config)
+        
+    Yields:
+        (jobs, end): end là offset sau dòng cuối đã đọc của chunk (None với raw_jobs.jsonl cũ)
+    """
+    chunk_size = chunk_size or get_sync_chunk_size()
+    job_store = get_job_store()
     seen_ids = set()
     
-    if not raw_jobs_file.exists():
-        print("⚠ Không tìm thấy raw_jobs.jsonl")
-        return jobs
+    if not job_store.exists() and not job_store.needs_migration():
+        print("⚠ Không tìm thấy data/jobs/manifest.json")
+        return
     
-    with open(raw_jobs_file, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
+    if job_store.needs_migration():
+        records = ((job, None) for job in job_store.iter_jobs())  # raw_jobs.jsonl cũ: không có cursor
+    else:
+        records = ((job, end) for job, end in job_store.iter_records(offset) if size is None or end <= size)
+    
+    jobs = []
+    for job_num, (job, end) in enumerate(records, 1):
+        try:
+            job_id = job.get('job_id', '').strip()
+            
+            # Validate job
+            if not job_id:
+                logger.debug(f"Skipping job #{job_num}: missing job_id")
+                continue  # Skip jobs without ID
             
-            try:
-                job = json.loads(line)
-                job_id = job.get('job_id', '').strip()
-                
-                # Validate job
-                if not job_id:
-                    logger.debug(f"Skipping job at line {line_num}: missing job_id")
-                    continue  # Skip jobs without ID
-                
-                # Skip duplicates trong file
-                if job_id in seen_ids:
-                    logger.debug(f"Skipping duplicate job {job_id} at line {line_num}")
-                    continue
-                
-                # Sanitize job trước (set defaults, truncate)
-                job = sanitize_job(job)
-                
-                # Validate job structure sau khi sanitize
-                is_valid, errors = validate_job(job)
-                if not is_valid:
-                    logger.warning(f"Invalid job {job_id} at line {line_num}: {', '.join(errors)}")
-                    continue
-                
-                seen_ids.add(job_id)
-                jobs.append(job)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Invalid JSON at line {line_num}: {e}")
+            # Skip duplicates trong store
+            if job_id in seen_ids:
+                logger.debug(f"Skipping duplicate job {job_id} (#{job_num})")
                 continue
-            except Exception as e:
-                logger.error(f"Error parsing job at line {line_num}: {e}", exc_info=True)
+            
+            # Sanitize job trước (set defaults, truncate)
+            job = sanitize_job(job)
+            
+            # Validate job structure sau khi sanitize
+            is_valid, errors = validate_job(job)
+            if not is_valid:
+                logger.warning(f"Invalid job {job_id} (#{job_num}): {', '.join(errors)}")
                 continue
+            
+            seen_ids.add(job_id)
+            jobs.append(job)
+        except Exception as e:
+            logger.error(f"Error parsing job #{job_num}: {e}", exc_info=True)
+            continue
+        
+        if len(jobs) >= chunk_size:
+            yield jobs, end
+            jobs = []
     
-    print(f"✓ Load được {len(jobs)} jobs (đã loại bỏ duplicate)")
-    return jobs
+    # Chunk cuối kết thúc ở size (kể cả khi các dòng cuối đều không hợp lệ)
+    if jobs or (size is not None and not job_store.needs_migration()):
+        yield jobs, None if job_store.needs_migration() else size
 
 def init_chromadb():
     """Khởi tạo ChromaDB client"""
-    persist_dir = Path(__file__).parent.parent / chromadb_config['persist_directory']
+    import chromadb
+    from chromadb.config import Settings
+    
+    chromadb_config = chromadb_settings()
+    persist_dir = ROOT / chromadb_config['persist_directory']
     persist_dir.mkdir(parents=True, exist_ok=True)
     
     client = chromadb.PersistentClient(
@@ -124,116 +239,108 @@ def init_chromadb():
     
     return collection
 
-def get_existing_job_ids(collection):
-    """Lấy danh sách job_id đã có trong DB"""
+def get_existing_job_ids(collection, job_ids, batch_size=EXISTS_BATCH_SIZE):
+    """
+    Những job_id trong job_ids đã có trong DB
+    
+    Chỉ hỏi các ID sắp thêm, theo lô, với include=[] - Chroma chỉ trả ID, không kéo
+    document / metadata của cả collection vào RAM.
+    """
+    job_ids = list(job_ids)
+    existing_ids = set()
     try:
-        results = collection.get()
-        existing_ids = set(results['ids'])
-        logger.info(f"Found {len(existing_ids)} existing jobs in ChromaDB")
+        for start in range(0, len(job_ids), batch_size):
+            results = collection.get(ids=job_ids[start:start + batch_size], include=[])
+            existing_ids.update(results['ids'])
+        logger.info(f"{len(existing_ids)}/{len(job_ids)} candidate jobs already in ChromaDB")
         return existing_ids
     except Exception as e:
         logger.warning(f"Error getting existing job IDs: {e}")
-        return set()
+        return existing_ids
 
-def create_embeddings(texts, model_name='all-MiniLM-L6-v2'):
-    """Tạo embeddings cho texts"""
-    print(f"✓ Đang tạo embeddings với model {model_name}...")
-    logger.info(f"Creating embeddings for {len(texts)} texts using {model_name}")
-    model = get_embedding_model(model_name)
-    embeddings = model.encode(texts, show_progress_bar=True)
+def create_embeddings(texts, encode_pool, embedding_cache=None, model_name=EMBEDDING_MODEL):
+    """Tạo embeddings cho texts (một chunk), text đã có trong embedding_cache thì đọc từ đĩa"""
+    def encode(batch):
+        logger.info(f"Creating embeddings for {len(batch)} texts using {model_name}")
+        if model_name == encode_pool.model_name:
+            return encode_pool.encode(batch)
+        return get_embedding_model(model_name).encode(batch, show_progress_bar=False)
+    
+    if embedding_cache is None or embedding_cache.model_name != model_name:
+        embeddings = encode(texts)
+    else:
+        embeddings = embedding_cache.encode(texts, encode)
     logger.info(f"Successfully created {len(embeddings)} embeddings")
     return embeddings
 
-def update_chromadb(collection, jobs, existing_ids):
-    """Update ChromaDB với jobs mới"""
-    # Filter new jobs và loại bỏ duplicate trong batch
-    new_jobs = []
-    seen_in_batch = set()
+def job_metadata(job):
+    """Metadata lưu cùng vector trong ChromaDB"""
+    metadata = {
+        'title': job.get('title', '')[:200],  # Limit length
+        'budget': str(job.get('budget', '')),
+        'proposals': str(job.get('proposals', '')),
+        'client_country': job.get('client_country', ''),
+        'category': job.get('category', ''),
+        'link': job.get('link', ''),
+        'source': job.get('source', 'Unknown'),
+        'created_at': job.get('created_at', '')
+    }
+    # Field số cho range filter của Chroma ($gte/$lte); key không có giá trị thì bỏ (Chroma không nhận None)
+    budget_min, budget_max, budget_type = job_budget(job)
+    numeric_fields = {
+        'budget_min': budget_min,
+        'budget_max': budget_max,
+        'budget_type': budget_type,
+        'currency': job.get('currency'),
+        'created_ts': job_created_ts(job),
+        'crawled_ts': job_crawled_ts(job),
+    }
+    metadata.update({k: v for k, v in numeric_fields.items() if v is not None})
+    return metadata
+
+def upsert_batch(collection, ids, embeddings, metadatas, texts):
+    """
+    Upsert một lô; lô lỗi (quá max batch size, một record hỏng...) được chia đôi và thử lại
     
-    for job in jobs:
-        job_id = job.get('job_id', '').strip()
-        if not job_id:
-            continue  # Skip jobs without ID
-        
-        # Skip nếu đã có trong DB hoặc đã thấy trong batch này
-        if job_id in existing_ids or job_id in seen_in_batch:
-            continue
-        
-        seen_in_batch.add(job_id)
-        new_jobs.append(job)
+    Returns:
+        (số jobs đã ghi, số jobs lỗi)
+    """
+    try:
+        collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=texts)
+        return len(ids), 0
+    except Exception as e:
+        if len(ids) == 1:
+            logger.warning(f"Failed to upsert job {ids[0]}: {e}")
+            return 0, 1
+        logger.info(f"Upsert of {len(ids)} jobs failed ({e}), bisecting")
+    middle = len(ids) // 2
+    left = upsert_batch(collection, ids[:middle], embeddings[:middle], metadatas[:middle], texts[:middle])
+    right = upsert_batch(collection, ids[middle:], embeddings[middle:], metadatas[middle:], texts[middle:])
+    return left[0] + right[0], left[1] + right[1]
+
+def update_chromadb(collection, jobs, encode_pool, embedding_cache=None):
+    """
+    Embed + upsert một chunk jobs, bỏ qua jobs đã có trong DB
     
+    Returns:
+        (số jobs đã thêm, số jobs ghi lỗi)
+    """
+    existing_ids = get_existing_job_ids(collection, (job.get('job_id', '').strip() for job in jobs))
+    new_jobs = [job for job in jobs if job.get('job_id', '').strip() not in existing_ids]
     if not new_jobs:
-        print("✓ Không có job mới cần update")
-        logger.info("No new jobs to update")
-        return 0
-    
-    print(f"✓ Tìm thấy {len(new_jobs)} jobs mới (đã loại bỏ duplicate)")
-    logger.info(f"Found {len(new_jobs)} new jobs to add (duplicates removed)")
+        return 0, 0
     
     # Tạo text để embed (title + description)
-    texts = []
-    ids = []
-    metadatas = []
-    
-    for job in new_jobs:
-        job_id = job.get('job_id', '').strip()
-        if not job_id:
-            continue  # Double check
-        
-        text = f"{job.get('title', '')} {job.get('description', '')}"
-        texts.append(text)
-        ids.append(job_id)
-        
-        metadata = {
-            'title': job.get('title', '')[:200],  # Limit length
-            'budget': str(job.get('budget', '')),
-            'proposals': str(job.get('proposals', '')),
-            'client_country': job.get('client_country', ''),
-            'category': job.get('category', ''),
-            'link': job.get('link', ''),
-            'source': job.get('source', 'Unknown'),
-            'created_at': job.get('created_at', '')
-        }
-        metadatas.append(metadata)
-    
-    if not ids:
-        print("⚠ Không có jobs hợp lệ để add")
-        return 0
+    ids = [job.get('job_id', '').strip() for job in new_jobs]
+    texts = [f"{job.get('title', '')} {job.get('description', '')}" for job in new_jobs]
+    metadatas = [job_metadata(job) for job in new_jobs]
+    embeddings = create_embeddings(texts, encode_pool, embedding_cache).tolist()
     
-    # Create embeddings
-    embeddings = create_embeddings(texts)
-    
-    # Add to ChromaDB (batch add để tránh duplicate)
-    try:
-        collection.add(
-            ids=ids,
-            embeddings=embeddings.tolist(),
-            metadatas=metadatas,
-            documents=texts
-        )
-        print(f"✓ Đã thêm {len(ids)} jobs vào ChromaDB")
-        logger.info(f"Successfully added {len(ids)} jobs to ChromaDB")
-        return len(ids)
-    except Exception as e:
-        print(f"⚠ Lỗi khi add vào ChromaDB: {e}")
-        logger.error(f"Error adding jobs to ChromaDB: {e}", exc_info=True)
-        # Try add từng cái một nếu batch fail
-        added = 0
-        for i, job_id in enumerate(ids):
-            try:
-                collection.add(
-                    ids=[job_id],
-                    embeddings=[embeddings[i].tolist()],
-                    metadatas=[metadatas[i]],
-                    documents=[texts[i]]
-                )
-                added += 1
-            except Exception as add_error:
-                logger.warning(f"Failed to add job {job_id}: {add_error}")
-                continue
-        print(f"✓ Đã thêm {added}/{len(ids)} jobs vào ChromaDB (một số có thể duplicate)")
-        logger.warning(f"Added {added}/{len(ids)} jobs individually (some may be duplicates)")
-        return added
+    # Upsert thay vì add: chạy lại chunk đã ghi một phần (crash giữa chừng) không bị lỗi trùng ID
+    added, failed = upsert_batch(collection, ids, embeddings, metadatas, texts)
+    if failed:
+        logger.warning(f"Upserted {added}/{len(ids)} jobs, {failed} failed")
+    return added, failed
 
 def main():
     """Main function"""
@@ -244,24 +351,60 @@ def main():
     # Step 1: Git pull
     git_pull()
     
-    # Step 2: Load jobs
-    jobs = load_jobs()
-    if not jobs:
-        print("⚠ Không có jobs để xử lý")
+    # Step 2: Init ChromaDB, đọc cursor của lần sync trước
+    collection = init_chromadb()
+    job_store = get_job_store()
+    job_store.reload()  # Manifest có thể vừa đổi sau git pull
+    size = job_store.complete_size()
+    offset = sync_start_offset(collection, size)
+    use_cursor = not job_store.needs_migration()
+    if use_cursor and offset == size and offset:
+        print(f"✓ Không có job mới kể từ lần sync trước (byte {offset})")
+        logger.info(f"No new data since last sync (byte {offset})")
         return
     
-    # Step 3: Init ChromaDB
-    collection = init_chromadb()
-    existing_ids = get_existing_job_ids(collection)
-    print(f"✓ ChromaDB hiện có {len(existing_ids)} jobs")
+    # Step 3: Đọc jobs (chỉ phần append sau cursor) theo chunk: embed + upsert rồi checkpoint cursor
+    db_count = collection.count()
+    print(f"✓ ChromaDB hiện có {db_count} jobs")
+    print(f"✓ Đang sync theo chunk {get_sync_chunk_size()} jobs (embedding model {EMBEDDING_MODEL})...")
+    encode_pool = create_encode_pool()
+    embedding_cache = create_embedding_cache()
+    loaded_count = new_count = failed_count = 0
+    try:
+        for chunk_num, (jobs, end) in enumerate(iter_job_chunks(offset, size), 1):
+            added, failed = update_chromadb(collection, jobs, encode_pool, embedding_cache) if jobs else (0, 0)
+            loaded_count += len(jobs)
+            new_count += added
+            failed_count += failed
+            # Checkpoint sau mỗi chunk; có job lỗi thì dừng tiến cursor (run sau đọc lại từ chunk lỗi)
+            if use_cursor and not failed_count:
+                save_cursor(end)
+            if jobs:
+                progress = f" - byte {end}/{size}" if end is not None else ""
+                print(f"   [chunk {chunk_num}] {len(jobs)} jobs, +{added} mới" + (f", {failed} lỗi" if failed else "") + progress)
+    finally:
+        encode_pool.close()
+    
+    if not loaded_count:
+        print("⚠ Không có jobs để xử lý")
+    elif offset:
+        print(f"✓ Đã xử lý {loaded_count} jobs mới kể từ lần sync trước (byte {offset} → {size})")
+    else:
+        print(f"✓ Đã xử lý {loaded_count} jobs (đã loại bỏ duplicate)")
+    if failed_count:
+        print(f"⚠ {failed_count} jobs chưa vào được ChromaDB, cursor dừng ở chunk lỗi để lần sau thử lại")
     
-    # Step 4: Update ChromaDB
-    new_count = update_chromadb(collection, jobs, existing_ids)
+    if embedding_cache is not None and embedding_cache.hits + embedding_cache.misses:
+        stats = embedding_cache.stats()
+        print(f"🧠 Embedding cache: {embedding_cache.hits}/{embedding_cache.hits + embedding_cache.misses} text có sẵn "
+              f"({stats['run_hit_rate']:.0%}), tổng {stats['entries']} vector / {stats['disk_mb']:.1f}MB, "
+              f"hit rate mọi run {stats['hit_rate']:.0%}")
+        logger.info(f"Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} misses")
     
-    # Step 5: Summary
+    # Step 4: Summary
     print("=" * 50)
     print(f"✅ Hoàn thành! Đã thêm {new_count} jobs mới")
-    print(f"📊 Tổng số jobs trong DB: {len(existing_ids) + new_count}")
+    print(f"📊 Tổng số jobs trong DB: {db_count + new_count}")
     print("=" * 50)
 
 if __name__ == '__main__':
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Script bảo trì data/ - kiểm tra và dựng lại các index đi kèm job store (data/jobs/)
+Usage:
+    python scripts/maintain_data.py check-index
+    python scripts/maintain_data.py rebuild-index
+    python scripts/maintain_data.py migrate-segments [--keep-legacy]
+    python scripts/maintain_data.py stats
+    python scripts/maintain_data.py compact [--level 6]
+    python scripts/maintain_data.py snapshot [--rebuild]
+    python scripts/maintain_data.py rebuild-simhash
+    python scripts/maintain_data.py embed-cache [--clear]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.config import get_config
+from utils.job_index import JobIndex
+from utils.job_store import JobStore
+from utils.near_dup import SimHashIndex
+from utils.trends import TrendArchive
+
+def open_store():
+    """JobStore với cấu hình segment giống crawler"""
+    storage_config = get_config().get('storage', {})
+    return JobStore(max_segment_bytes=storage_config.get('max_segment_mb', 50) * 1024 * 1024)
+
+def open_index():
+    """JobIndex với cấu hình bloom filter giống crawler"""
+    dedup_config = get_config().get('dedup', {})
+    return JobIndex(
+        open_store(),
+        bloom_capacity=dedup_config.get('bloom_capacity', 100000),
+        bloom_error_rate=dedup_config.get('bloom_error_rate', 0.001)
+    )
+
+def cmd_check_index(args):
+    """Kiểm tra index job_id khớp với các segment"""
+    index = open_index()
+    is_ok, problems = index.check()
+    print(f"Index: {index.index_path}")
+    print(f"IDs trong index: {index.count}, đã index {index.covered_size} bytes JSONL")
+    if is_ok:
+        print("[OK] Index khớp với data/jobs/")
+        return 0
+    print("[FAIL] Index không khớp:")
+    for problem in problems:
+        print(f"   - {problem}")
+    print("Chạy: python scripts/maintain_data.py rebuild-index")
+    return 1
+
+def cmd_rebuild_index(args):
+    """Dựng lại index job_id từ toàn bộ segment"""
+    start = time.time()
+    index = open_index()
+    count = index.rebuild()
+    print(f"[OK] Đã dựng lại index: {count} IDs trong {time.time() - start:.2f}s")
+    return 0
+
+def cmd_migrate_segments(args):
+    """Tách raw_jobs.jsonl kiểu cũ thành segment theo ngày"""
+    store = open_store()
+    if not store.needs_migration():
+        print("[OK] Không có raw_jobs.jsonl cần tách (hoặc đã có data/jobs/manifest.json)")
+        return 0
+    start = time.time()
+    stats = store.migrate_legacy(remove_legacy=not args.keep_legacy)
+    print(f"[OK] Đã tách {stats['jobs']} jobs thành {stats['segments']} segment "
+          f"trong {time.time() - start:.2f}s (bỏ qua {stats['skipped']} dòng lỗi)")
+    if not args.keep_legacy and not stats['removed']:
+        print("[WARN] raw_jobs.jsonl đổi cỡ trong lúc tách nên được giữ lại, kiểm tra trước khi xóa tay")
+    open_index().rebuild()
+    return 0
+
+def cmd_stats(args):
+    """In thống kê các segment trong manifest"""
+    store = open_store()
+    if store.needs_migration():
+        print("Chưa tách segment. Chạy: python scripts/maintain_data.py migrate-segments")
+        return 1
+    print(f"{'segment':<28} {'jobs':>7} {'size':>10} {'on disk':>10}  crawled_at")
+    stored_total = 0
+    for segment in store.all_segments:
+        stored = segment.get('stored_size', segment['size'])
+        stored_total += stored
+        print(f"{segment['name']:<28} {segment['count']:>7} {segment['size'] / 1024:>8.1f}KB "
+              f"{stored / 1024:>8.1f}KB  {segment['start'] or '-'} → {segment['end'] or '-'}")
+    print(f"Tổng: {store.count()} jobs, {len(store.all_segments)} segment, "
+          f"{store.complete_size() / 1024 / 1024:.2f}MB ({stored_total / 1024 / 1024:.2f}MB trên đĩa)")
+    return 0
+
+def cmd_compact(args):
+    """Nén các segment đã đóng (jobs và trends) thành .gz"""
+    store = open_store()
+    if store.needs_migration():
+        print("Chưa tách segment. Chạy: python scripts/maintain_data.py migrate-segments")
+        return 1
+    level = args.level or get_config().get('storage', {}).get('compress_level', 6)
+    start = time.time()
+    for name, stats in (('jobs', store.compact(level=level)), ('trends', TrendArchive().compact(level=level))):
+        ratio = stats['bytes_in'] / stats['bytes_out'] if stats['bytes_out'] else 0
+        print(f"[OK] {name}: nén {stats['segments']} file, {stats['bytes_in'] / 1024:.1f}KB → "
+              f"{stats['bytes_out'] / 1024:.1f}KB (x{ratio:.1f})")
+    print(f"Xong trong {time.time() - start:.2f}s")
+    return 0
+
+def cmd_rebuild_simhash(args):
+    """Dựng lại SimHash index (near-duplicate) từ các segment trong cửa sổ thời gian"""
+    near_dup_config = get_config().get('near_dup', {})
+    store = open_store()
+    index = SimHashIndex(
+        store.base_dir / 'simhash.lsh',
+        max_distance=near_dup_config.get('max_distance', 4),
+        window_days=near_dup_config.get('window_days', 30)
+    )
+    start = time.time()
+    since = datetime.utcnow() - timedelta(days=index.window_days)
+    count = index.rebuild(store.iter_jobs(since=since))
+    print(f"[OK] Đã dựng lại SimHash index: {count} jobs ({index.window_days} ngày) trong {time.time() - start:.2f}s")
+    return 0
+
+def cmd_snapshot(args):
+    """Cập nhật snapshot cột (data/jobs/columns.npz) và in vài thống kê từ đó"""
+    from utils.job_columns import JobColumns
+
+    snapshot = JobColumns(open_store())
+    if args.rebuild and snapshot.path.exists():
+        snapshot.path.unlink()
+    start = time.time()
+    added = snapshot.refresh()
+    print(f"[OK] Snapshot {snapshot.path.name}: +{added} jobs, {len(snapshot)} tổng trong {time.time() - start:.2f}s")
+    week = snapshot.mask(since_ts=time.time() - 7 * 86400)
+    print(f"7 ngày qua: {int(week.sum())} jobs")
+    for name in ('category', 'source', 'client_country'):
+        print(f"   {name}: {', '.join(f'{label} {count}' for label, count in snapshot.top(name, week, 5))}")
+    for budget_type, stats in snapshot.budget_summary(week).items():
+        print(f"   budget {budget_type}: median {stats['median']:,.0f} USD ({stats['count']} jobs)")
+    return 0
+
+def cmd_embed_cache(args):
+    """Thống kê (hoặc xóa) cache embedding trong data/embeddings/"""
+    from utils.embedding_cache import EmbeddingCache, cached_models
+
+    models = cached_models()
+    if not models:
+        print("Chưa có cache embedding (data/embeddings/)")
+        return 0
+    max_mb = get_config().get('embedding_cache', {}).get('max_mb', 512)
+    print(f"{'model':<28} {'vectors':>9} {'on disk':>10} {'max':>8} {'hits':>9} {'misses':>9} {'hit rate':>9}")
+    for model in models:
+        cache = EmbeddingCache(model, max_mb=max_mb)
+        if args.clear:
+            cache.clear()
+            print(f"[OK] Đã xóa cache {model}")
+            continue
+        stats = cache.stats()
+        print(f"{model:<28} {stats['entries']:>9} {stats['disk_mb']:>8.1f}MB {stats['max_mb']:>6.0f}MB "
+              f"{stats['hits']:>9} {stats['misses']:>9} {stats['hit_rate']:>9.1%}")
+        cache.close()
+    return 0
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Bảo trì data/ (index, ...)')
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('check-index', help='Kiểm tra index job_id với data/jobs/')
+    subparsers.add_parser('rebuild-index', help='Dựng lại index job_id từ data/jobs/')
+    migrate_parser = subparsers.add_parser('migrate-segments', help='Tách raw_jobs.jsonl thành segment theo ngày')
+    migrate_parser.add_argument('--keep-legacy', action='store_true', help='Giữ lại raw_jobs.jsonl sau khi tách')
+    subparsers.add_parser('stats', help='Thống kê segment trong data/jobs/')
+    subparsers.add_parser('rebuild-simhash', help='Dựng lại SimHash index near-duplicate từ data/jobs/')
+    compact_parser = subparsers.add_parser('compact', help='Nén segment đã đóng (data/jobs/, data/feeds/) thành .gz')
+    compact_parser.add_argument('--level', type=int, help='Mức nén gzip 1-9 (mặc định: storage.compress_level)')
+    snapshot_parser = subparsers.add_parser('snapshot', help='Cập nhật snapshot cột data/jobs/columns.npz')
+    snapshot_parser.add_argument('--rebuild', action='store_true', help='Dựng lại từ đầu thay vì chỉ đọc jobs mới')
+    cache_parser = subparsers.add_parser('embed-cache', help='Thống kê hit rate cache embedding data/embeddings/')
+    cache_parser.add_argument('--clear', action='store_true', help='Xóa toàn bộ cache embedding')
+
+    args = parser.parse_args()
+    commands = {
+        'check-index': cmd_check_index,
+        'rebuild-index': cmd_rebuild_index,
+        'migrate-segments': cmd_migrate_segments,
+        'stats': cmd_stats,
+        'rebuild-simhash': cmd_rebuild_simhash,
+        'compact': cmd_compact,
+        'snapshot': cmd_snapshot,
+        'embed-cache': cmd_embed_cache,
+    }
+    if args.command not in commands:
+        parser.print_help()
+        return 1
+    return commands[args.command](args)
+
+if __name__ == '__main__':
+    sys.exit(main())
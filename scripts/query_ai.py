@@ -4,48 +4,30 @@ Script query AI để phân tích job và liệt kê jobs match
 Sử dụng prompt engineering kỷ luật: AI chỉ là trợ lý, CEO chốt
 """
 
+import importlib.util
 import os
 import sys
-import yaml
+import time
 from pathlib import Path
-import chromadb
-from chromadb.config import Settings
-try:
-    from ollama import Client
-    OLLAMA_CLIENT = True
-except ImportError:
-    try:
-        import ollama
-        OLLAMA_CLIENT = False
-    except ImportError:
-        print("⚠ Lỗi: Không tìm thấy ollama. Hãy cài: pip install ollama")
-        sys.exit(1)
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# chromadb, sentence_transformers, ollama và config chỉ được load khi cần (--help không load gì)
+from utils.config import ai_rule, get_config, get_profile, ollama_settings
 from utils.embedding import get_embedding_model
+from utils.job_fields import job_budget
 from utils.logger import setup_logger
 
 # Setup logger
 logger = setup_logger('query_ai')
 
-# Load config
-config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
-profile_path = Path(__file__).parent.parent / 'config' / 'profile.yaml'
-
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
-
-with open(profile_path, 'r', encoding='utf-8') as f:
-    profile = yaml.safe_load(f)
-
-chromadb_config = config['chromadb']
-ollama_config = config['ollama']
-query_config = config['query']
-
 def init_chromadb():
     """Khởi tạo ChromaDB client"""
+    import chromadb
+    from chromadb.config import Settings
+    
+    chromadb_config = get_config()['chromadb']
     persist_dir = Path(__file__).parent.parent / chromadb_config['persist_directory']
     
     client = chromadb.PersistentClient(
@@ -60,8 +42,26 @@ def init_chromadb():
     )
     return collection
 
-def search_jobs(collection, query_text, top_k=10):
-    """Search jobs trong ChromaDB"""
+def build_filter(min_budget=None, budget_type=None, days=None):
+    """
+    Chroma where filter theo field số trong metadata (budget_max, created_ts, budget_type)
+    
+    Returns:
+        Filter dict, None nếu không lọc gì
+    """
+    conditions = []
+    if min_budget is not None:
+        conditions.append({'budget_max': {'$gte': float(min_budget)}})
+    if budget_type:
+        conditions.append({'budget_type': budget_type})
+    if days is not None:
+        conditions.append({'created_ts': {'$gte': int(time.time() - days * 86400)}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {'$and': conditions}
+
+def search_jobs(collection, query_text, top_k=10, where=None):
+    """Search jobs trong ChromaDB (where: filter metadata, vd. từ build_filter)"""
     # Tạo embedding cho query
     model = get_embedding_model()
     query_embedding = model.encode([query_text])[0].tolist()
@@ -69,7 +69,8 @@ def search_jobs(collection, query_text, top_k=10):
     # Query ChromaDB
     results = collection.query(
         query_embeddings=[query_embedding],
-        n_results=top_k
+        n_results=top_k,
+        where=where
     )
     
     jobs = []
@@ -87,6 +88,10 @@ def search_jobs(collection, query_text, top_k=10):
                 'created_at': results['metadatas'][0][i].get('created_at', ''),
                 'distance': results['distances'][0][i] if results.get('distances') else None
             }
+            # Field số (job sync trước khi có field này thì không có key)
+            for field in ('budget_min', 'budget_max', 'budget_type', 'currency', 'created_ts'):
+                if field in results['metadatas'][0][i]:
+                    job[field] = results['metadatas'][0][i][field]
             jobs.append(job)
     
     return jobs
@@ -119,7 +124,7 @@ def detect_scam_flags(job):
 def estimate_win_rate(job, profile):
     """Ước lượng tỉ lệ thắng dựa trên match skills và proposals"""
     proposals = int(job.get('proposals', 0) or 0)
-    budget = job.get('budget', '')
+    _, budget_max, _ = job_budget(job)
     
     # Match skills
     job_desc = job.get('description', '').lower()
@@ -141,7 +146,7 @@ def estimate_win_rate(job, profile):
         match_score += 1
     
     # Budget (có budget tốt hơn không có)
-    if budget:
+    if budget_max is not None:
         match_score += 1
     
     # Ước lượng
@@ -208,35 +213,13 @@ def find_customization_points(job, profile):
     return points[:3]  # Tối đa 3 điểm
 
 def load_ai_rules():
-    """Load AI rules từ ai_rules/"""
-    rules_dir = Path(__file__).parent.parent / 'ai_rules'
-    rules = {}
-    
-    # Load system instruction
-    analysis_file = rules_dir / 'analysis.md'
-    if analysis_file.exists():
-        with open(analysis_file, 'r', encoding='utf-8') as f:
-            rules['system'] = f.read()
-    
-    # Load rulebook
-    rules_file = rules_dir / 'upwork_rules.md'
-    if rules_file.exists():
-        with open(rules_file, 'r', encoding='utf-8') as f:
-            rules['rulebook'] = f.read()
-    
-    # Load hardware constraints
-    hardware_file = rules_dir / 'hardware.md'
-    if hardware_file.exists():
-        with open(hardware_file, 'r', encoding='utf-8') as f:
-            rules['hardware'] = f.read()
-    
-    # Load profile context
-    profile_context_file = rules_dir / 'profile_context.md'
-    if profile_context_file.exists():
-        with open(profile_context_file, 'r', encoding='utf-8') as f:
-            rules['profile_context'] = f.read()
-    
-    return rules
+    """Load AI rules từ ai_rules/ (file không có thì là chuỗi rỗng)"""
+    return {
+        'system': ai_rule('analysis'),            # System instruction
+        'rulebook': ai_rule('upwork_rules'),      # Rulebook
+        'hardware': ai_rule('hardware'),          # Hardware constraints
+        'profile_context': ai_rule('profile_context'),
+    }
 
 def build_prompt(jobs, profile):
     """Build prompt cho Ollama với quy tắc kỷ luật"""
@@ -302,39 +285,25 @@ Tuân thủ 100%: nói thẳng như chiến binh Gen Z, thực tế, quyết đo
 def query_ollama(prompt):
     """Query Ollama với prompt"""
     try:
-        base_url = ollama_config.get('base_url', 'http://localhost:11434')
+        import ollama
         
-        if OLLAMA_CLIENT:
-            client = Client(host=base_url)
-            response = client.chat(
-                model=ollama_config['model'],
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': 'Em là Upwork Assistant của CEO Hùng. Em chỉ phân tích và liệt kê, không quyết định. Luôn dùng ngôi "em" và giọng điệu thực tế, hơi bựa.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ]
-            )
-            return response['message']['content']
+        model, base_url = ollama_settings()
+        messages = [
+            {
+                'role': 'system',
+                'content': 'Em là Upwork Assistant của CEO Hùng. Em chỉ phân tích và liệt kê, không quyết định. Luôn dùng ngôi "em" và giọng điệu thực tế, hơi bựa.'
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ]
+        # ollama bản cũ không có Client: dùng ollama.chat (host mặc định)
+        if hasattr(ollama, 'Client'):
+            response = ollama.Client(host=base_url).chat(model=model, messages=messages)
         else:
-            response = ollama.chat(
-                model=ollama_config['model'],
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': 'Em là Upwork Assistant của CEO Hùng. Em chỉ phân tích và liệt kê, không quyết định. Luôn dùng ngôi "em" và giọng điệu thực tế, hơi bựa.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ]
-            )
-            return response['message']['content']
+            response = ollama.chat(model=model, messages=messages)
+        return response['message']['content']
     except Exception as e:
         logger.error(f"Error querying Ollama: {e}", exc_info=True)
         return f"Lỗi khi query Ollama: {e}. Đảm bảo Ollama đang chạy: ollama serve"
@@ -345,10 +314,19 @@ def main():
     
     parser = argparse.ArgumentParser(description='Query AI để phân tích Upwork jobs')
     parser.add_argument('--query', type=str, default='', help='Query text để search jobs (optional)')
-    parser.add_argument('--top-k', type=int, default=query_config['top_k'], help='Số lượng jobs trả về')
+    parser.add_argument('--top-k', type=int, help='Số lượng jobs trả về (mặc định: query.top_k trong config.yaml)')
+    parser.add_argument('--min-budget', type=float, help='Chỉ lấy jobs có budget tối đa >= số này')
+    parser.add_argument('--budget-type', choices=['fixed', 'hourly', 'monthly', 'yearly'], help='Loại budget')
+    parser.add_argument('--days', type=float, help='Chỉ lấy jobs đăng trong N ngày gần đây')
     
     args = parser.parse_args()
     
+    if importlib.util.find_spec('ollama') is None:
+        print("⚠ Lỗi: Không tìm thấy ollama. Hãy cài: pip install ollama")
+        sys.exit(1)
+    profile = get_profile()
+    top_k = args.top_k or get_config()['query']['top_k']
+    
     print("=" * 50)
     print("🔍 Đang query AI phân tích jobs...")
     print("=" * 50)
@@ -363,7 +341,8 @@ def main():
         # Default: search với skills của profile
         query_text = f"{', '.join(profile.get('skills', []))} freelancer"
     
-    jobs = search_jobs(collection, query_text, top_k=args.top_k)
+    where = build_filter(min_budget=args.min_budget, budget_type=args.budget_type, days=args.days)
+    jobs = search_jobs(collection, query_text, top_k=top_k, where=where)
     
     if not jobs:
         print("⚠ Không tìm thấy jobs nào")
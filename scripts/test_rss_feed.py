@@ -9,23 +9,32 @@ Usage:
 import sys
 import yaml
 import feedparser
-import requests
 from pathlib import Path
 from datetime import datetime
 from urllib.parse import urlparse
-import time
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.logger import setup_logger
+from utils.fetcher import build_request, connection_stats, fetch_all
 
 logger = setup_logger('test_rss_feed')
 
-def test_single_feed(url, name="Test Feed", timeout=10):
+def fetch_feeds(feeds, timeout=10):
+    """Tải các feed qua fetcher chung (pool keep-alive theo host), return result theo thứ tự"""
+    fetch_requests = [build_request({'name': feed.get('name', 'Unnamed'), 'url': feed['url']}, 'test')
+                      for feed in feeds]
+    return fetch_all(fetch_requests, connect_timeout=min(5, timeout), read_timeout=timeout,
+                     total_timeout=timeout, max_per_host=2)
+
+def test_single_feed(url, name="Test Feed", timeout=10, fetch_result=None):
     """
     Test một RSS feed
     
+    Args:
+        fetch_result: Kết quả đã tải sẵn từ fetch_feeds (None thì tự tải)
+    
     Returns:
         dict với keys: success, status, entries_count, error, sample_entries
     """
@@ -47,33 +56,20 @@ def test_single_feed(url, name="Test Feed", timeout=10):
     print(f"{'='*60}")
     
     try:
-        # Test với requests trước để check status
-        start_time = time.time()
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        try:
-            response = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-            response_time = time.time() - start_time
-            result['response_time'] = round(response_time, 2)
-            result['status'] = response.status_code
-            
-            if response.status_code != 200:
-                result['error'] = f"HTTP {response.status_code}"
-                print(f"[FAIL] HTTP Status: {response.status_code}")
-                return result
-        except requests.Timeout:
-            result['error'] = f"Timeout after {timeout}s"
-            print(f"[FAIL] Timeout after {timeout}s")
-            return result
-        except requests.RequestException as e:
-            result['error'] = f"Request error: {str(e)[:50]}"
-            print(f"[FAIL] Request error: {e}")
+        # Tải một lần qua fetcher rồi parse bytes (không để feedparser tự mở kết nối thứ hai)
+        if fetch_result is None:
+            fetch_result = fetch_feeds([{'name': name, 'url': url}], timeout)[0]
+        response_time = fetch_result['elapsed']
+        result['response_time'] = round(response_time, 2)
+        result['status'] = fetch_result['status']
+        
+        if fetch_result['error']:
+            result['error'] = fetch_result['error']
+            print(f"[FAIL] {fetch_result['error']}")
             return result
         
         # Parse RSS feed
-        feed = feedparser.parse(url)
+        feed = feedparser.parse(fetch_result['body'], response_headers=fetch_result['headers'])
         
         # Check feed status
         feed_status = feed.get('status', 200)
@@ -146,15 +142,23 @@ def test_from_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         feeds = yaml.safe_load(f)
     
+    feed_list = feeds.get('feeds', [])
+    # Tải tất cả cùng lúc; tối đa 2 kết nối mỗi host thay cho sleep giữa các feed
+    timeout = max([feed.get('timeout', 10) for feed in feed_list] or [10])
+    fetch_results = fetch_feeds(feed_list, timeout)
+    
     results = []
-    for feed in feeds.get('feeds', []):
+    for feed, fetch_result in zip(feed_list, fetch_results):
         result = test_single_feed(
             url=feed['url'],
             name=feed.get('name', 'Unnamed'),
-            timeout=feed.get('timeout', 10)
+            timeout=feed.get('timeout', 10),
+            fetch_result=fetch_result
         )
         results.append(result)
-        time.sleep(1)  # Rate limiting
+    
+    for host, stats in sorted(connection_stats(fetch_results).items()):
+        print(f"🔌 {host}: {stats['requests']} requests, {stats['new']} kết nối mới, {stats['reused']} dùng lại")
     
     return results
 
@@ -4,50 +4,30 @@ Script viết proposal từ template
 Nhận job_id hoặc job link, load job details, fill template và generate proposal
 """
 
+import importlib.util
 import os
 import sys
-import yaml
 import json
 import re
 from pathlib import Path
 from datetime import datetime
-import chromadb
-from chromadb.config import Settings
-try:
-    from ollama import Client
-    OLLAMA_CLIENT = True
-except ImportError:
-    try:
-        import ollama
-        OLLAMA_CLIENT = False
-    except ImportError:
-        print("⚠ Lỗi: Không tìm thấy ollama. Hãy cài: pip install ollama")
-        sys.exit(1)
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-# Load config
-config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
-profile_path = Path(__file__).parent.parent / 'config' / 'profile.yaml'
-template_path = Path(__file__).parent.parent / 'config' / 'proposal_template.txt'
+# chromadb, ollama, config, profile và template chỉ được load khi cần (--help không load gì)
+from utils.config import ROOT, get_config, get_profile, ollama_settings, read_text
+from utils.job_store import JobStore
 
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
-
-with open(profile_path, 'r', encoding='utf-8') as f:
-    profile = yaml.safe_load(f)
-
-with open(template_path, 'r', encoding='utf-8') as f:
-    template = f.read()
-
-chromadb_config = config['chromadb']
-ollama_config = config['ollama']
-proposals_dir = Path(__file__).parent.parent / 'data' / 'proposals'
-proposals_dir.mkdir(parents=True, exist_ok=True)
+template_path = ROOT / 'config' / 'proposal_template.txt'
+proposals_dir = ROOT / 'data' / 'proposals'
 
 def init_chromadb():
     """Khởi tạo ChromaDB client"""
+    import chromadb
+    from chromadb.config import Settings
+    
+    chromadb_config = get_config()['chromadb']
     persist_dir = Path(__file__).parent.parent / chromadb_config['persist_directory']
     
     client = chromadb.PersistentClient(
@@ -63,21 +43,10 @@ def init_chromadb():
     return collection
 
 def load_job_from_jsonl(job_id):
-    """Load job từ raw_jobs.jsonl"""
-    raw_jobs_file = Path(__file__).parent.parent / 'data' / 'raw_jobs.jsonl'
-    
-    if not raw_jobs_file.exists():
-        return None
-    
-    with open(raw_jobs_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                try:
-                    job = json.loads(line)
-                    if job.get('job_id') == job_id:
-                        return job
-                except:
-                    continue
+    """Load job từ các segment trong data/jobs/ (segment mới nhất trước)"""
+    for job in JobStore().iter_jobs(job_id=job_id, newest_first=True):
+        if job.get('job_id') == job_id:
+            return job
     
     return None
 
@@ -171,44 +140,31 @@ Hãy viết proposal hoàn chỉnh theo template trên."""
 def generate_proposal(prompt):
     """Generate proposal từ Ollama"""
     try:
-        base_url = ollama_config.get('base_url', 'http://localhost:11434')
+        import ollama
         
-        if OLLAMA_CLIENT:
-            client = Client(host=base_url)
-            response = client.chat(
-                model=ollama_config['model'],
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': 'Em là Upwork Assistant của CEO Hùng. Em viết proposal chuyên nghiệp, thân thiện, dựa trên template và thông tin job.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ]
-            )
-            return response['message']['content']
+        model, base_url = ollama_settings()
+        messages = [
+            {
+                'role': 'system',
+                'content': 'Em là Upwork Assistant của CEO Hùng. Em viết proposal chuyên nghiệp, thân thiện, dựa trên template và thông tin job.'
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ]
+        # ollama bản cũ không có Client: dùng ollama.chat (host mặc định)
+        if hasattr(ollama, 'Client'):
+            response = ollama.Client(host=base_url).chat(model=model, messages=messages)
         else:
-            response = ollama.chat(
-                model=ollama_config['model'],
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': 'Em là Upwork Assistant của CEO Hùng. Em viết proposal chuyên nghiệp, thân thiện, dựa trên template và thông tin job.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ]
-            )
-            return response['message']['content']
+            response = ollama.chat(model=model, messages=messages)
+        return response['message']['content']
     except Exception as e:
         return f"Lỗi khi generate proposal: {e}. Đảm bảo Ollama đang chạy: ollama serve"
 
 def save_proposal(job_id, proposal_text, job_link):
     """Lưu proposal vào data/proposals/"""
+    proposals_dir.mkdir(parents=True, exist_ok=True)
     proposal_file = proposals_dir / f"{job_id}.jsonl"
     
     proposal_data = {
@@ -233,6 +189,10 @@ def main():
     
     args = parser.parse_args()
     
+    if importlib.util.find_spec('ollama') is None:
+        print("⚠ Lỗi: Không tìm thấy ollama. Hãy cài: pip install ollama")
+        sys.exit(1)
+    
     print("=" * 50)
     print("✍️  Đang generate proposal...")
     print("=" * 50)
@@ -259,7 +219,7 @@ def main():
     print(f"✓ Đã load job: {job.get('title', '')}")
     
     # Build prompt
-    prompt = build_proposal_prompt(job, profile, template)
+    prompt = build_proposal_prompt(job, get_profile(), read_text(template_path))
     
     # Generate proposal
     print("✓ Đang generate proposal với Ollama...")
@@ -0,0 +1,30 @@
+"""Budget dạng số từ text (utils/job_fields.py)"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.job_fields import parse_budget_fields
+
+
+def test_thousands_without_unit_is_fixed():
+    for text in ("$5k project", "Budget: $2.5k"):
+        assert parse_budget_fields(text)['budget_type'] == 'fixed', text
+
+
+def test_thousands_amount():
+    fields = parse_budget_fields("Budget: $2.5k")
+    assert fields['budget_min'] == fields['budget_max'] == 2500
+    assert fields['currency'] == 'USD'
+
+
+def test_yearly_from_unit_or_salary_label():
+    assert parse_budget_fields("€60k–80k a year")['budget_type'] == 'yearly'
+    assert parse_budget_fields("Salary: $90k - $120k")['budget_type'] == 'yearly'
+
+
+def test_hourly_label():
+    fields = parse_budget_fields("Hourly Range: $15.00-$35.00")
+    assert fields['budget_type'] == 'hourly'
+    assert (fields['budget_min'], fields['budget_max']) == (15, 35)
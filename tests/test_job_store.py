@@ -0,0 +1,90 @@
+"""Crash safety, đọc theo cửa sổ và compact của JobStore (utils/job_store.py)"""
+
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.job_index import JobIndex
+from utils.job_store import JobStore
+
+DAYS = ('2026-09-01', '2026-09-02', '2026-09-03')
+
+
+def make_job(job_id, day='2026-09-01'):
+    return {'job_id': job_id, 'title': f'Job {job_id}', 'crawled_at': f'{day}T10:00:00'}
+
+
+def ids(jobs):
+    return [job['job_id'] for job in jobs]
+
+
+def segmented_store(tmp_path, per_day=3):
+    """Store 3 segment (một segment mỗi ngày trong DAYS), tách từ raw_jobs.jsonl"""
+    legacy = tmp_path / 'raw_jobs.jsonl'
+    with open(legacy, 'w', encoding='utf-8') as f:
+        for day in DAYS:
+            for i in range(per_day):
+                f.write(json.dumps(make_job(f"{day}-{i}", day)) + '\n')
+    store = JobStore(base_dir=tmp_path / 'jobs', legacy_file=legacy)
+    store.migrate_legacy()
+    return store
+
+
+def test_append_truncates_torn_tail(tmp_path):
+    store = JobStore(base_dir=tmp_path / 'jobs', legacy_file=tmp_path / 'raw_jobs.jsonl')
+    store.append([make_job('a'), make_job('b')])
+    segment = store.all_segments[-1]
+    committed = segment['size']
+    path = store.segment_path(segment)
+    # Crash giữa batch: một dòng đủ nhưng manifest chưa được thay + một dòng ghi dở
+    with open(path, 'ab') as f:
+        f.write((json.dumps(make_job('lost')) + '\n').encode() + b'{"job_id": "torn"')
+
+    reader = JobStore(base_dir=tmp_path / 'jobs', legacy_file=tmp_path / 'raw_jobs.jsonl')
+    assert ids(reader.iter_jobs()) == ['a', 'b']
+    assert reader.complete_size() == committed
+
+    reader.append([make_job('c')])
+    assert ids(reader.iter_jobs()) == ['a', 'b', 'c']
+    assert path.stat().st_size == reader.complete_size()
+    assert ids(job for job, _ in reader.iter_records(committed)) == ['c']
+
+
+def test_iter_jobs_since_skips_older_segments(tmp_path):
+    store = segmented_store(tmp_path)
+    assert [s['day'] for s in store.all_segments] == ['20260901', '20260902', '20260903']
+    # iter_jobs không lọc từng job: job ngày 01 vắng mặt nghĩa là cả segment bị bỏ qua
+    found = ids(store.iter_jobs(since=datetime(2026, 9, 2)))
+    assert found == [f"{day}-{i}" for day in DAYS[1:] for i in range(3)]
+    assert ids(store.iter_jobs(until=datetime(2026, 9, 1, 23))) == [f"{DAYS[0]}-{i}" for i in range(3)]
+    newest = ids(store.iter_jobs(since=datetime(2026, 9, 3), newest_first=True))
+    assert newest == [f"{DAYS[2]}-{i}" for i in reversed(range(3))]
+
+
+def test_compact_keeps_uncompressed_offsets(tmp_path):
+    store = segmented_store(tmp_path)
+    index = JobIndex(store, index_path=tmp_path / 'jobs' / 'jobs.idx')
+    index.update()
+    records = [(job['job_id'], end) for job, end in store.iter_records()]
+    middle = records[4][1]  # Giữa segment thứ hai (sẽ bị nén)
+    fingerprint = store.fingerprint(middle)
+
+    stats = store.compact()
+    assert stats['segments'] == 2
+    assert [s.get('compressed') for s in store.all_segments] == ['gzip', 'gzip', None]
+    assert store.segment_path(store.all_segments[0]).name.endswith('.gz')
+
+    assert [(job['job_id'], end) for job, end in store.iter_records()] == records
+    assert list(store.iter_ids()) == records
+    assert [(job['job_id'], end) for job, end in store.iter_records(middle)] == records[5:]
+    assert store.fingerprint(middle) == fingerprint
+
+    # Index cũ vẫn khớp sau khi nén; job mới chỉ được catch-up, không rebuild
+    reopened = JobIndex(store, index_path=tmp_path / 'jobs' / 'jobs.idx')
+    assert reopened.check() == (True, [])
+    store.append([make_job('new', '2099-01-01')])
+    assert reopened.update() == 1
+    assert 'new' in reopened and f"{DAYS[0]}-0" in reopened
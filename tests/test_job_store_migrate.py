@@ -0,0 +1,55 @@
+"""Tách raw_jobs.jsonl kiểu cũ thành segment (JobStore.migrate_legacy)"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import utils.job_store as job_store_module
+from utils.job_store import JobStore
+
+
+def job(job_id):
+    return json.dumps({'job_id': job_id, 'title': f'Job {job_id}', 'crawled_at': '2026-09-01T10:00:00'})
+
+
+def make_store(tmp_path, content):
+    legacy = tmp_path / 'raw_jobs.jsonl'
+    legacy.write_bytes(content.encode('utf-8'))
+    return JobStore(base_dir=tmp_path / 'jobs', legacy_file=legacy), legacy
+
+
+def test_last_line_without_newline_is_migrated(tmp_path):
+    store, legacy = make_store(tmp_path, f"{job('a')}\n{job('b')}")
+    assert [j['job_id'] for j in store.iter_jobs()] == ['a', 'b']
+    stats = store.migrate_legacy()
+    assert stats['jobs'] == 2 and stats['removed']
+    assert not legacy.exists()
+    assert [j['job_id'] for j in store.iter_jobs()] == ['a', 'b']
+
+
+def test_conflict_markers_are_skipped(tmp_path):
+    content = '\n'.join([job('a'), '<<<<<<< HEAD', job('b'), '=======', job('c'), '>>>>>>> origin/main', job('d')])
+    store, legacy = make_store(tmp_path, content)
+    stats = store.migrate_legacy()
+    assert (stats['jobs'], stats['skipped']) == (4, 0)
+    assert not legacy.exists()
+    assert [j['job_id'] for j in store.iter_jobs()] == ['a', 'b', 'c', 'd']
+
+
+def test_legacy_file_kept_when_it_changes_during_migration(tmp_path, monkeypatch):
+    store, legacy = make_store(tmp_path, f"{job('a')}\n{job('b')}\n")
+    segment_day = job_store_module.segment_day
+
+    def append_while_migrating(record):
+        # Crawler bản cũ (không dùng lock) append vào raw_jobs.jsonl giữa chừng
+        with open(legacy, 'a', encoding='utf-8') as f:
+            f.write(job(f"late-{record['job_id']}") + '\n')
+        return segment_day(record)
+
+    monkeypatch.setattr(job_store_module, 'segment_day', append_while_migrating)
+    stats = store.migrate_legacy()
+    assert stats['jobs'] == 2 and not stats['removed']
+    assert legacy.exists()
+    assert legacy.stat().st_size > stats['bytes']
@@ -0,0 +1,60 @@
+"""Near-duplicate: chỉ gộp job khác nguồn (utils/near_dup.py)"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.near_dup import HEADER, MAGIC, SimHashIndex, hamming, simhash_job
+
+TITLE = 'Senior Python developer for client projects'
+BOILERPLATE = (
+    "We are a fast growing remote agency looking for an experienced developer to join our team. "
+    "You will work with our product managers and designers on client projects, write clean and "
+    "tested code, review pull requests and communicate daily in English. Long term contract, "
+    "flexible hours, payment every two weeks. Please include links to previous work in your proposal."
+)
+
+
+def make_job(job_id, source, stack):
+    return {
+        'job_id': job_id,
+        'source': source,
+        'title': TITLE,
+        'description': f"{BOILERPLATE} Stack: {stack}.",
+        'crawled_at': '2099-01-01T00:00:00',
+    }
+
+
+def test_same_source_postings_are_not_linked(tmp_path):
+    # Hai tin khác nhau của cùng một board, chỉ khác stack - SimHash nằm trong ngưỡng
+    first = make_job('a1b2c3d4e5f6', 'Board A', 'Django, PostgreSQL')
+    second = make_job('0f9e8d7c6b5a', 'Board A', 'Django, MySQL')
+    assert hamming(simhash_job(first), simhash_job(second)) <= 4
+
+    index = SimHashIndex(tmp_path / 'simhash.lsh', max_distance=4)
+    assert index.link(first) is None
+    assert index.link(second) is None
+    assert len(index.records) == 2
+
+
+def test_cross_source_copy_is_linked_after_reload(tmp_path):
+    path = tmp_path / 'simhash.lsh'
+    index = SimHashIndex(path, max_distance=4)
+    assert index.link(make_job('a1b2c3d4e5f6', 'Board A', 'Django, PostgreSQL')) is None
+    index.save()
+
+    reloaded = SimHashIndex(path, max_distance=4)
+    assert reloaded.load()
+    assert reloaded.link(make_job('0f9e8d7c6b5a', 'Board A', 'Django, MySQL')) is None
+    assert reloaded.link(make_job('112233445566', 'Board A API', 'Django, PostgreSQL')) == ('a1b2c3d4e5f6', 0)
+
+
+def test_old_layout_is_rebuilt(tmp_path):
+    path = tmp_path / 'simhash.lsh'
+    path.write_bytes(HEADER.pack(MAGIC, 1) + b'\0' * 24)
+
+    index = SimHashIndex(path)
+    assert not index.load()
+    index.rebuild([make_job('a1b2c3d4e5f6', 'Board A', 'Django, PostgreSQL')])
+    assert SimHashIndex(path).load()
@@ -41,6 +41,11 @@ git pull origin main
 if errorlevel 1 (
     echo WARNING: Git pull that bai, tiep tuc...
 )
+REM Cai thu vien moi them vao requirements.txt (vd. pyahocorasick)
+pip install -q -r requirements.txt
+if errorlevel 1 (
+    echo WARNING: Cai dat thu vien that bai, tiep tuc...
+)
 echo OK
 echo.
 
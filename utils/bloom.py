@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Scalable Bloom Filter - Pre-check dedup job_id, lưu file và đọc qua mmap
+Không có false negative: "không có" là chắc chắn, "có thể có" mới cần tra index chính xác
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, List
+
+MAGIC = b'BLOOM001'
+# magic, số layer, kích thước JSONL mà filter đang đồng bộ, capacity gốc, error rate
+FILE_HEADER = struct.Struct('<8sIQQd')
+# capacity, count, số bit, số hash
+LAYER_HEADER = struct.Struct('<QQQI')
+# Mỗi layer mới gấp đôi capacity và chặt error rate lại (tổng error rate vẫn bị chặn)
+GROWTH = 2
+TIGHTENING = 0.5
+
+
+def _layer_params(capacity: int, error_rate: float):
+    num_bits = max(64, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+    num_bits = (num_bits + 7) // 8 * 8
+    num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+    return num_bits, num_hashes
+
+
+def _hash_pair(key: bytes):
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter nhiều layer (tự thêm layer khi layer cuối đầy), persist thành một file
+
+    Dùng với JobIndex: key là record job_id 12 byte.
+    """
+
+    def __init__(self, path: Path, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.path = Path(path)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.synced_size = 0
+        self.layers: List[dict] = []
+        self._file = None
+        self._mm = None
+
+    # ---------- file ----------
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def open(self) -> bool:
+        """Mở filter hiện có qua mmap, return False nếu thiếu/hỏng/khác cấu hình"""
+        self.close()
+        self.layers = []
+        if not self.path.exists() or os.path.getsize(self.path) < FILE_HEADER.size:
+            return False
+        self._file = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        magic, num_layers, synced_size, capacity, error_rate = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or capacity != self.capacity or error_rate != self.error_rate:
+            self.close()
+            return False
+        offset = FILE_HEADER.size
+        for _ in range(num_layers):
+            if offset + LAYER_HEADER.size > len(self._mm):
+                self.close()
+                return False
+            cap, count, num_bits, num_hashes = LAYER_HEADER.unpack_from(self._mm, offset)
+            self.layers.append({
+                'header_offset': offset,
+                'bits_offset': offset + LAYER_HEADER.size,
+                'capacity': cap,
+                'count': count,
+                'num_bits': num_bits,
+                'num_hashes': num_hashes,
+            })
+            offset += LAYER_HEADER.size + num_bits // 8
+        if offset != len(self._mm):
+            self.close()
+            return False
+        self.synced_size = synced_size
+        return True
+
+    def create(self):
+        """Tạo filter rỗng (ghi đè file cũ)"""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'wb') as f:
+            f.write(FILE_HEADER.pack(MAGIC, 0, 0, self.capacity, self.error_rate))
+        self.open()
+        self._add_layer()
+
+    def _write_counts(self):
+        """Ghi count của các layer vào header trong file"""
+        for layer in self.layers:
+            LAYER_HEADER.pack_into(self._mm, layer['header_offset'], layer['capacity'], layer['count'],
+                                   layer['num_bits'], layer['num_hashes'])
+
+    def _add_layer(self):
+        if self._mm is not None:
+            self._write_counts()  # open() lại bên dưới đọc count từ file
+        index = len(self.layers)
+        capacity = self.capacity * (GROWTH ** index)
+        error_rate = self.error_rate * (1 - TIGHTENING) * (TIGHTENING ** index)
+        num_bits, num_hashes = _layer_params(capacity, error_rate)
+        self.close()
+        with open(self.path, 'ab') as f:
+            f.write(LAYER_HEADER.pack(capacity, 0, num_bits, num_hashes))
+            f.truncate(f.tell() + num_bits // 8)
+        with open(self.path, 'r+b') as f:
+            header = bytearray(f.read(FILE_HEADER.size))
+            magic, num_layers, synced_size, cap, err = FILE_HEADER.unpack(header)
+            f.seek(0)
+            f.write(FILE_HEADER.pack(magic, num_layers + 1, synced_size, cap, err))
+        self.open()
+
+    # ---------- thao tác ----------
+
+    def _positions(self, key: bytes, layer: dict):
+        h1, h2 = _hash_pair(key)
+        num_bits = layer['num_bits']
+        return [(h1 + i * h2) % num_bits for i in range(layer['num_hashes'])]
+
+    def __contains__(self, key: bytes) -> bool:
+        mm = self._mm
+        if mm is None:
+            return True  # Không có filter thì luôn hỏi index
+        h1, h2 = _hash_pair(key)
+        for layer in self.layers:
+            base = layer['bits_offset']
+            num_bits = layer['num_bits']
+            for i in range(layer['num_hashes']):
+                pos = (h1 + i * h2) % num_bits
+                if not mm[base + (pos >> 3)] & (1 << (pos & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def add_many(self, keys: Iterable[bytes], synced_size: int):
+        """Thêm keys vào layer cuối (tự scale), ghi lại synced_size rồi flush"""
+        for key in keys:
+            # File chỉ có header (vd. create() bị ngắt trước khi thêm layer): tạo layer đầu tiên lúc cần
+            if not self.layers or self.layers[-1]['count'] >= self.layers[-1]['capacity']:
+                self._add_layer()
+            layer = self.layers[-1]
+            base = layer['bits_offset']
+            for pos in self._positions(key, layer):
+                self._mm[base + (pos >> 3)] |= 1 << (pos & 7)
+            layer['count'] += 1
+        self._write_counts()
+        magic, num_layers, _, cap, err = FILE_HEADER.unpack_from(self._mm, 0)
+        FILE_HEADER.pack_into(self._mm, 0, magic, num_layers, synced_size, cap, err)
+        self._mm.flush()
+        self.synced_size = synced_size
+
+    def __len__(self) -> int:
+        return sum(layer['count'] for layer in self.layers)
+
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.path) if self.path.exists() else 0
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Config - Đọc config.yaml, profile.yaml và ai_rules/*.md lần đầu cần dùng (không phải lúc import)
+Mỗi file chỉ đọc / parse một lần trong process; script chỉ chạy --help thì không đọc file nào.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+ROOT = Path(__file__).parent.parent
+CONFIG_PATH = ROOT / 'config' / 'config.yaml'
+PROFILE_PATH = ROOT / 'config' / 'profile.yaml'
+AI_RULES_DIR = ROOT / 'ai_rules'
+
+_config: Optional[Dict] = None
+_profile: Optional[Dict] = None
+_texts: Dict[Path, str] = {}
+
+
+def _load_yaml(path: Path) -> Dict:
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_config() -> Dict:
+    """config/config.yaml (parse một lần)"""
+    global _config
+    if _config is None:
+        _config = _load_yaml(CONFIG_PATH)
+    return _config
+
+
+def get_profile() -> Dict:
+    """config/profile.yaml, {} nếu chưa có"""
+    global _profile
+    if _profile is None:
+        _profile = _load_yaml(PROFILE_PATH) if PROFILE_PATH.exists() else {}
+    return _profile
+
+
+def ollama_settings() -> Tuple[str, str]:
+    """(model, base_url) từ mục ollama trong config.yaml"""
+    ollama_config = get_config().get('ollama', {})
+    return (ollama_config.get('model', 'qwen2.5:7b-instruct-q4_K_M'),
+            ollama_config.get('base_url', 'http://localhost:11434'))
+
+
+def read_text(path: Path, default: str = '') -> str:
+    """Nội dung file text (template, rules), default nếu file không tồn tại"""
+    path = Path(path)
+    if path not in _texts:
+        _texts[path] = path.read_text(encoding='utf-8') if path.exists() else default
+    return _texts[path]
+
+
+def ai_rule(name: str) -> str:
+    """ai_rules/<name>.md, '' nếu không có"""
+    return read_text(AI_RULES_DIR / f"{name}.md")
+
+
+def clear_cache():
+    """Đọc lại mọi file ở lần gọi sau (dùng khi đổi config/test)"""
+    global _config, _profile
+    _config = None
+    _profile = None
+    _texts.clear()
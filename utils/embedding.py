@@ -1,16 +1,37 @@
 #!/usr/bin/env python3
 """
 Embedding Model Utility - Cache SentenceTransformer model globally
+sentence_transformers (kéo theo torch) chỉ được import khi cần model lần đầu.
+EncodePool chia text thành shard cho N process CPU (mỗi process một model, giới hạn thread riêng).
 """
 
-from sentence_transformers import SentenceTransformer
-from typing import Optional
+import math
+import os
+from typing import TYPE_CHECKING, List, Optional
+
+from utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
+logger = setup_logger('embedding')
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+# Batch encode trên CPU: lớn hơn không nhanh hơn với MiniLM, chỉ tốn RAM padding
+DEFAULT_BATCH_SIZE = 64
+# Ít text hơn mức này thì encode trong process chính (khởi động worker + load model tốn vài giây)
+DEFAULT_POOL_MIN_TEXTS = 256
+# Biến môi trường giới hạn thread của BLAS / OpenMP trong worker
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TOKENIZERS_PARALLELISM')
 
 # Global cache for embedding model
-_embedding_model: Optional[SentenceTransformer] = None
+_embedding_model: Optional['SentenceTransformer'] = None
 _model_name: Optional[str] = None
 
-def get_embedding_model(model_name: str = 'all-MiniLM-L6-v2') -> SentenceTransformer:
+def get_embedding_model(model_name: str = DEFAULT_MODEL) -> 'SentenceTransformer':
     """
     Get cached SentenceTransformer model.
     Model is loaded once and reused for all subsequent calls.
@@ -28,6 +49,7 @@ def get_embedding_model(model_name: str = 'all-MiniLM-L6-v2') -> SentenceTransfo
         return _embedding_model
     
     # Load new model
+    from sentence_transformers import SentenceTransformer
     _embedding_model = SentenceTransformer(model_name)
     _model_name = model_name
     return _embedding_model
@@ -38,3 +60,116 @@ def clear_cache():
     _embedding_model = None
     _model_name = None
 
+def physical_cores() -> int:
+    """Số core vật lý (psutil nếu có, Linux đọc /proc/cpuinfo, còn lại đoán CPU logic / 2)"""
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+        if cores:
+            return cores
+    except ImportError:
+        pass
+    try:
+        cores = set()
+        physical_id = None
+        with open('/proc/cpuinfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('physical id'):
+                    physical_id = line.split(':', 1)[1].strip()
+                elif line.startswith('core id'):
+                    cores.add((physical_id, line.split(':', 1)[1].strip()))
+        if cores:
+            return len(cores)
+    except OSError:
+        pass
+    logical = os.cpu_count() or 1
+    return max(1, logical // 2)
+
+def _init_encode_worker(model_name: str, threads: int):
+    """Chạy một lần trong mỗi worker: giới hạn thread trước khi torch khởi tạo, load model"""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = 'false' if var == 'TOKENIZERS_PARALLELISM' else str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    get_embedding_model(model_name)
+
+def _encode_shard(task):
+    texts, batch_size = task
+    return _embedding_model.encode(texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+
+class EncodePool:
+    """
+    Encode embedding song song trên nhiều process CPU
+
+    Worker được tạo (spawn) ở lần encode lớn đầu tiên và dùng lại tới khi close().
+    Mỗi worker giữ threads_per_worker thread torch để tổng thread không vượt số CPU.
+
+    Usage:
+        with EncodePool('all-MiniLM-L6-v2') as pool:
+            embeddings = pool.encode(texts)
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 min_texts: int = DEFAULT_POOL_MIN_TEXTS):
+        """
+        Args:
+            model_name: SentenceTransformer model
+            workers: Số process encode; None = số core vật lý, 0/1 = encode trong process chính
+            threads_per_worker: Thread torch mỗi worker; None = số CPU logic / workers
+            batch_size: Batch size của model.encode trong mỗi worker
+            min_texts: Ít text hơn thì encode trong process chính
+        """
+        self.model_name = model_name
+        self.workers = physical_cores() if workers is None else max(0, workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // max(1, self.workers))
+        self.batch_size = batch_size
+        self.min_texts = min_texts
+        self._executor: Optional['ProcessPoolExecutor'] = None
+
+    def __enter__(self) -> 'EncodePool':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self) -> Optional['ProcessPoolExecutor']:
+        """Tạo process pool nếu chưa có (workers <= 1 thì không cần pool)"""
+        if self._executor is None and self.workers > 1:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            
+            # spawn: fork sau khi torch / chromadb đã chạy thread trong process chính không an toàn
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_encode_worker,
+                initargs=(self.model_name, self.threads_per_worker)
+            )
+            logger.info(f"Started {self.workers} encode workers x {self.threads_per_worker} threads ({self.model_name})")
+        return self._executor
+
+    def shards(self, texts: List[str]) -> List[List[str]]:
+        """Chia texts thành shard đều cho các worker, mỗi shard tối đa 4 batch để worker xong gần cùng lúc"""
+        size = max(1, min(self.batch_size * 4, math.ceil(len(texts) / self.workers)))
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    def encode(self, texts: List[str]) -> 'np.ndarray':
+        """Embedding cho texts (đúng thứ tự)"""
+        import numpy as np
+        
+        texts = list(texts)
+        if self.workers <= 1 or len(texts) < self.min_texts:
+            return get_embedding_model(self.model_name).encode(
+                texts, batch_size=self.batch_size, show_progress_bar=False, convert_to_numpy=True)
+        executor = self.start()
+        results = list(executor.map(_encode_shard, [(shard, self.batch_size) for shard in self.shards(texts)]))
+        return np.concatenate(results)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
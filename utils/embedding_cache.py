@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Embedding Cache - Cache embedding trên đĩa theo (model, hash của text đã chuẩn hóa)
+Vector nằm trong file float32 đọc bằng memory-map (data/embeddings/<model>/vectors.f32), index SQLite
+(index.sqlite) map key -> dòng trong file, kèm lần dùng gần nhất để đuổi LRU khi vượt max_mb.
+Dựng lại data/chroma_db, tạo collection mới hay chạy lại sau crash chủ yếu chỉ còn đọc đĩa.
+"""
+
+import hashlib
+import re
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.file_lock import file_lock
+from utils.logger import setup_logger
+
+logger = setup_logger('embedding_cache')
+
+CACHE_DIR = Path(__file__).parent.parent / 'data' / 'embeddings'
+DEFAULT_MAX_MB = 512
+# File vector nới theo bước này (số dòng) thay vì mỗi lần put
+GROW_ROWS = 4096
+# Số key mỗi câu SELECT ... IN (...) (giới hạn tham số của SQLite)
+QUERY_BATCH = 500
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """NFC + gộp khoảng trắng - tokenizer cho ra cùng token nên embedding không đổi"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def text_key(model_name: str, text: str) -> bytes:
+    """Key 16 byte của (model, text đã chuẩn hóa)"""
+    return hashlib.blake2b(f"{model_name}\0{normalize_text(text)}".encode('utf-8'), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """
+    Cache embedding của một model
+
+    Usage:
+        cache = EmbeddingCache('all-MiniLM-L6-v2')
+        embeddings = cache.encode(texts, lambda batch: model.encode(batch))
+        print(cache.hits, cache.misses)
+    """
+
+    def __init__(self, model_name: str, base_dir: Path = CACHE_DIR, max_mb: float = DEFAULT_MAX_MB):
+        self.model_name = model_name
+        self.dir = Path(base_dir) / re.sub(r'[^A-Za-z0-9._-]+', '_', model_name)
+        self.vectors_path = self.dir / 'vectors.f32'
+        self.index_path = self.dir / 'index.sqlite'
+        self.lock_path = self.dir / '.write.lock'
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        # Thống kê trong process (stats() có thêm số cộng dồn trên đĩa)
+        self.hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+
+    # ---------- index ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.index_path), timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript('''
+                CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, row INTEGER NOT NULL, last_used INTEGER NOT NULL);
+                CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+                CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+                CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            ''')
+            self._db = db
+        return self._db
+
+    def _meta(self, name: str) -> int:
+        row = self._connect().execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_meta(self, name: str, value: int):
+        self._connect().execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+
+    def _lookup(self, keys: Sequence[bytes]) -> Dict[bytes, int]:
+        """{key: dòng} của các key đã có"""
+        db = self._connect()
+        rows = {}
+        for start in range(0, len(keys), QUERY_BATCH):
+            batch = list(keys[start:start + QUERY_BATCH])
+            placeholders = ','.join('?' * len(batch))
+            rows.update(db.execute(f"SELECT key, row FROM entries WHERE key IN ({placeholders})", batch))
+        return rows
+
+    # ---------- vector file ----------
+
+    def _map(self, mode: str = 'r') -> Optional[np.memmap]:
+        dim = self._meta('dim')
+        if not dim or not self.vectors_path.exists():
+            return None
+        rows = self.vectors_path.stat().st_size // (dim * 4)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(rows, dim)) if rows else None
+
+    def _grow(self, rows: int, dim: int, max_rows: int):
+        """Nới file vector đủ chứa rows dòng (làm tròn lên GROW_ROWS, không vượt max_rows nếu được)"""
+        current = self.vectors_path.stat().st_size // (dim * 4) if self.vectors_path.exists() else 0
+        if rows <= current:
+            return
+        target = max(rows, min(max_rows, -(-rows // GROW_ROWS) * GROW_ROWS))
+        with open(self.vectors_path, 'a+b') as f:
+            f.truncate(target * dim * 4)
+
+    # ---------- đọc / ghi ----------
+
+    def get(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """Vector của các key đã có (key thiếu không có trong dict), cập nhật lần dùng cho LRU"""
+        if not keys or not self.index_path.exists():
+            return {}
+        rows = self._lookup(keys)
+        vectors = self._map() if rows else None
+        if vectors is None:
+            return {}
+        rows = {key: row for key, row in rows.items() if row < len(vectors)}
+        block = np.array(vectors[np.fromiter(rows.values(), dtype=np.int64, count=len(rows))])
+        db = self._connect()
+        now = time.time_ns()
+        with db:
+            db.executemany('UPDATE entries SET last_used = ? WHERE key = ?', ((now, key) for key in rows))
+        return dict(zip(rows, block))
+
+    def put(self, keys: Sequence[bytes], vectors: np.ndarray):
+        """
+        Ghi vector cho các key chưa có; vượt max_mb thì đuổi các entry lâu không dùng nhất
+
+        Thứ tự ghi an toàn khi crash: (1) chuyển dòng của entry bị đuổi vào free_rows, (2) ghi vector,
+        (3) commit entry mới. Crash giữa chừng chỉ mất entry cache, không có key trỏ tới vector sai.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        with file_lock(self.lock_path):
+            db = self._connect()
+            dim = self._meta('dim')
+            if dim and dim != vectors.shape[1]:
+                logger.warning(f"Embedding dim changed {dim} -> {vectors.shape[1]} for {self.model_name}, clearing cache")
+                self.clear()
+                db = self._connect()
+                dim = 0
+            if not dim:
+                dim = vectors.shape[1]
+                with db:
+                    self._set_meta('dim', dim)
+
+            existing = self._lookup(keys)
+            fresh = [(key, vector) for key, vector in zip(keys, vectors) if key not in existing]
+            max_rows = max(1, self.max_bytes // (dim * 4))
+            fresh = fresh[-max_rows:]
+            if not fresh:
+                return
+
+            # (1) Đủ chỗ: dòng trống + phần chưa dùng tới max_rows; thiếu thì đuổi LRU
+            next_row = self._meta('next_row')
+            free_count = db.execute('SELECT COUNT(*) FROM free_rows').fetchone()[0]
+            shortage = len(fresh) - free_count - max(0, max_rows - next_row)
+            if shortage > 0:
+                with db:
+                    victims = db.execute('SELECT key, row FROM entries ORDER BY last_used LIMIT ?', (shortage,)).fetchall()
+                    db.executemany('DELETE FROM entries WHERE key = ?', ((key,) for key, _ in victims))
+                    db.executemany('INSERT OR IGNORE INTO free_rows (row) VALUES (?)', ((row,) for _, row in victims))
+                logger.info(f"Evicted {len(victims)} cached embeddings (max {self.max_bytes // 1024 // 1024}MB)")
+            rows = [row for (row,) in db.execute('SELECT row FROM free_rows ORDER BY row LIMIT ?', (len(fresh),))]
+            rows += range(next_row, next_row + len(fresh) - len(rows))
+
+            # (2) Ghi vector vào các dòng đã chọn
+            self._grow(max(rows) + 1, dim, max_rows)
+            mapped = self._map('r+')
+            mapped[np.array(rows)] = np.stack([vector for _, vector in fresh])
+            mapped.flush()
+            del mapped
+
+            # (3) Commit entry mới
+            now = time.time_ns()
+            with db:
+                db.executemany('INSERT OR REPLACE INTO entries (key, row, last_used) VALUES (?, ?, ?)',
+                               ((key, row, now) for (key, _), row in zip(fresh, rows)))
+                db.executemany('DELETE FROM free_rows WHERE row = ?', ((row,) for row in rows))
+                self._set_meta('next_row', max(next_row, max(rows) + 1))
+
+    def encode(self, texts: Sequence[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Embedding cho texts (đúng thứ tự): lấy từ cache, chỉ gọi encode_fn cho text chưa có rồi ghi lại
+
+        Args:
+            texts: Danh sách text
+            encode_fn: Hàm encode list text -> mảng (n, dim), vd. model.encode
+        """
+        keys = [text_key(self.model_name, text) for text in texts]
+        found = self.get(keys)
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            encoded = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            self.put(list(missing), encoded)
+            found.update(zip(missing, encoded))
+
+        hits, misses = len(keys) - len(missing), len(missing)
+        self.hits += hits
+        self.misses += misses
+        db = self._connect()
+        with db:
+            db.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('hits', 0), ('misses', 0)")
+            db.execute("UPDATE meta SET value = value + ? WHERE name = 'hits'", (hits,))
+            db.execute("UPDATE meta SET value = value + ? WHERE name = 'misses'", (misses,))
+        if not keys:
+            return np.empty((0, self._meta('dim')), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    # ---------- bảo trì ----------
+
+    def stats(self) -> Dict:
+        """Số entry, dung lượng, hit rate cộng dồn (mọi run) và của process này"""
+        if not self.index_path.exists():
+            entries = hits = misses = 0
+        else:
+            entries = self._connect().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            hits, misses = self._meta('hits'), self._meta('misses')
+        disk = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        lookups = hits + misses
+        run_lookups = self.hits + self.misses
+        return {
+            'model': self.model_name,
+            'entries': entries,
+            'disk_mb': disk / 1024 / 1024,
+            'max_mb': self.max_bytes / 1024 / 1024,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'run_hit_rate': self.hits / run_lookups if run_lookups else 0.0,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def clear(self):
+        """Xóa toàn bộ cache của model"""
+        self.close()
+        for path in (self.vectors_path, self.index_path,
+                     self.index_path.with_name('index.sqlite-wal'), self.index_path.with_name('index.sqlite-shm')):
+            path.unlink(missing_ok=True)
+
+
+def cached_models(base_dir: Path = CACHE_DIR) -> List[str]:
+    """Tên thư mục cache theo model đang có trên đĩa"""
+    if not Path(base_dir).exists():
+        return []
+    return sorted(path.name for path in Path(base_dir).iterdir() if (path / 'index.sqlite').exists())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Feed Parser - Parse + normalize body đã tải thành jobs / bài viết (CPU-bound, không I/O mạng)
+Chỉ nhận/trả dữ liệu thuần (picklable) để chạy được trong process pool của utils/pipeline.py.
+Entry có job_id đã có trong index (mở read-only từ file, theo task['known_ids']) bị bỏ trước khi normalize;
+dedup cuối cùng theo job_id / article_id vẫn làm ở process chính.
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Container, Dict, Iterator, Optional, Tuple
+
+import feedparser
+
+from utils.job_fields import format_budget, parse_budget_fields
+from utils.job_index import JobIndex, open_snapshot
+from utils.json_stream import iter_json_array
+from utils.keywords import get_matcher
+from utils.logger import setup_logger
+from utils.trends import article_id, canonical_link
+from utils.validation import sanitize_job, validate_job
+from utils.watermark import HighWaterMarks, entry_key, entry_timestamp
+
+logger = setup_logger('feed_parser')
+
+# Số bài mới nhất lấy từ mỗi tech blog
+ARTICLES_PER_BLOG = 5
+
+_PROPOSALS_RE = re.compile(r'(\d+)\s*(?:proposal|bid|applicant)', re.IGNORECASE)
+_LOCATION_RE = re.compile(r'(?:from|in|location)[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', re.IGNORECASE)
+
+# Index job_id đã mở trong process này, theo (path, mtime, size) của file index
+_snapshots: Dict[Tuple[str, int, int], Optional[JobIndex]] = {}
+
+
+def generate_job_id(title, link, source):
+    """Generate unique job ID từ title, link và source"""
+    combined = f"{source}_{title}_{link}"
+    return hashlib.md5(combined.encode()).hexdigest()[:12]
+
+
+def parse_proposals(text):
+    """Parse số proposals/bids từ text"""
+    prop_match = _PROPOSALS_RE.search(text)
+    if prop_match:
+        return int(prop_match.group(1))
+    return None
+
+
+def normalize_job(entry, source_name, source_type, category_keywords, known_ids: Optional[Container] = None):
+    """
+    Normalize job data từ các nguồn khác nhau về cùng format
+
+    Args:
+        entry: Entry RSS / item API đã map về title, link, description, location, published
+        source_name: Tên nguồn
+        source_type: 'rss' hoặc 'api'
+        category_keywords: Danh sách search_keywords (thứ tự = độ ưu tiên category)
+        known_ids: job_id đã có (hỗ trợ `in`) - job đã thấy thì bỏ qua, không parse tiếp
+
+    Returns:
+        Job dict đã sanitize + validate, None nếu không hợp lệ hoặc đã có
+    """
+    title = entry.get('title', '')
+    link = entry.get('link', entry.get('url', ''))
+
+    job_id = generate_job_id(title, link, source_name)
+    if known_ids is not None and job_id in known_ids:
+        return None
+
+    description = entry.get('summary', entry.get('description', entry.get('content', '')))
+
+    # Parse metadata: budget thành số (min/max, currency, hourly/fixed) ngay lúc ingest
+    budget_fields = parse_budget_fields(description or title)
+    if budget_fields['budget_min'] is None and entry.get('salary_min'):
+        # API có sẵn lương theo năm (vd. RemoteOK salary_min / salary_max)
+        budget_fields = {'budget_min': float(entry['salary_min']),
+                         'budget_max': float(entry.get('salary_max') or entry['salary_min']),
+                         'currency': 'USD', 'budget_type': 'yearly'}
+    proposals = parse_proposals(description or title)
+
+    # Extract location/client country
+    location = entry.get('location', entry.get('where', ''))
+    if not location:
+        location_match = _LOCATION_RE.search(description or '')
+        if location_match:
+            location = location_match.group(1)
+
+    # Determine category từ keywords (một lần quét title + description)
+    category = get_matcher(category_keywords).first(f"{title} {description or ''}") or "General"
+
+    # Thời gian lưu cả epoch (số) và ISO UTC; published RFC-822 của RSS cũng được chuẩn hóa
+    crawled = datetime.utcnow().replace(microsecond=0)
+    crawled_ts = int(crawled.replace(tzinfo=timezone.utc).timestamp())
+    created_ts = entry_timestamp(entry)
+    if created_ts is None or created_ts > crawled_ts + 86400:
+        created_ts = crawled_ts  # Không có / sai ngày đăng: coi như đăng lúc crawl
+
+    job_data = {
+        'job_id': job_id,
+        'title': title,
+        'description': description or '',
+        'link': link,
+        'budget': format_budget(budget_fields),
+        **budget_fields,
+        'proposals': proposals,
+        'client_country': location or 'Unknown',
+        'category': category,
+        'source': source_name,
+        'source_type': source_type,
+        'created_at': datetime.fromtimestamp(created_ts, timezone.utc).replace(tzinfo=None).isoformat(),
+        'created_ts': created_ts,
+        'crawled_at': crawled.isoformat(),
+        'crawled_ts': crawled_ts
+    }
+
+    # Sanitize and validate
+    job_data = sanitize_job(job_data)
+    is_valid, errors = validate_job(job_data)
+
+    if not is_valid:
+        logger.warning(f"Invalid job data from {source_name}: {', '.join(errors)}")
+        return None
+
+    return job_data
+
+
+def iter_api_items(api_config: Dict, body: Optional[bytes], body_path: Optional[str]) -> Iterator[Dict]:
+    """
+    Item (dict) của API response theo thứ tự
+
+    Body đã spool ra file (api_sources có stream: true) thì đọc từng item theo chunk,
+    không thì decode cả body. items_key: mảng nằm trong object (vd. {"jobs": [...]}).
+    """
+    items_key = api_config.get('items_key')
+    if body_path:
+        with open(body_path, 'rb') as f:
+            for item in iter_json_array(f, items_key=items_key):
+                if item and isinstance(item, dict):
+                    yield item
+        return
+
+    data = json.loads(body)
+    if items_key and isinstance(data, dict):
+        data = data.get(items_key, [])
+    if not isinstance(data, list):
+        data = [data]
+    # Filter out invalid entries
+    yield from (item for item in data if item and isinstance(item, dict))
+
+
+def api_entry(item: Dict) -> Dict:
+    """Map item API về format entry chung của normalize_job"""
+    # RemoteOK API format
+    if 'slug' in item or 'id' in item:
+        return {
+            'title': item.get('position', item.get('title', item.get('name', ''))),
+            'link': item.get('url', item.get('apply_url', f"https://remoteok.io/remote-jobs/{item.get('id', '')}")),
+            'description': item.get('description', item.get('summary', '')),
+            'location': item.get('location', item.get('location_name', 'Remote')),
+            'published': item.get('epoch', item.get('created_at', item.get('date', ''))),
+            'salary_min': item.get('salary_min'),
+            'salary_max': item.get('salary_max')
+        }
+    # Generic API format
+    return {
+        'title': item.get('title', item.get('name', '')),
+        'link': item.get('url', item.get('link', item.get('apply_url', ''))),
+        'description': item.get('description', item.get('summary', '')),
+        'location': item.get('location', ''),
+        'published': item.get('created_at', item.get('date', ''))
+    }
+
+
+def _mark_summary(entry: Dict) -> Dict:
+    """Phần entry mà high-water mark cần (key + thời điểm đăng), gửi về process chính"""
+    return {'id': entry_key(entry), 'epoch': entry_timestamp(entry)}
+
+
+class _KnownIds:
+    """job_id có trong bất kỳ index nào (jobs đã lưu, jobs trùng đã link)"""
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+
+    def __contains__(self, job_id) -> bool:
+        return any(job_id in index for index in self.indexes)
+
+
+def _known_ids(task: Dict) -> Optional[_KnownIds]:
+    """Mở (hoặc dùng lại) các index trong task['known_ids'], None nếu task không có"""
+    indexes = []
+    for spec in task.get('known_ids') or ():
+        try:
+            stat = os.stat(spec['index_path'])
+        except OSError:
+            continue
+        key = (spec['index_path'], stat.st_mtime_ns, stat.st_size)
+        if key not in _snapshots:
+            _snapshots[key] = open_snapshot(spec)
+        if _snapshots[key] is not None:
+            indexes.append(_snapshots[key])
+    return _KnownIds(indexes) if indexes else None
+
+
+def _watermarks(task: Dict) -> Optional[HighWaterMarks]:
+    options = task.get('watermark')
+    if options is None:
+        return None
+    marks = {task['name']: task['mark']} if task.get('mark') else {}
+    return HighWaterMarks(marks=marks, **options)
+
+
+def _parse_job_board(task: Dict, result: Dict):
+    feed = feedparser.parse(task['body'], response_headers=task['headers'])
+
+    # Check bozo (parsing errors)
+    if getattr(feed, 'bozo', False):
+        if hasattr(feed, 'bozo_exception'):
+            result['error'] = f"Parse error: {str(feed.bozo_exception)[:40]}"
+            logger.warning(f"RSS feed {task['name']} parse error: {feed.bozo_exception}")
+        else:
+            result['error'] = "Parse error"
+            logger.warning(f"RSS feed {task['name']} parse error (unknown)")
+        return
+
+    watermarks = _watermarks(task)
+    known_ids = _known_ids(task)
+    entries = watermarks.fresh(task['name'], feed.entries) if watermarks else feed.entries
+    for entry in entries:
+        try:
+            job = normalize_job(entry, task['name'], 'rss', task['keywords'], known_ids)
+            if job:
+                result['jobs'].append(job)
+        except Exception as e:
+            logger.error(f"Error normalizing job from {task['name']}: {e}", exc_info=True)
+    result['entries'] = len(feed.entries)
+    result['processed'] = len(entries)
+    if watermarks:
+        result['skipped'] = watermarks.skipped
+        result['head'] = [_mark_summary(entry) for entry in feed.entries[:watermarks.keep_keys]]
+
+
+def _parse_api(task: Dict, result: Dict):
+    watermarks = _watermarks(task)
+    known_ids = _known_ids(task)
+    head = result['head']
+
+    def tracked_items():
+        for item in iter_api_items(task['config'], task['body'], task['body_path']):
+            result['entries'] += 1
+            if watermarks and len(head) < watermarks.keep_keys:
+                head.append(_mark_summary(item))
+            yield item
+
+    # Item đi thẳng vào normalize; chạm high-water mark thì ngừng đọc response
+    items = watermarks.iter_fresh(task['name'], tracked_items()) if watermarks else tracked_items()
+    for item in items:
+        result['processed'] += 1
+        try:
+            job = normalize_job(api_entry(item), task['name'], 'api', task['keywords'], known_ids)
+            if job:
+                result['jobs'].append(job)
+        except Exception as e:
+            logger.error(f"Error processing API item from {task['name']}: {e}")
+    if watermarks:
+        result['skipped'] = watermarks.skipped
+
+
+def _parse_tech_blog(task: Dict, result: Dict):
+    feed = feedparser.parse(task['body'], response_headers=task['headers'])
+    result['entries'] = len(feed.entries)
+    for entry in feed.entries[:ARTICLES_PER_BLOG]:  # Lấy 5 bài mới nhất
+        link = entry.get('link', '')
+        if not link:
+            continue
+        result['articles'].append({
+            'article_id': article_id(link),
+            'title': entry.get('title', ''),
+            'link': link,
+            'canonical_link': canonical_link(link),
+            'summary': entry.get('summary', '')[:500],
+            'source': task['name'],
+            'published': entry.get('published', ''),
+            'crawled_at': datetime.utcnow().isoformat()
+        })
+    result['processed'] = len(result['articles'])
+
+
+_PARSERS = {
+    'job_board': _parse_job_board,
+    'api': _parse_api,
+    'tech_blog': _parse_tech_blog,
+}
+
+
+def parse_source(task: Dict) -> Dict:
+    """
+    Parse body đã tải của một nguồn (chạy trong worker process)
+
+    Args:
+        task: name, kind, config, body / body_path, headers, keywords (search_keywords),
+              mark + watermark (high-water mark của nguồn và tham số, None = tắt),
+              known_ids (snapshot_spec của các index job_id đã có, tùy chọn)
+
+    Returns:
+        name, jobs (chưa dedup theo job_id), articles, entries, processed, skipped,
+        head (key + thời điểm các entry đầu để cập nhật mark), error
+    """
+    result = {'name': task['name'], 'jobs': [], 'articles': [], 'entries': 0,
+              'processed': 0, 'skipped': 0, 'head': [], 'error': None}
+    try:
+        _PARSERS[task['kind']](task, result)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid JSON from API source {task['name']}: {e}")
+        result['error'] = "Invalid JSON"
+    except Exception as e:
+        logger.error(f"Error parsing {task['name']}: {e}", exc_info=True)
+        result['error'] = f"Error: {str(e)[:50]}"
+    if result['error']:
+        result['jobs'], result['articles'] = [], []
+    return result
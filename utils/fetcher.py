@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Async Fetch Engine - Tải nhiều nguồn song song trong một event loop
+Mỗi request có deadline connect/read thật sự (không treo thread như feedparser.parse(url))
+Mọi nguồn (RSS, API, test feed) dùng chung một session: pool kết nối keep-alive theo host,
+giới hạn số kết nối đồng thời mỗi host, tự giải nén gzip/deflate (và brotli nếu có cài).
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from utils.logger import setup_logger
+
+logger = setup_logger('fetcher')
+
+# aiohttp chỉ giải nén brotli khi có package Brotli/brotlicffi
+try:
+    import brotli  # noqa: F401
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/rss+xml, application/xml, text/xml, application/json, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br' if HAS_BROTLI else 'gzip, deflate',
+}
+
+# Status đáng retry (lỗi tạm thời phía server / rate limit)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Cỡ chunk khi ghi body lớn ra file tạm (request có spool=True)
+SPOOL_CHUNK_SIZE = 64 * 1024
+
+
+def build_request(source_config: Dict, kind: str) -> Dict:
+    """
+    Tạo fetch request từ source config
+
+    Args:
+        source_config: Entry trong config.yaml (name, url, params, ...)
+        kind: Loại nguồn ('job_board', 'tech_blog', 'api')
+
+    Returns:
+        Request dict dùng cho fetch_all
+    """
+    return {
+        'name': source_config['name'],
+        'url': source_config['url'],
+        'kind': kind,
+        'params': source_config.get('params') or {},
+        'headers': source_config.get('headers') or {},
+        # None = dùng retry_attempts chung của fetch_all
+        'retry_attempts': None,
+        # Ghi body ra file tạm theo chunk thay vì giữ trong RAM (API trả document lớn)
+        'spool': bool(source_config.get('stream', False)),
+    }
+
+
+def _empty_result(request: Dict) -> Dict:
+    return {
+        'name': request['name'],
+        'url': request['url'],
+        'kind': request['kind'],
+        'status': None,
+        'body': None,
+        'body_path': None,
+        'body_hash': None,
+        'size': 0,
+        'headers': {},
+        'error': None,
+        'attempts': 0,
+        'elapsed': 0.0,
+        'connections_new': 0,
+        'connections_reused': 0,
+    }
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    """Đếm kết nối mới / kết nối dùng lại từ pool vào result dict của từng request"""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_connection_create_end(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx['connections_new'] += 1
+
+    async def on_connection_reuseconn(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx['connections_reused'] += 1
+
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+
+def release_body(result: Dict):
+    """Xóa file tạm của body đã spool (gọi sau khi parse xong)"""
+    if result.get('body_path'):
+        try:
+            os.remove(result['body_path'])
+        except OSError:
+            pass
+        result['body_path'] = None
+
+
+async def _spool_body(response: aiohttp.ClientResponse, result: Dict):
+    """Ghi body ra file tạm theo chunk, tính sha1 và size trong lúc ghi"""
+    release_body(result)  # File của lần thử trước (nếu retry)
+    fd, path = tempfile.mkstemp(prefix='fetch_', suffix='.body')
+    result['body_path'] = path
+    digest = hashlib.sha1()
+    size = 0
+    with os.fdopen(fd, 'wb') as f:
+        async for chunk in response.content.iter_chunked(SPOOL_CHUNK_SIZE):
+            f.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+    result['body_hash'] = digest.hexdigest()
+    result['size'] = size
+
+
+def connection_stats(results: List[Dict]) -> Dict[str, Dict[str, int]]:
+    """
+    Gộp số kết nối mới / dùng lại theo host
+
+    Returns:
+        {host: {'requests': ..., 'new': ..., 'reused': ...}}
+    """
+    stats = defaultdict(lambda: {'requests': 0, 'new': 0, 'reused': 0})
+    for result in results:
+        host = urlparse(result['url']).netloc
+        stats[host]['requests'] += 1
+        stats[host]['new'] += result.get('connections_new', 0)
+        stats[host]['reused'] += result.get('connections_reused', 0)
+    return dict(stats)
+
+
+async def _fetch_one(session: aiohttp.ClientSession, request: Dict, timeout: aiohttp.ClientTimeout,
+                     retry_attempts: int) -> Dict:
+    """Fetch một URL với retry + exponential backoff, chỉ trả về bytes (không parse)"""
+    result = _empty_result(request)
+    headers = {**DEFAULT_HEADERS, **request['headers']}
+    start = time.monotonic()
+    if request.get('retry_attempts'):
+        retry_attempts = request['retry_attempts']
+
+    for attempt in range(retry_attempts):
+        result['attempts'] = attempt + 1
+        retryable = False
+        try:
+            async with session.get(request['url'], params=request['params'] or None,
+                                   headers=headers, timeout=timeout,
+                                   trace_request_ctx=result) as response:
+                result['status'] = response.status
+                result['headers'] = {k.lower(): v for k, v in response.headers.items()}
+                if response.status == 200:
+                    if request.get('spool'):
+                        await _spool_body(response, result)
+                    else:
+                        result['body'] = await response.read()
+                        result['size'] = len(result['body'])
+                    result['error'] = None
+                    break
+                if response.status == 304:
+                    # Conditional GET: nguồn không đổi, không có body
+                    result['error'] = None
+                    break
+                result['error'] = f"HTTP {response.status}"
+                retryable = response.status in RETRYABLE_STATUS
+        except asyncio.TimeoutError:
+            result['error'] = f"Timeout (connect {timeout.sock_connect}s / read {timeout.sock_read}s / total {timeout.total}s)"
+            retryable = True
+        except aiohttp.ClientError as e:
+            result['error'] = f"Error: {str(e)[:50]}"
+            retryable = True
+        except BaseException:
+            release_body(result)  # Bị cancel (overall deadline) / lỗi ghi file: không để lại file tạm
+            raise
+
+        if not retryable or attempt >= retry_attempts - 1:
+            break
+        logger.warning(f"{request['name']}: {result['error']}, retrying ({attempt + 1}/{retry_attempts})...")
+        await asyncio.sleep(2 ** attempt)  # Exponential backoff
+
+    result['elapsed'] = round(time.monotonic() - start, 3)
+    if result['error']:
+        release_body(result)  # Body spool dở của lần thử lỗi
+        logger.warning(f"{request['name']} failed after {result['attempts']} attempts: {result['error']}")
+    else:
+        logger.info(f"{request['name']}: HTTP {result['status']}, {result['size']} bytes in {result['elapsed']}s")
+    return result
+
+
+def open_session(max_connections: int, max_per_host: int) -> aiohttp.ClientSession:
+    """Session dùng chung cho một batch (gọi trong event loop)"""
+    # Pool keep-alive chung: các feed cùng host (vd. 2 feed WWR) dùng lại kết nối TCP/TLS
+    connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=max_per_host,
+                                     ttl_dns_cache=300, keepalive_timeout=30)
+    return aiohttp.ClientSession(connector=connector, trace_configs=[_trace_config()])
+
+
+def overall_timeout_result(request: Dict, overall_timeout: Optional[float],
+                           task: Optional[asyncio.Task] = None) -> Dict:
+    """Result cho request bị cancel vì hết overall deadline (hoặc task lỗi ngoài dự kiến)"""
+    result = _empty_result(request)
+    result['error'] = f"Timeout: overall deadline {overall_timeout}s"
+    if task is not None and task.done() and not task.cancelled() and task.exception() is not None:
+        result['error'] = f"Error: {str(task.exception())[:50]}"
+    return result
+
+
+async def _fetch_all(requests_list: List[Dict], connect_timeout: float, read_timeout: float,
+                     total_timeout: float, retry_attempts: int, max_connections: int,
+                     max_per_host: int, overall_timeout: Optional[float]) -> List[Dict]:
+    timeout = aiohttp.ClientTimeout(total=total_timeout, sock_connect=connect_timeout, sock_read=read_timeout)
+
+    async with open_session(max_connections, max_per_host) as session:
+        tasks = [
+            asyncio.create_task(_fetch_one(session, request, timeout, retry_attempts))
+            for request in requests_list
+        ]
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=overall_timeout)
+
+        # Hết overall deadline: cancel hẳn các request còn treo thay vì bỏ mặc
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for request, task in zip(requests_list, tasks):
+            if task in done and not task.cancelled() and task.exception() is None:
+                results.append(task.result())
+            else:
+                results.append(overall_timeout_result(request, overall_timeout, task))
+        return results
+
+
+def fetch_all(requests_list: List[Dict], connect_timeout: float = 5, read_timeout: float = 10,
+              total_timeout: float = 15, retry_attempts: int = 1, max_connections: int = 20,
+              max_per_host: int = 4, overall_timeout: Optional[float] = None) -> List[Dict]:
+    """
+    Tải tất cả requests song song trong một event loop
+
+    Args:
+        requests_list: Danh sách request dict (từ build_request)
+        connect_timeout: Deadline kết nối TCP/TLS mỗi request (giây)
+        read_timeout: Deadline giữa hai lần nhận dữ liệu (giây)
+        total_timeout: Deadline tổng cho một lần thử (giây)
+        retry_attempts: Số lần thử tối đa cho lỗi tạm thời (request có 'retry_attempts' riêng thì dùng số đó)
+        max_connections: Số kết nối đồng thời tối đa
+        max_per_host: Số kết nối đồng thời tối đa tới cùng một host
+        overall_timeout: Deadline cho cả batch, request còn treo sẽ bị cancel
+
+    Returns:
+        List result dict theo đúng thứ tự requests_list
+        (name, url, kind, status, body, body_path, body_hash, size, headers, error, attempts,
+        elapsed, connections_new, connections_reused); request spool=True thì body là None,
+        nội dung nằm ở file tạm body_path (xóa bằng release_body sau khi parse)
+    """
+    return asyncio.run(_fetch_all(requests_list, connect_timeout, read_timeout, total_timeout,
+                                  retry_attempts, max_connections, max_per_host, overall_timeout))
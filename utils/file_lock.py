@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+File Lock - Advisory lock giữa các process cùng ghi vào data/ (crawler, sync, Streamlit)
+Dùng fcntl.flock (Linux/macOS); nền tảng không có fcntl thì lock là no-op - chỉ còn
+manifest commit bảo vệ reader, hai writer chạy cùng lúc không được tuần tự hóa.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from utils.logger import setup_logger
+
+logger = setup_logger('file_lock')
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+# Chờ lâu hơn mức này thì log cảnh báo (writer khác đang giữ lock)
+SLOW_WAIT_SECONDS = 5
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False) -> Iterator[None]:
+    """
+    Giữ advisory lock trên file path (tạo nếu chưa có) trong khối with
+
+    Args:
+        path: File lock riêng (không phải file dữ liệu - file bị os.replace thì lock mất tác dụng)
+        shared: Lock chia sẻ (nhiều reader) thay vì độc quyền (writer)
+    """
+    if not HAS_FCNTL:
+        yield
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+b') as f:
+        start = time.monotonic()
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        waited = time.monotonic() - start
+        if waited > SLOW_WAIT_SECONDS:
+            logger.warning(f"Waited {waited:.1f}s for lock {path.name}")
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def fsync_dir(path: Path):
+    """fsync thư mục để os.replace / file mới trong đó bền sau crash (bỏ qua nếu OS không hỗ trợ)"""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Source Health Registry - Tỷ lệ thành công, latency p50/p95, lỗi gần nhất của từng nguồn
+Kèm circuit breaker: nguồn lỗi liên tiếp bị tạm ngưng (open) trong thời gian cool-down,
+hết cool-down thì thử lại một lần (half-open) trước khi dùng lại bình thường.
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import setup_logger
+from utils.state import load_state, save_state
+
+logger = setup_logger('health')
+
+STATE_NAME = 'health'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    """Percentile theo nearest-rank, None nếu không có dữ liệu"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+class HealthRegistry:
+    """
+    Health + circuit breaker theo nguồn, persist vào data/state/health.json
+
+    closed    -> tải bình thường; lỗi liên tiếp >= failure_threshold thì chuyển open
+    open      -> bỏ qua nguồn tới open_until
+    half_open -> hết cool-down, tải thử một lần (không retry): thành công thì closed,
+                 lỗi thì open lại với cool-down gấp đôi (tối đa max_cooldown)
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown_minutes: float = 60,
+                 max_cooldown_minutes: float = 1440, history_size: int = 50):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown_minutes * 60
+        self.max_cooldown = max_cooldown_minutes * 60
+        self.history_size = history_size
+        self.entries: Dict[str, Dict] = load_state(STATE_NAME, {}) or {}
+        self.now = time.time()
+
+    def _entry(self, name: str) -> Dict:
+        return self.entries.setdefault(name, {
+            'state': CLOSED,
+            'consecutive_failures': 0,
+            'history': [],
+            'last_error': None,
+            'last_error_at': None,
+        })
+
+    def state(self, name: str) -> str:
+        """Trạng thái circuit ở thời điểm run này (open hết cool-down tính là half_open)"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return CLOSED
+        if entry['state'] == OPEN and entry.get('open_until', 0) <= self.now:
+            return HALF_OPEN
+        return entry['state']
+
+    def select(self, source_configs: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Tách nguồn được tải và nguồn đang bị circuit breaker chặn
+
+        Returns:
+            (allowed, blocked)
+        """
+        allowed, blocked = [], []
+        for source in source_configs:
+            (blocked if self.state(source['name']) == OPEN else allowed).append(source)
+        return allowed, blocked
+
+    def is_probe(self, name: str) -> bool:
+        """Lần tải này là half-open probe (chỉ thử một lần, không retry)"""
+        return self.state(name) == HALF_OPEN
+
+    def record(self, name: str, ok: bool, latency: Optional[float], error: Optional[str] = None):
+        """Ghi kết quả một lần tải (fetch + parse) và cập nhật circuit"""
+        entry = self._entry(name)
+        probing = self.state(name) == HALF_OPEN
+        entry['history'].append({'at': round(self.now), 'ok': ok, 'latency': latency})
+        entry['history'] = entry['history'][-self.history_size:]
+
+        if ok:
+            if entry['state'] != CLOSED:
+                logger.info(f"Circuit closed for {name} (probe succeeded)")
+            entry.update(state=CLOSED, consecutive_failures=0, cooldown=None, open_until=None)
+            return
+
+        entry['consecutive_failures'] += 1
+        entry['last_error'] = error
+        entry['last_error_at'] = datetime.fromtimestamp(self.now).isoformat(timespec='seconds')
+        if probing:
+            # Probe lỗi: mở lại, cool-down gấp đôi lần trước
+            cooldown = min(self.max_cooldown, (entry.get('cooldown') or self.cooldown) * 2)
+        elif entry['consecutive_failures'] >= self.failure_threshold:
+            cooldown = self.cooldown
+        else:
+            return
+        entry.update(state=OPEN, cooldown=round(cooldown), open_until=round(self.now + cooldown))
+        logger.warning(f"Circuit open for {name} after {entry['consecutive_failures']} consecutive failures "
+                       f"(cool-down {cooldown / 60:.0f}m): {error}")
+
+    def stats(self, name: str) -> Dict:
+        """success_rate, p50, p95 (giây) trên history, kèm lỗi gần nhất"""
+        entry = self.entries.get(name, {})
+        history = entry.get('history', [])
+        latencies = [h['latency'] for h in history if h['ok'] and h['latency'] is not None]
+        return {
+            'requests': len(history),
+            'success_rate': sum(h['ok'] for h in history) / len(history) if history else None,
+            'p50': _percentile(latencies, 50),
+            'p95': _percentile(latencies, 95),
+            'last_error': entry.get('last_error'),
+            'state': self.state(name),
+            'open_until': entry.get('open_until'),
+        }
+
+    def table(self, source_configs: List[Dict]) -> List[str]:
+        """Các dòng bảng health: nguồn, circuit, tỷ lệ thành công, p50/p95, lỗi gần nhất"""
+        lines = [f"   {'source':<32} {'circuit':>10} {'ok%':>5} {'p50':>6} {'p95':>6}  last error"]
+        for source in source_configs:
+            stats = self.stats(source['name'])
+            circuit = stats['state']
+            if circuit == OPEN:
+                circuit = f"open→{datetime.fromtimestamp(stats['open_until']).strftime('%H:%M')}"
+            rate, p50, p95 = stats['success_rate'], stats['p50'], stats['p95']
+            lines.append(
+                f"   {source['name'][:32]:<32} {circuit:>10} "
+                f"{(f'{rate * 100:.0f}' if rate is not None else '-'):>5} "
+                f"{(f'{p50:.2f}s' if p50 is not None else '-'):>6} "
+                f"{(f'{p95:.2f}s' if p95 is not None else '-'):>6}  "
+                f"{(stats['last_error'] or '')[:40]}"
+            )
+        return lines
+
+    def save(self):
+        save_state(STATE_NAME, self.entries)
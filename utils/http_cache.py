@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+HTTP Validator Cache - Lưu ETag / Last-Modified / body hash cho từng nguồn
+Run sau gửi If-None-Match / If-Modified-Since, nguồn không đổi thì bỏ qua parse
+Validators của response mới chỉ được ghi nhận (commit) sau khi nguồn đó parse thành công -
+parse lỗi thì run sau vẫn tải + parse lại thay vì coi nội dung chưa ingest là "không đổi".
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Dict
+
+from utils.state import load_state, save_state
+
+STATE_NAME = 'http_cache'
+
+def body_hash(body: bytes) -> str:
+    """Hash nội dung response để phát hiện feed không đổi dù server không hỗ trợ 304"""
+    return hashlib.sha1(body).hexdigest()
+
+class HttpCache:
+    """Cache validators theo tên nguồn, persist vào data/state/http_cache.json"""
+    
+    def __init__(self):
+        self.entries = load_state(STATE_NAME, {}) or {}
+        # Validators của response 200 đang chờ parse xong (commit) mới vào entries
+        self.pending: Dict[str, Dict] = {}
+        self.hits = 0
+        self.bytes_saved = 0
+    
+    def conditional_headers(self, name: str, url: str) -> Dict[str, str]:
+        """Headers conditional GET cho nguồn (rỗng nếu chưa có cache hoặc URL đã đổi)"""
+        entry = self.entries.get(name, {})
+        if entry.get('url') != url:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def apply(self, result: Dict) -> Dict:
+        """
+        Đánh dấu result['not_modified'] và giữ validators mới chờ commit()
+        
+        Nguồn được coi là không đổi khi server trả 304 hoặc body hash trùng lần trước.
+        
+        Args:
+            result: Fetch result dict (từ utils.fetcher)
+            
+        Returns:
+            Chính result đó (đã có key not_modified)
+        """
+        name = result['name']
+        entry = self.entries.get(name, {})
+        if entry.get('url') != result['url']:
+            entry = {}
+        result['not_modified'] = False
+        
+        if result['status'] == 304:
+            result['not_modified'] = True
+            result['error'] = None
+            self.hits += 1
+            self.bytes_saved += entry.get('size', 0)
+            return result
+        
+        if result['error'] or (result['body'] is None and not result.get('body_path')):
+            return result
+        
+        # Body spool ra file: fetcher đã tính hash trong lúc ghi
+        digest = result.get('body_hash') or body_hash(result['body'])
+        if digest == entry.get('body_hash'):
+            result['not_modified'] = True
+            self.hits += 1
+        
+        self.pending[name] = {
+            'url': result['url'],
+            'etag': result['headers'].get('etag'),
+            'last_modified': result['headers'].get('last-modified'),
+            'body_hash': digest,
+            'size': result.get('size') or len(result['body']),
+            'updated_at': datetime.utcnow().isoformat()
+        }
+        if result['not_modified']:
+            self.commit(name)  # Nội dung y hệt lần đã ingest, ghi nhận validators mới luôn
+        return result
+    
+    def commit(self, name: str):
+        """Ghi nhận validators của nguồn name sau khi nội dung đã parse + thu thập thành công"""
+        if name in self.pending:
+            self.entries[name] = self.pending.pop(name)
+    
+    def save(self):
+        """Persist cache (gọi sau khi jobs đã được lưu để không mất jobs nếu crash)"""
+        save_state(STATE_NAME, self.entries)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Job Columns - Snapshot dạng cột (NumPy) của toàn bộ jobs cho thống kê nhanh
+Field số là mảng (created_ts, crawled_ts, budget_min/max, proposals); field chuỗi ít giá trị
+(source, category, client_country, budget_type, currency) là mã int32 + bảng chuỗi.
+Snapshot (data/jobs/columns.npz) bám theo luồng byte của JobStore giống JobIndex: refresh chỉ
+đọc phần mới append, store bị ghi lại (fingerprint khác) thì dựng lại từ đầu.
+"""
+
+import json
+import os
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.job_fields import job_budget, job_crawled_ts, job_created_ts
+from utils.job_store import JobStore
+from utils.logger import setup_logger
+
+logger = setup_logger('job_columns')
+
+SNAPSHOT_VERSION = 1
+NUMERIC_COLUMNS = {
+    'created_ts': np.int64,
+    'crawled_ts': np.int64,
+    'budget_min': np.float64,
+    'budget_max': np.float64,
+    'proposals': np.int32,
+}
+# Field mã hóa -> nhãn khi job không có (giống mặc định của summarizer / analyser)
+CODED_COLUMNS = {
+    'source': 'Unknown',
+    'category': 'General',
+    'client_country': 'Unknown',
+    'budget_type': '',
+    'currency': '',
+}
+# Giá trị thay cho None: timestamp 0 (không lọt vào cửa sổ thời gian nào), budget NaN
+MISSING_TS = 0
+MISSING_PROPOSALS = -1
+
+DAY = 86400
+
+
+class JobColumns:
+    """
+    Snapshot cột của JobStore
+
+    Usage:
+        snapshot = JobColumns()
+        snapshot.refresh()
+        week = snapshot.mask(since_ts=time.time() - 7 * 86400)
+        snapshot.top('category', week, 5)
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, path: Optional[Path] = None):
+        self.store = store or JobStore()
+        self.path = Path(path) if path else self.store.base_dir / 'columns.npz'
+        self._reset()
+
+    def _reset(self):
+        self.columns: Dict[str, np.ndarray] = {name: np.empty(0, dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        self.columns.update({name: np.empty(0, np.int32) for name in CODED_COLUMNS})
+        self.labels: Dict[str, List[str]] = {name: [] for name in CODED_COLUMNS}
+        self.covered_size = 0
+        self._fingerprint = ''
+
+    def __len__(self) -> int:
+        return len(self.columns['crawled_ts'])
+
+    # ---------- đọc / ghi snapshot ----------
+
+    def load(self) -> bool:
+        """Đọc snapshot trên đĩa, return False nếu thiếu / hỏng / khác version"""
+        self._reset()
+        if not self.path.exists():
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                if meta.get('version') != SNAPSHOT_VERSION:
+                    return False
+                columns = {name: data[name] for name in self.columns}
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logger.warning(f"Cannot read {self.path.name}: {e}")
+            return False
+        self.columns = columns
+        self.labels = meta['labels']
+        self.covered_size = meta['covered_size']
+        self._fingerprint = meta['fingerprint']
+        return True
+
+    def _save(self):
+        """Ghi snapshot ra file tạm rồi os.replace (reader không bao giờ thấy file ghi dở)"""
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'covered_size': self.covered_size,
+            'fingerprint': self._fingerprint,
+            'labels': self.labels,
+            'built_at': datetime.utcnow().isoformat(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta, ensure_ascii=False)), **self.columns)
+        os.replace(tmp_path, self.path)
+
+    def _encode(self, jobs: Iterable[Dict]) -> Dict[str, np.ndarray]:
+        """Jobs thành cột; nhãn chưa có được thêm vào cuối bảng chuỗi (mã cũ giữ nguyên)"""
+        codes = {name: {label: i for i, label in enumerate(labels)} for name, labels in self.labels.items()}
+        values = {name: [] for name in self.columns}
+        for job in jobs:
+            budget_min, budget_max, budget_type = job_budget(job)
+            values['created_ts'].append(job_created_ts(job) or MISSING_TS)
+            values['crawled_ts'].append(job_crawled_ts(job) or MISSING_TS)
+            values['budget_min'].append(np.nan if budget_min is None else budget_min)
+            values['budget_max'].append(np.nan if budget_max is None else budget_max)
+            proposals = job.get('proposals')
+            values['proposals'].append(proposals if isinstance(proposals, int) else MISSING_PROPOSALS)
+            # Job cũ chỉ có chuỗi budget: job_budget parse như '$...', nên currency là USD
+            currency = job.get('currency') or ('USD' if budget_min is not None else None)
+            row = {**job, 'budget_type': budget_type, 'currency': currency}
+            for name, default in CODED_COLUMNS.items():
+                label = str(row.get(name) or default)
+                code = codes[name].get(label)
+                if code is None:
+                    code = codes[name][label] = len(self.labels[name])
+                    self.labels[name].append(label)
+                values[name].append(code)
+        return {name: np.array(column, dtype=self.columns[name].dtype) for name, column in values.items()}
+
+    def refresh(self) -> int:
+        """
+        Đồng bộ snapshot với JobStore: chỉ đọc jobs mới append kể từ lần trước
+
+        Returns:
+            Số jobs mới thêm vào snapshot
+        """
+        loaded = self.load()
+        self.store.reload()
+        size = self.store.complete_size()
+        if loaded and (size < self.covered_size
+                       or self.store.fingerprint(self.covered_size).hex() != self._fingerprint):
+            logger.warning(f"{self.store.name} was rewritten, rebuilding column snapshot")
+            self._reset()
+        elif loaded and size == self.covered_size:
+            return 0
+
+        new_jobs = (job for job, offset in self.store.iter_records(self.covered_size) if offset <= size)
+        new_columns = self._encode(new_jobs)
+        added = len(new_columns['crawled_ts'])
+        self.columns = {name: np.concatenate([self.columns[name], new_columns[name]]) for name in self.columns}
+        self.covered_size = size
+        self._fingerprint = self.store.fingerprint(size).hex()
+        self._save()
+        logger.info(f"Column snapshot caught up: +{added} jobs ({len(self)} total)")
+        return added
+
+    # ---------- thống kê ----------
+
+    def mask(self, since_ts: Optional[float] = None, until_ts: Optional[float] = None,
+             by: str = 'created_ts') -> np.ndarray:
+        """Mảng bool chọn jobs có by (created_ts / crawled_ts) trong [since_ts, until_ts)"""
+        values = self.columns[by]
+        selected = values != MISSING_TS
+        if since_ts is not None:
+            selected &= values >= since_ts
+        if until_ts is not None:
+            selected &= values < until_ts
+        return selected
+
+    def counts(self, name: str, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Số jobs theo từng mã của field name (index = mã trong labels[name])"""
+        codes = self.columns[name] if mask is None else self.columns[name][mask]
+        return np.bincount(codes, minlength=len(self.labels[name]))
+
+    def top(self, name: str, mask: Optional[np.ndarray] = None, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """[(nhãn, số jobs)] giảm dần, như Counter.most_common(n)"""
+        counts = self.counts(name, mask)
+        order = np.argsort(-counts, kind='stable')[:n]
+        return [(self.labels[name][i], int(counts[i])) for i in order if counts[i]]
+
+    def compare(self, name: str, current: np.ndarray, previous: np.ndarray,
+                n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """[(nhãn, số jobs kỳ này, số jobs kỳ trước)] theo thứ tự kỳ này giảm dần"""
+        now, before = self.counts(name, current), self.counts(name, previous)
+        order = np.argsort(-now, kind='stable')[:n]
+        return [(self.labels[name][i], int(now[i]), int(before[i])) for i in order if now[i]]
+
+    def per_day(self, mask: Optional[np.ndarray] = None, by: str = 'created_ts') -> List[Tuple[str, int]]:
+        """[(YYYY-MM-DD, số jobs)] theo ngày UTC"""
+        values = self.columns[by] if mask is None else self.columns[by][mask]
+        days, counts = np.unique(values[values != MISSING_TS] // DAY, return_counts=True)
+        return [(datetime.utcfromtimestamp(int(day) * DAY).strftime('%Y-%m-%d'), int(count))
+                for day, count in zip(days, counts)]
+
+    def budget_summary(self, mask: Optional[np.ndarray] = None, currency: str = 'USD') -> Dict[str, Dict]:
+        """
+        Phân bố budget (điểm giữa min-max) theo budget_type, chỉ jobs có budget bằng currency
+
+        Returns:
+            {'fixed': {'count', 'p25', 'median', 'p75'}, 'hourly': {...}, ...}
+        """
+        if currency not in self.labels['currency']:
+            return {}
+        selected = ~np.isnan(self.columns['budget_min'])
+        selected &= self.columns['currency'] == self.labels['currency'].index(currency)
+        if mask is not None:
+            selected &= mask
+        middle = (self.columns['budget_min'][selected] + self.columns['budget_max'][selected]) / 2
+        types = self.columns['budget_type'][selected]
+        summary = {}
+        for code, label in enumerate(self.labels['budget_type']):
+            values = middle[types == code]
+            if not label or not len(values):
+                continue
+            p25, median, p75 = np.percentile(values, [25, 50, 75])
+            summary[label] = {'count': int(len(values)), 'p25': float(p25), 'median': float(median), 'p75': float(p75)}
+        return summary
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Job Fields - Budget và thời gian dạng số, tính một lần lúc ingest
+Crawler ghi budget_min/budget_max/currency/budget_type và created_ts/crawled_ts (epoch giây UTC)
+vào job; nơi dùng (score, win rate, summary, metadata Chroma) đọc thẳng các field này,
+job cũ chưa có thì mới parse lại từ budget / created_at.
+"""
+
+import calendar
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from utils.job_store import parse_timestamp
+
+_CURRENCIES = {'$': 'USD', 'us$': 'USD', 'usd': 'USD', '€': 'EUR', 'eur': 'EUR', '£': 'GBP', 'gbp': 'GBP'}
+_SYMBOLS = {'USD': '$', 'EUR': '€', 'GBP': '£'}
+_UNITS = {'hour': 'hourly', 'hr': 'hourly', 'h': 'hourly', 'month': 'monthly', 'mo': 'monthly',
+          'year': 'yearly', 'yr': 'yearly', 'annum': 'yearly'}
+_SUFFIXES = {'hourly': '/hr', 'monthly': '/mo', 'yearly': '/yr'}
+
+_CURRENCY = r'(?:US\$|\$|€|£|\b(?:USD|EUR|GBP)\s?)'
+_AMOUNT = r'(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?\s?([kK]\b)?'
+# "$500", "$1,000 - $5,000", "$25-$50/hr", "USD 30 per hour", "€60k–80k a year"
+_BUDGET_RE = re.compile(
+    rf'({_CURRENCY}){_AMOUNT}(?:\s*(?:-|–|—|to)\s*{_CURRENCY}?{_AMOUNT})?'
+    r'(?:\s*(?:/\s*|per\s+|an?\s+)(hour|hr|h|month|mo|year|yr|annum)\b)?',
+    re.IGNORECASE
+)
+# Nhãn đứng trước số tiền (vd. Upwork RSS: "Hourly Range: $15.00-$35.00")
+_HOURLY_LABEL_RE = re.compile(r'hourly|per hour', re.IGNORECASE)
+_SALARY_LABEL_RE = re.compile(r'salary|annual|per year', re.IGNORECASE)
+
+EMPTY_BUDGET = {'budget_min': None, 'budget_max': None, 'currency': None, 'budget_type': None}
+
+
+def _amount(digits: str, cents: Optional[str], thousands: Optional[str]) -> float:
+    value = float(digits.replace(',', '') + (cents or ''))
+    return value * 1000 if thousands else value
+
+
+def parse_budget_fields(text: str) -> Dict:
+    """
+    Budget đầu tiên trong text thành field số
+
+    Returns:
+        budget_min, budget_max (float), currency ('USD'/'EUR'/'GBP'),
+        budget_type ('fixed'/'hourly'/'monthly'/'yearly'); tất cả None nếu không có
+    """
+    match = _BUDGET_RE.search(text or '')
+    if not match:
+        return dict(EMPTY_BUDGET)
+    symbol, digits, cents, thousands, digits2, cents2, thousands2, unit = match.groups()
+    low = _amount(digits, cents, thousands)
+    high = _amount(digits2, cents2, thousands2 or thousands) if digits2 else low
+    if high < low:
+        high = low  # "$500 - 2 developers": không phải khoảng giá
+
+    context = text[max(0, match.start() - 40):match.start()]
+    if unit:
+        budget_type = _UNITS[unit.lower()]
+    elif _HOURLY_LABEL_RE.search(context):
+        budget_type = 'hourly'
+    elif _SALARY_LABEL_RE.search(context):
+        # "k" một mình không đủ: "$5k project", "Budget: $2.5k" là fixed
+        budget_type = 'yearly'
+    else:
+        budget_type = 'fixed'
+    return {
+        'budget_min': low,
+        'budget_max': high,
+        'currency': _CURRENCIES[symbol.strip().lower()],
+        'budget_type': budget_type,
+    }
+
+
+def format_budget(fields: Dict) -> Optional[str]:
+    """Chuỗi hiển thị từ field số (vd. '$500', '$25-$50/hr'), None nếu không có budget"""
+    if fields.get('budget_min') is None:
+        return None
+    symbol = _SYMBOLS.get(fields.get('currency'), '$')
+
+    def amount(value):
+        return f"{symbol}{value:,.0f}" if float(value).is_integer() else f"{symbol}{value:,.2f}"
+
+    text = amount(fields['budget_min'])
+    if fields.get('budget_max') is not None and fields['budget_max'] != fields['budget_min']:
+        text += f"-{amount(fields['budget_max'])}"
+    return text + _SUFFIXES.get(fields.get('budget_type'), '')
+
+
+def to_epoch(value) -> Optional[int]:
+    """
+    Epoch giây UTC từ số, struct_time (feedparser *_parsed), datetime, chuỗi ISO hoặc RFC-822
+
+    Returns:
+        None nếu không parse được
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, time.struct_time):
+        return calendar.timegm(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return int(value.timestamp())
+        return int(value.replace(tzinfo=timezone.utc).timestamp())
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    parsed = parse_timestamp(value)
+    if parsed is None:
+        return None
+    return int(parsed.replace(tzinfo=timezone.utc).timestamp())
+
+
+def job_budget(job: Dict) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """(budget_min, budget_max, budget_type) của job; job cũ chỉ có chuỗi budget thì parse lại"""
+    if 'budget_min' in job:
+        return job.get('budget_min'), job.get('budget_max'), job.get('budget_type')
+    budget = str(job.get('budget') or '').strip()
+    if not budget:
+        return None, None, None
+    fields = parse_budget_fields(budget if _BUDGET_RE.search(budget) else f"${budget}")
+    return fields['budget_min'], fields['budget_max'], fields['budget_type']
+
+
+def job_created_ts(job: Dict) -> Optional[int]:
+    """Thời điểm đăng job (epoch giây UTC), job cũ thì parse created_at"""
+    if job.get('created_ts') is not None:
+        return job['created_ts']
+    return to_epoch(job.get('created_at'))
+
+
+def job_crawled_ts(job: Dict) -> Optional[int]:
+    """Thời điểm crawl job (epoch giây UTC), job cũ thì parse crawled_at"""
+    if job.get('crawled_ts') is not None:
+        return job['crawled_ts']
+    return to_epoch(job.get('crawled_at'))
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Job ID Index - File nhị phân chứa job_id (12 ký tự) đã sort, nằm cạnh dữ liệu jobs
+Tra cứu bằng binary search trên mmap, không cần đọc lại toàn bộ JSONL mỗi lần crawl
+
+Nguồn dữ liệu là một file JSONL (JsonlSource) hoặc JobStore (nhiều segment nối tiếp),
+offset được tính trên luồng byte nối tiếp của nguồn, chỉ được phép append.
+"""
+
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from utils.bloom import ScalableBloomFilter
+from utils.logger import setup_logger
+
+logger = setup_logger('job_index')
+
+MAGIC = b'JOBIDX01'
+# magic, số byte JSONL đã index, số ID, fingerprint của đoạn cuối phần đã index
+HEADER = struct.Struct('<8sQQ8s')
+ID_SIZE = 12
+# Số byte cuối phần đã index dùng để phát hiện JSONL bị ghi lại (git rebase, ...)
+FINGERPRINT_WINDOW = 4096
+
+CONFLICT_MARKERS = ('<<<<<<<', '=======', '>>>>>>>')
+
+
+def encode_id(job_id: str) -> bytes:
+    """Chuẩn hóa job_id thành record 12 byte"""
+    return job_id.encode('ascii', 'replace')[:ID_SIZE].ljust(ID_SIZE, b' ')
+
+
+def fingerprint_bytes(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+EMPTY_FINGERPRINT = b'\0' * 8
+
+
+def open_jsonl(path: Path) -> BinaryIO:
+    """
+    Mở JSONL để đọc (binary); file .gz (segment đã đóng) được giải nén trong lúc đọc
+
+    Offset / seek luôn tính trên byte chưa nén, nên index không đổi khi segment được nén.
+    """
+    if Path(path).suffix == '.gz':
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_jsonl_ids(jsonl_path: Path, offset: int = 0, end: Optional[int] = None) -> Iterator[Tuple[str, int]]:
+    """
+    Đọc job_id từ JSONL (hoặc JSONL .gz) trong khoảng [offset, end)
+
+    Yields:
+        (job_id, offset sau dòng đó) - chỉ dòng hoàn chỉnh (có newline)
+    """
+    with open_jsonl(jsonl_path) as f:
+        f.seek(offset)
+        for raw_line in f:
+            if not raw_line.endswith(b'\n') or (end is not None and offset + len(raw_line) > end):
+                break  # Dòng đang ghi dở, để lần sau
+            offset += len(raw_line)
+            line = raw_line.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            # Skip git conflict markers
+            if line.startswith(CONFLICT_MARKERS):
+                logger.warning(f"Skipping git conflict marker in {jsonl_path.name} (byte {offset})")
+                continue
+            try:
+                job_id = json.loads(line).get('job_id', '')
+            except json.JSONDecodeError as e:
+                logger.warning(f"Invalid JSON in {jsonl_path.name} (byte {offset}): {e}")
+                continue
+            if job_id:
+                yield job_id, offset
+
+
+def complete_size(jsonl_path: Path) -> int:
+    """Kích thước JSONL tính tới newline cuối cùng (bỏ dòng đang ghi dở)"""
+    size = os.path.getsize(jsonl_path)
+    if size == 0:
+        return 0
+    with open(jsonl_path, 'rb') as f:
+        f.seek(max(0, size - 65536))
+        tail = f.read()
+    cut = tail.rfind(b'\n')
+    if cut == -1:
+        return max(0, size - len(tail))
+    return size - len(tail) + cut + 1
+
+
+class JsonlSource:
+    """Nguồn index là một file JSONL append-only (vd. raw_jobs.jsonl)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.name = self.path.name
+        self.default_index_path = self.path.with_suffix('.idx')
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def complete_size(self) -> int:
+        return complete_size(self.path) if self.path.exists() else 0
+
+    def iter_ids(self, offset: int = 0) -> Iterator[Tuple[str, int]]:
+        if not self.path.exists():
+            return iter(())
+        return iter_jsonl_ids(self.path, offset)
+
+    def fingerprint(self, size: int) -> bytes:
+        """Hash FINGERPRINT_WINDOW byte cuối của phần [0, size)"""
+        if size == 0 or not self.path.exists():
+            return EMPTY_FINGERPRINT
+        with open(self.path, 'rb') as f:
+            f.seek(max(0, size - FINGERPRINT_WINDOW))
+            data = f.read(min(size, FINGERPRINT_WINDOW))
+        return fingerprint_bytes(data)
+
+
+class JobIndex:
+    """
+    Index job_id dạng set (hỗ trợ `in` và `add`), persist thành file sorted 12 byte/ID
+
+    ID thêm trong run hiện tại nằm trong bộ nhớ; update() đọc phần JSONL mới được append
+    và merge vào file index. Nếu bật bloom filter (file .bloom cạnh index), ID chắc chắn
+    chưa có sẽ không phải binary search trên index.
+    """
+
+    def __init__(self, source, index_path: Optional[Path] = None,
+                 bloom_capacity: Optional[int] = None, bloom_error_rate: float = 0.001):
+        # source: Path tới JSONL hoặc object cùng interface với JsonlSource (vd. JobStore)
+        self.source = JsonlSource(source) if isinstance(source, (str, Path)) else source
+        self.index_path = Path(index_path) if index_path else Path(self.source.default_index_path)
+        self.bloom = None
+        if bloom_capacity:
+            self.bloom = ScalableBloomFilter(self.index_path.with_suffix('.bloom'),
+                                             capacity=bloom_capacity, error_rate=bloom_error_rate)
+        self.covered_size = 0
+        self.count = 0
+        self.pending: Set[str] = set()
+        self._fingerprint = b''
+        self._file = None
+        self._mm = None
+
+    # ---------- đọc ----------
+
+    def _close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open_index(self) -> bool:
+        """Mở file index hiện có, return False nếu thiếu/hỏng"""
+        self._close()
+        self.covered_size = 0
+        self.count = 0
+        if not self.index_path.exists():
+            return False
+        self._file = open(self.index_path, 'rb')
+        header = self._file.read(HEADER.size)
+        if len(header) != HEADER.size:
+            self._close()
+            return False
+        magic, covered_size, count, fp = HEADER.unpack(header)
+        expected_size = HEADER.size + count * ID_SIZE
+        if magic != MAGIC or os.path.getsize(self.index_path) != expected_size:
+            self._close()
+            return False
+        self.covered_size = covered_size
+        self.count = count
+        self._fingerprint = fp
+        if count:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    def _record(self, i: int) -> bytes:
+        start = HEADER.size + i * ID_SIZE
+        return self._mm[start:start + ID_SIZE]
+
+    def _bisect(self, key: bytes) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _contains_on_disk(self, job_id: str) -> bool:
+        if not self.count:
+            return False
+        key = encode_id(job_id)
+        if self.bloom is not None and key not in self.bloom:
+            return False  # Chắc chắn chưa có
+        pos = self._bisect(key)
+        return pos < self.count and self._record(pos) == key
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self.pending or self._contains_on_disk(job_id)
+
+    def __len__(self) -> int:
+        return self.count + len(self.pending)
+
+    def add(self, job_id: str):
+        """Đánh dấu job_id đã thấy trong run hiện tại (chưa ghi ra file)"""
+        self.pending.add(job_id)
+
+    def iter_ids(self) -> Iterator[bytes]:
+        """Duyệt các record đã sort trên đĩa"""
+        for i in range(self.count):
+            yield self._record(i)
+
+    # ---------- ghi ----------
+
+    def _write(self, new_keys: Iterable[bytes], covered_size: int, rebuild: bool = False):
+        """Merge new_keys (bất kỳ thứ tự) vào file index, ghi atomic"""
+        new_sorted = sorted(set(new_keys))
+        tmp_path = self.index_path.with_suffix(self.index_path.suffix + '.tmp')
+        count = 0
+        with open(tmp_path, 'wb') as out:
+            out.write(b'\0' * HEADER.size)
+            prev = 0
+            for key in new_sorted:
+                if not rebuild and self.count:
+                    pos = self._bisect(key)
+                    if pos < self.count and self._record(pos) == key:
+                        continue  # Đã có
+                    # Copy nguyên khối record nằm trước key mới
+                    block = self._mm[HEADER.size + prev * ID_SIZE:HEADER.size + pos * ID_SIZE]
+                    out.write(block)
+                    count += pos - prev
+                    prev = pos
+                out.write(key)
+                count += 1
+            if not rebuild and self.count and prev < self.count:
+                out.write(self._mm[HEADER.size + prev * ID_SIZE:])
+                count += self.count - prev
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, covered_size, count, self.source.fingerprint(covered_size)))
+        old_covered_size = self.covered_size
+        self._close()
+        os.replace(tmp_path, self.index_path)
+        self._open_index()
+
+        if self.bloom is not None:
+            if rebuild or not self.bloom.open() or self.bloom.synced_size != old_covered_size:
+                self._rebuild_bloom()
+            else:
+                self.bloom.add_many(new_sorted, self.covered_size)
+
+    def _rebuild_bloom(self):
+        """Dựng lại bloom filter từ các record trong index"""
+        self.bloom.create()
+        self.bloom.add_many(self.iter_ids(), self.covered_size)
+        logger.info(f"Rebuilt bloom filter {self.bloom.path.name}: {len(self.bloom)} keys, "
+                    f"{self.bloom.size_bytes() // 1024} KB")
+
+    def _ensure_bloom(self):
+        """Mở bloom filter, dựng lại nếu thiếu hoặc lệch với index (vd. crash giữa chừng)"""
+        if self.bloom is None:
+            return
+        if not self.bloom.open() or self.bloom.synced_size != self.covered_size:
+            self._rebuild_bloom()
+
+    def rebuild(self) -> int:
+        """Dựng lại index từ đầu bằng cách đọc toàn bộ nguồn, return số ID"""
+        self._close()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        keys = set()
+        for job_id, _ in self.source.iter_ids(0):
+            keys.add(encode_id(job_id))
+        # Dòng trống / lỗi ở cuối vẫn tính là đã đọc
+        covered_size = self.source.complete_size()
+        self.count = 0
+        self._write(keys, covered_size, rebuild=True)
+        logger.info(f"Rebuilt job index {self.index_path.name}: {self.count} IDs")
+        return self.count
+
+    def update(self) -> int:
+        """
+        Đồng bộ index với nguồn: chỉ đọc phần mới được append (O(jobs mới))
+
+        Tự rebuild nếu chưa có index hoặc nguồn bị ghi lại (nhỏ đi / fingerprint khác).
+
+        Returns:
+            Số ID mới được thêm vào index
+        """
+        if not self._open_index():
+            return self.rebuild()
+        self._ensure_bloom()
+        if not self.source.exists():
+            if self.count:
+                logger.warning(f"{self.source.name} missing, resetting job index")
+                return self.rebuild()
+            return 0
+
+        size = self.source.complete_size()
+        if size < self.covered_size or self.source.fingerprint(self.covered_size) != self._fingerprint:
+            logger.warning(f"{self.source.name} was rewritten, rebuilding job index")
+            return self.rebuild()
+        if size == self.covered_size:
+            return 0
+
+        new_keys = []
+        for job_id, offset in self.source.iter_ids(self.covered_size):
+            if offset > size:
+                break
+            new_keys.append(encode_id(job_id))
+        before = self.count
+        self._write(new_keys, size)
+        self.pending.clear()
+        added = self.count - before
+        logger.info(f"Job index caught up: +{added} IDs ({self.count} total)")
+        return added
+
+    def check(self) -> Tuple[bool, List[str]]:
+        """
+        So sánh index với toàn bộ dữ liệu nguồn
+
+        Returns:
+            (is_consistent, list_of_problems)
+        """
+        problems = []
+        if not self._open_index():
+            return False, [f"Index {self.index_path.name} missing or corrupt"]
+        jsonl_keys = set()
+        if self.source.exists():
+            for job_id, offset in self.source.iter_ids(0):
+                if offset <= self.covered_size:
+                    jsonl_keys.add(encode_id(job_id))
+            if self.source.fingerprint(self.covered_size) != self._fingerprint:
+                problems.append("Data fingerprint mismatch (data was rewritten)")
+            size = self.source.complete_size()
+            if size > self.covered_size:
+                problems.append(f"{size - self.covered_size} bytes of data not indexed yet (run update)")
+        index_keys = set(self.iter_ids())
+        keys = list(self.iter_ids())
+        if any(a >= b for a, b in zip(keys, keys[1:])):
+            problems.append("Index records are not strictly sorted")
+        if self.bloom is not None:
+            if not self.bloom.open():
+                problems.append(f"Bloom filter {self.bloom.path.name} missing or corrupt")
+            else:
+                if self.bloom.synced_size != self.covered_size:
+                    problems.append("Bloom filter out of sync with index")
+                false_negatives = sum(1 for key in index_keys if key not in self.bloom)
+                if false_negatives:
+                    problems.append(f"{false_negatives} index IDs missing from bloom filter")
+        missing = jsonl_keys - index_keys
+        extra = index_keys - jsonl_keys
+        if missing:
+            problems.append(f"{len(missing)} IDs in data missing from index (e.g. {sorted(missing)[0].decode()})")
+        if extra:
+            problems.append(f"{len(extra)} IDs in index not found in data (e.g. {sorted(extra)[0].decode()})")
+        return len(problems) == 0, problems
+
+
+def open_job_index(source, bloom_capacity: Optional[int] = None,
+                   bloom_error_rate: float = 0.001) -> JobIndex:
+    """Mở index cho nguồn (JSONL path hoặc JobStore) và catch-up phần mới append"""
+    index = JobIndex(source, bloom_capacity=bloom_capacity, bloom_error_rate=bloom_error_rate)
+    index.update()
+    return index
+
+
+def snapshot_spec(index: JobIndex) -> Dict:
+    """Mô tả (picklable) file index + bloom đã đồng bộ, để process khác mở lại bằng open_snapshot"""
+    return {
+        'index_path': str(index.index_path),
+        'bloom_capacity': index.bloom.capacity if index.bloom is not None else None,
+        'bloom_error_rate': index.bloom.error_rate if index.bloom is not None else 0.001,
+    }
+
+
+def open_snapshot(spec: Dict) -> Optional[JobIndex]:
+    """
+    Mở index đã có trên đĩa chỉ để tra cứu (không catch-up với nguồn, không ghi), vd. trong worker parse
+
+    Returns:
+        JobIndex hỗ trợ `in`, None nếu file index thiếu/hỏng
+    """
+    index_path = Path(spec['index_path'])
+    index = JobIndex(index_path, index_path=index_path, bloom_capacity=spec.get('bloom_capacity'),
+                     bloom_error_rate=spec.get('bloom_error_rate', 0.001))
+    if not index._open_index():
+        return None
+    if index.bloom is not None and not index.bloom.open():
+        index.bloom = None  # Bloom thiếu/hỏng: tra thẳng index
+    return index
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Job Store - Lưu raw jobs thành các segment theo ngày (data/jobs/jobs_YYYYMMDD.jsonl)
+manifest.json ghi khoảng thời gian, số lượng và khoảng job_id của từng segment
+để reader bỏ qua nguyên segment nằm ngoài cửa sổ cần đọc.
+
+manifest.json cũng là commit marker: writer ghi cả batch của một run (dưới advisory lock),
+fsync, rồi mới thay manifest; reader chỉ đọc tới size trong manifest nên không bao giờ
+thấy batch ghi dở.
+
+Chỉ segment cuối (đang append) là JSONL thường; segment đã đóng được nén thành
+<name>.gz (compact), reader giải nén trong lúc đọc. size trong manifest luôn là số byte
+chưa nén nên offset của index job_id không đổi khi nén.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.file_lock import file_lock, fsync_dir
+from utils.job_index import (
+    CONFLICT_MARKERS, EMPTY_FINGERPRINT, FINGERPRINT_WINDOW, fingerprint_bytes, iter_jsonl_ids, open_jsonl
+)
+from utils.logger import setup_logger
+
+logger = setup_logger('job_store')
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+JOBS_DIR = DATA_DIR / 'jobs'
+LEGACY_FILE = DATA_DIR / 'raw_jobs.jsonl'
+MANIFEST_VERSION = 1
+# Mức nén gzip cho segment đã đóng (6 = mặc định của gzip, cân bằng tỷ lệ / tốc độ)
+COMPRESS_LEVEL = 6
+# Segment của jobs không xác định được ngày crawl (dữ liệu cũ)
+UNDATED = 'undated'
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """
+    Parse timestamp (crawled_at/created_at) về datetime naive UTC, None nếu không parse được
+
+    Nhận ISO và RFC-822 (published của RSS, vd. 'Mon, 01 Sep 2026 10:00:00 GMT')
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if parsed is None:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def segment_day(job: Dict) -> str:
+    """Ngày (YYYYMMDD) dùng để xếp job vào segment"""
+    crawled = parse_timestamp(job.get('crawled_at')) or parse_timestamp(job.get('created_at'))
+    return crawled.strftime('%Y%m%d') if crawled else UNDATED
+
+
+def iter_segment_lines(path: Path, end: Optional[int] = None, start: int = 0,
+                       eof_terminates: bool = False) -> Iterator[Tuple[str, int]]:
+    """
+    Đọc các dòng JSON hoàn chỉnh của segment (JSONL hoặc .gz) trong khoảng [start, end)
+
+    Dòng cuối không có '\n' là batch ghi dở nên bị bỏ qua, trừ khi eof_terminates
+    (raw_jobs.jsonl kiểu cũ: không còn ai append, dòng cuối thiếu '\n' vẫn là job đủ).
+
+    Yields:
+        (line, offset sau dòng đó) - bỏ qua dòng trống và git conflict markers
+    """
+    offset = start
+    with open_jsonl(path) as f:
+        f.seek(start)
+        for raw_line in f:
+            if not (raw_line.endswith(b'\n') or eof_terminates) or (end is not None and offset + len(raw_line) > end):
+                break
+            offset += len(raw_line)
+            line = raw_line.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            if line.startswith(CONFLICT_MARKERS):
+                logger.warning(f"Skipping git conflict marker in {path.name} (byte {offset})")
+                continue
+            yield line, offset
+
+
+class JobStore:
+    """
+    Kho raw jobs dạng segment + manifest
+
+    Chỉ segment cuối cùng được append, nên toàn bộ store là một luồng byte append-only
+    (dùng làm nguồn cho JobIndex).
+    """
+
+    def __init__(self, base_dir: Path = JOBS_DIR, legacy_file: Path = LEGACY_FILE,
+                 max_segment_bytes: Optional[int] = None):
+        self.base_dir = Path(base_dir)
+        self.legacy_file = Path(legacy_file)
+        self.max_segment_bytes = max_segment_bytes
+        self.manifest_path = self.base_dir / 'manifest.json'
+        # Lock giữa các writer (crawler chạy tay + CI, maintain_data) - reader không cần lock
+        self.lock_path = self.base_dir / '.write.lock'
+        self.name = f"{self.base_dir.name}/"
+        self.default_index_path = self.base_dir / 'jobs.idx'
+        self.manifest = self._load_manifest()
+
+    # ---------- manifest ----------
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.error(f"Cannot read {self.manifest_path}: {e}")
+        return {'version': MANIFEST_VERSION, 'segments': []}
+
+    def _save_manifest(self):
+        """Publish manifest (commit marker): ghi file tạm + fsync, os.replace, fsync thư mục"""
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        fsync_dir(self.base_dir)
+
+    def reload(self):
+        self.manifest = self._load_manifest()
+
+    @property
+    def all_segments(self) -> List[Dict]:
+        return self.manifest['segments']
+
+    def segment_path(self, segment: Dict) -> Path:
+        """File của segment: <name> hoặc <name>.gz nếu đã nén"""
+        plain = self.base_dir / segment['name']
+        packed = plain.with_name(plain.name + '.gz')
+        preferred, other = (packed, plain) if segment.get('compressed') else (plain, packed)
+        # Manifest đọc trước / sau lúc compact thay file: dùng bản đang có trên đĩa
+        return preferred if preferred.exists() or not other.exists() else other
+
+    def needs_migration(self) -> bool:
+        """Còn raw_jobs.jsonl kiểu cũ chưa được tách thành segment"""
+        return self.legacy_file.exists() and not self.manifest_path.exists()
+
+    def count(self) -> int:
+        return sum(segment['count'] for segment in self.all_segments)
+
+    # ---------- đọc ----------
+
+    def segments(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 job_id: Optional[str] = None) -> List[Dict]:
+        """
+        Segment có thể chứa job trong cửa sổ thời gian crawl / job_id cần tìm
+
+        Args:
+            since: Chỉ lấy segment có job crawl từ thời điểm này trở đi
+            until: Chỉ lấy segment có job crawl trước thời điểm này
+            job_id: Chỉ lấy segment có khoảng job_id chứa ID này
+        """
+        selected = []
+        for segment in self.all_segments:
+            end = parse_timestamp(segment.get('end'))
+            start = parse_timestamp(segment.get('start'))
+            if since and end and end < since:
+                continue
+            if until and start and start > until:
+                continue
+            if job_id and segment.get('min_id') and not (segment['min_id'] <= job_id <= segment['max_id']):
+                continue
+            selected.append(segment)
+        return selected
+
+    def iter_jobs(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  job_id: Optional[str] = None, newest_first: bool = False) -> Iterator[Dict]:
+        """
+        Duyệt jobs (dict) từ các segment liên quan, bỏ qua dòng JSON lỗi
+
+        Chưa migrate thì đọc thẳng raw_jobs.jsonl kiểu cũ. Lọc chính xác theo thời gian
+        là việc của caller; ở đây chỉ bỏ qua những segment chắc chắn nằm ngoài cửa sổ.
+        """
+        legacy = self.needs_migration()
+        if legacy:
+            sources = [(self.legacy_file, None)]
+        else:
+            segments = self.segments(since=since, until=until, job_id=job_id)
+            if newest_first:
+                segments = list(reversed(segments))
+            sources = [(self.segment_path(s), s['size']) for s in segments]
+
+        for path, end in sources:
+            if not path.exists():
+                logger.warning(f"Segment {path.name} listed in manifest but missing")
+                continue
+            lines = iter_segment_lines(path, end, eof_terminates=legacy)
+            lines = list(lines) if newest_first else lines
+            if newest_first:
+                lines = reversed(lines)
+            for line, offset in lines:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Invalid JSON in {path.name} (byte {offset}): {e}")
+
+    def iter_records(self, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+        """
+        Jobs kèm offset (sau dòng đó) trên luồng byte nối tiếp các segment, bắt đầu từ offset
+
+        Dùng để đọc tiếp phần mới append kể từ lần trước (cùng offset với iter_ids).
+        """
+        base = 0
+        for segment in self.all_segments:
+            size = segment['size']
+            if offset < base + size:
+                path = self.segment_path(segment)
+                for line, local_end in iter_segment_lines(path, end=size, start=max(0, offset - base)):
+                    try:
+                        yield json.loads(line), base + local_end
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Invalid JSON in {path.name} (byte {local_end}): {e}")
+            base += size
+
+    # ---------- nguồn cho JobIndex ----------
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def complete_size(self) -> int:
+        """Tổng số byte đã commit của tất cả segment"""
+        return sum(segment['size'] for segment in self.all_segments)
+
+    def iter_ids(self, offset: int = 0) -> Iterator[Tuple[str, int]]:
+        """job_id kèm offset trên luồng byte nối tiếp các segment, bắt đầu từ offset"""
+        base = 0
+        for segment in self.all_segments:
+            size = segment['size']
+            if offset < base + size:
+                path = self.segment_path(segment)
+                local_offset = max(0, offset - base)
+                for job_id, local_end in iter_jsonl_ids(path, local_offset, end=size):
+                    yield job_id, base + local_end
+            base += size
+
+    def fingerprint(self, size: int) -> bytes:
+        """Hash đoạn cuối của phần [0, size) (trong segment chứa byte cuối đó)"""
+        if size == 0:
+            return EMPTY_FINGERPRINT
+        base = 0
+        for segment in self.all_segments:
+            if size <= base + segment['size']:
+                local_end = size - base
+                path = self.segment_path(segment)
+                if not path.exists():
+                    return EMPTY_FINGERPRINT
+                with open_jsonl(path) as f:
+                    start = max(0, local_end - FINGERPRINT_WINDOW)
+                    f.seek(start)
+                    data = f.read(local_end - start)
+                return fingerprint_bytes(segment['name'].encode() + data)
+            base += segment['size']
+        return EMPTY_FINGERPRINT
+
+    # ---------- ghi ----------
+
+    def _new_segment(self, day: str) -> Dict:
+        same_day = [s for s in self.all_segments if s['day'] == day]
+        name = f"jobs_{day}.jsonl" if not same_day else f"jobs_{day}_{len(same_day):02d}.jsonl"
+        segment = {'name': name, 'day': day, 'start': None, 'end': None,
+                   'count': 0, 'size': 0, 'min_id': None, 'max_id': None}
+        self.all_segments.append(segment)
+        return segment
+
+    def _target_segment(self, day: str) -> Dict:
+        """Segment để append: luôn là segment cuối, mở segment mới khi sang ngày hoặc quá cỡ"""
+        if not self.all_segments:
+            return self._new_segment(day)
+        last = self.all_segments[-1]
+        if last['day'] == UNDATED or last['day'] < day:
+            return self._new_segment(day)
+        if self.max_segment_bytes and last['size'] >= self.max_segment_bytes:
+            return self._new_segment(last['day'])
+        return last  # Cùng ngày (hoặc đồng hồ lùi) - vẫn append vào segment cuối
+
+    @staticmethod
+    def _track(segment: Dict, job: Dict):
+        segment['count'] += 1
+        job_id = job.get('job_id', '')
+        if job_id:
+            segment['min_id'] = min(segment['min_id'] or job_id, job_id)
+            segment['max_id'] = max(segment['max_id'] or job_id, job_id)
+        crawled_at = job.get('crawled_at')
+        crawled = parse_timestamp(crawled_at)
+        if crawled:
+            if not segment['start'] or crawled < parse_timestamp(segment['start']):
+                segment['start'] = crawled_at
+            if not segment['end'] or crawled > parse_timestamp(segment['end']):
+                segment['end'] = crawled_at
+
+    def append(self, jobs: List[Dict]) -> int:
+        """
+        Append jobs thành một batch vào segment hiện tại và commit qua manifest
+
+        Batch được ghi bằng một lần write + một lần fsync dưới write lock; manifest
+        (size mới) chỉ được thay sau khi dữ liệu đã xuống đĩa.
+
+        Returns:
+            Số jobs đã ghi
+        """
+        if not jobs:
+            return 0
+        if self.needs_migration():
+            self.migrate_legacy()
+        batch = b''.join((json.dumps(job, ensure_ascii=False) + '\n').encode('utf-8') for job in jobs)
+        day = datetime.utcnow().strftime('%Y%m%d')
+
+        with file_lock(self.lock_path):
+            # Writer khác có thể đã commit batch sau khi store này đọc manifest
+            self.reload()
+            segment = self._target_segment(day)
+            path = self.segment_path(segment)
+            new_file = not path.exists()
+            self.base_dir.mkdir(parents=True, exist_ok=True)
+
+            with open(path, 'ab') as f:
+                # Cắt phần ghi dở của lần crash trước (nằm sau size đã commit trong manifest)
+                if f.tell() != segment['size']:
+                    logger.warning(f"Truncating {path.name} from {f.tell()} to committed size {segment['size']}")
+                    f.truncate(segment['size'])
+                f.write(batch)
+                f.flush()
+                os.fsync(f.fileno())
+            if new_file:
+                fsync_dir(self.base_dir)
+
+            segment['size'] += len(batch)
+            for job in jobs:
+                self._track(segment, job)
+            self._save_manifest()
+        return len(jobs)
+
+    def compact(self, level: int = COMPRESS_LEVEL) -> Dict:
+        """
+        Nén các segment đã đóng (mọi segment trừ segment cuối) thành <name>.gz
+
+        Chỉ nén phần đã commit [0, size); file .gz được fsync và thay vào chỗ (os.replace)
+        trước khi manifest đánh dấu compressed, rồi mới xóa file JSONL thường. Nén với
+        mtime=0 nên cùng nội dung luôn ra cùng bytes (git không thấy thay đổi giả).
+
+        Returns:
+            {'segments': số segment vừa nén, 'bytes_in': byte JSONL, 'bytes_out': byte .gz}
+        """
+        stats = {'segments': 0, 'bytes_in': 0, 'bytes_out': 0}
+        if not self.exists():
+            return stats
+        with file_lock(self.lock_path):
+            self.reload()
+            for segment in self.all_segments[:-1]:
+                plain = self.base_dir / segment['name']
+                if segment.get('compressed') or not plain.exists():
+                    continue
+                packed = plain.with_name(plain.name + '.gz')
+                tmp_path = packed.with_name(packed.name + '.tmp')
+                with open(plain, 'rb') as src, open(tmp_path, 'wb') as raw:
+                    with gzip.GzipFile(filename=segment['name'], mode='wb', fileobj=raw,
+                                       compresslevel=level, mtime=0) as dst:
+                        remaining = segment['size']
+                        while remaining > 0:
+                            chunk = src.read(min(remaining, 1024 * 1024))
+                            if not chunk:
+                                break
+                            dst.write(chunk)
+                            remaining -= len(chunk)
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                os.replace(tmp_path, packed)
+                segment['compressed'] = 'gzip'
+                segment['stored_size'] = packed.stat().st_size
+                stats['segments'] += 1
+                stats['bytes_in'] += segment['size']
+                stats['bytes_out'] += segment['stored_size']
+            if stats['segments']:
+                fsync_dir(self.base_dir)
+                self._save_manifest()
+                for segment in self.all_segments[:-1]:
+                    plain = self.base_dir / segment['name']
+                    if segment.get('compressed') and plain.exists():
+                        plain.unlink()
+        if stats['segments']:
+            logger.info(f"Compacted {stats['segments']} segments: {stats['bytes_in']} -> {stats['bytes_out']} bytes")
+        return stats
+
+    def migrate_legacy(self, remove_legacy: bool = True) -> Dict:
+        """
+        Tách raw_jobs.jsonl kiểu cũ thành segment theo ngày crawl
+
+        Args:
+            remove_legacy: Xóa raw_jobs.jsonl (và .idx/.bloom cũ) sau khi tách xong - chỉ khi
+                           đã đọc hết file (file đổi cỡ trong lúc tách thì giữ lại)
+
+        Returns:
+            Thống kê {'jobs': ..., 'segments': ..., 'skipped': ..., 'bytes': byte đã đọc, 'removed': ...}
+        """
+        with file_lock(self.lock_path):
+            # Kiểm tra lại dưới lock: process khác có thể vừa tách xong
+            if self.manifest_path.exists():
+                raise RuntimeError(f"{self.manifest_path} already exists, store is already segmented")
+            stats = self._migrate_legacy(self.legacy_file.stat().st_size)
+            stats['removed'] = False
+            if remove_legacy:
+                size = self.legacy_file.stat().st_size
+                if size != stats['bytes']:
+                    logger.warning(f"{self.legacy_file.name} is {size} bytes but only {stats['bytes']} were migrated, "
+                                   f"keeping it")
+                else:
+                    for path in (self.legacy_file, self.legacy_file.with_suffix('.idx'),
+                                 self.legacy_file.with_suffix('.bloom')):
+                        if path.exists():
+                            path.unlink()
+                    stats['removed'] = True
+        logger.info(f"Migrated {stats['jobs']} jobs from {self.legacy_file.name} into {stats['segments']} segments")
+        return stats
+
+    def _migrate_legacy(self, size: int) -> Dict:
+        """Tách size byte đầu của raw_jobs.jsonl (gọi dưới write lock), segment fsync xong mới ghi manifest"""
+        grouped: Dict[str, List[Tuple[str, Dict]]] = {}
+        skipped = 0
+        for line, offset in iter_segment_lines(self.legacy_file, end=size, eof_terminates=True):
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping invalid JSON in {self.legacy_file.name} (byte {offset}): {e}")
+                skipped += 1
+                continue
+            grouped.setdefault(segment_day(job), []).append((line, job))
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = {'version': MANIFEST_VERSION, 'segments': []}
+        # Jobs không rõ ngày đứng đầu, còn lại theo thứ tự ngày
+        days = sorted(grouped, key=lambda d: (d != UNDATED, d))
+        total = 0
+        for day in days:
+            segment = self._new_segment(day)
+            batch = b''.join((line + '\n').encode('utf-8') for line, _ in grouped[day])
+            with open(self.segment_path(segment), 'wb') as f:
+                f.write(batch)
+                f.flush()
+                os.fsync(f.fileno())
+            segment['size'] = len(batch)
+            for _, job in grouped[day]:
+                self._track(segment, job)
+            total += len(grouped[day])
+        fsync_dir(self.base_dir)
+        self._save_manifest()
+        return {'jobs': total, 'segments': len(days), 'skipped': skipped, 'bytes': size}
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON - Đọc từng phần tử của mảng JSON lớn từ file/stream theo chunk
+Không giữ cả document trong RAM: mỗi lần chỉ có buffer chunk + phần tử đang decode,
+vòng lặp phía gọi dừng sớm (vd. gặp high-water mark) thì phần còn lại không bị đọc.
+"""
+
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = set('0123456789.eE+-')
+
+
+class _Reader:
+    """Buffer text decode dần từ stream bytes, bỏ phần đã tiêu thụ"""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Đọc thêm một chunk, False nếu đã hết stream"""
+        if self.eof:
+            return False
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(b'', final=True)
+        else:
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(data)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Ký tự không phải khoảng trắng tiếp theo ('' nếu hết)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r}, found {found or 'end of data'!r}")
+        self.pos += 1
+
+    def value(self, decoder: json.JSONDecoder) -> Any:
+        """Decode một giá trị JSON đầy đủ, đọc thêm chunk khi giá trị bị cắt giữa chừng"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Số bị cắt ở cuối buffer ("12" | "3.5") có thể còn chữ số trong chunk sau
+            if (not self.eof and self.buffer[self.pos] not in '"{[tfn'
+                    and all(c in _NUMBER_CHARS for c in self.buffer[end:])):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(stream: BinaryIO, items_key: Optional[str] = None,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield từng phần tử của mảng JSON trong stream
+
+    Args:
+        stream: File/stream bytes (mở 'rb')
+        items_key: Document là object thì lấy mảng ở key này (vd. {"jobs": [...]});
+                   None thì document phải là mảng (hoặc một object đơn, yield chính nó)
+        chunk_size: Số byte mỗi lần đọc
+
+    Raises:
+        ValueError / json.JSONDecodeError nếu document sai định dạng
+    """
+    reader = _Reader(stream, chunk_size)
+    decoder = json.JSONDecoder()
+
+    if reader.peek() == '{':
+        if items_key is None:
+            yield reader.value(decoder)
+            return
+        # Duyệt key của object, chỉ stream mảng ở items_key, các value khác decode rồi bỏ
+        reader.expect('{')
+        while reader.peek() not in ('}', ''):
+            key = reader.value(decoder)
+            reader.expect(':')
+            if key == items_key and reader.peek() == '[':
+                break
+            reader.value(decoder)
+            if reader.peek() == ',':
+                reader.pos += 1
+        else:
+            return  # Không có items_key
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value(decoder)
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {separator or 'end of data'!r}")
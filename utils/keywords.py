@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher - Tìm nhiều keyword trong text đã chuẩn hóa một lần, compile một lần rồi cache
+Khớp theo ranh giới từ: "AI" không còn khớp trong "email", "ML" không khớp trong "HTML".
+Dùng automaton Aho-Corasick (pyahocorasick): một lượt quét bằng C cho mọi keyword.
+"""
+
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import ahocorasick
+
+from utils import config as app_config
+
+# Lấy độ ưu tiên từ match (vị trí, ưu tiên) của automaton bằng C thay vì vòng lặp Python
+_PRIORITY = itemgetter(1)
+
+# Cache matcher theo danh sách keyword (compile một lần cho mỗi danh sách)
+_matchers: Dict[Tuple[str, ...], 'KeywordMatcher'] = {}
+
+# Bảng dịch byte: byte ASCII không phải chữ/số/_ thành khoảng trắng (byte UTF-8 >= 0x80 giữ
+# nguyên). Sau khi chuẩn hóa, " ai " chỉ khớp khi "ai" đứng riêng thành từ (không dính trong "email")
+_NORMALIZE_TABLE = bytes(
+    c if (c >= 128 or chr(c).isalnum() or c == 95) else 32
+    for c in range(256)
+)
+# Dấu câu Unicode hay gặp trong mô tả HTML/RSS (nbsp, gạch ngang, ngoặc kép cong, ...)
+_UNICODE_SEPARATORS = str.maketrans({c: ' ' for c in '\u00a0\u2013\u2014\u2018\u2019\u201c\u201d\u2022\u2026\u00b7'})
+
+
+def normalize_text(text: str) -> str:
+    """
+    Chuẩn hóa text để so khớp: lowercase, dấu câu thành khoảng trắng, thêm khoảng trắng hai đầu
+
+    Làm trên bytes UTF-8 (bytes.translate chạy bằng C) rồi decode latin-1 để giữ một ký tự mỗi byte;
+    keyword đi qua cùng hàm nên vẫn so khớp đúng với chữ có dấu.
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = text.translate(_UNICODE_SEPARATORS)
+    return (' ' + text + ' ').encode('utf-8', errors='ignore').translate(_NORMALIZE_TABLE).decode('latin-1')
+
+
+class KeywordMatcher:
+    """
+    Matcher cho một danh sách keyword (thứ tự trong danh sách = độ ưu tiên)
+
+    Keyword và text cùng được chuẩn hóa bằng normalize_text nên "Node.js" khớp "node.js",
+    "Node-JS"... Tìm cả các match chồng nhau ("Speech AI" đếm cả "Speech AI" lẫn "AI").
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._priority: Dict[str, int] = {}
+        for keyword in keywords:
+            key = ' ' + ' '.join(normalize_text(keyword).split()) + ' '
+            if key.strip() and key not in self._priority:
+                self._priority[key] = len(self.keywords)
+                self.keywords.append(keyword)
+
+        # Value của mỗi key là độ ưu tiên (index trong self.keywords)
+        self._automaton = ahocorasick.Automaton()
+        for key, priority in self._priority.items():
+            self._automaton.add_word(key, priority)
+        if self._priority:
+            self._automaton.make_automaton()
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(vị trí kết thúc, độ ưu tiên) của mọi lần xuất hiện keyword trong text"""
+        return self._automaton.iter(normalize_text(text))
+
+    def counts(self, text: str) -> Counter:
+        """Số lần xuất hiện của từng keyword (tên gốc trong danh sách)"""
+        if not text or not self._priority:
+            return Counter()
+        counter = Counter(map(_PRIORITY, self._scan(text)))
+        return Counter({self.keywords[i]: count for i, count in counter.items()})
+
+    def find_all(self, text: str) -> List[str]:
+        """Các keyword có trong text, xếp theo thứ tự ưu tiên của danh sách"""
+        if not text or not self._priority:
+            return []
+        return [self.keywords[i] for i in sorted(set(map(_PRIORITY, self._scan(text))))]
+
+    def first(self, text: str) -> Optional[str]:
+        """Keyword ưu tiên cao nhất có trong text, None nếu không có"""
+        if not text or not self._priority:
+            return None
+        match = min(self._scan(text), key=_PRIORITY, default=None)
+        return self.keywords[match[1]] if match is not None else None
+
+
+def get_matcher(keywords: Iterable[str]) -> KeywordMatcher:
+    """Lấy matcher đã compile cho danh sách keyword (compile lần đầu, sau đó dùng cache)"""
+    key = tuple(keywords)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(key)
+        _matchers[key] = matcher
+    return matcher
+
+
+def category_matcher() -> KeywordMatcher:
+    """Matcher cho search_keywords trong config.yaml (dùng để gán category)"""
+    return get_matcher(app_config.get_config().get('search_keywords', []))
+
+
+def trend_matcher() -> KeywordMatcher:
+    """Matcher cho trend_keywords trong config.yaml (dùng cho top keywords của summarizer)"""
+    return get_matcher(app_config.get_config().get('trend_keywords', []))
+
+
+def analysis_trend_matcher() -> KeywordMatcher:
+    """Matcher cho analysis_trend_keywords trong config.yaml (dùng cho analyser.extract_trends)"""
+    return get_matcher(app_config.get_config().get('analysis_trend_keywords', []))
+
+
+def clear_cache():
+    """Xóa matcher đã compile và keyword đã đọc từ config (dùng khi đổi config/test)"""
+    _matchers.clear()
+    app_config.clear_cache()
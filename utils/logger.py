@@ -9,9 +9,8 @@ from pathlib import Path
 from logging.handlers import RotatingFileHandler
 from datetime import datetime
 
-# Create logs directory
+# Logs directory (tạo lúc setup logger đầu tiên)
 logs_dir = Path(__file__).parent.parent / 'logs'
-logs_dir.mkdir(exist_ok=True)
 
 # Log file path
 log_file = logs_dir / f"upwork_assistant_{datetime.now().strftime('%Y%m%d')}.log"
@@ -41,11 +40,14 @@ def setup_logger(name: str = 'upwork_assistant', level: int = logging.INFO) -> l
     )
     
     # File handler with rotation (max 10MB, keep 5 backups)
+    # delay: chỉ mở file khi có log đầu tiên (import module / --help không đụng tới file log)
+    logs_dir.mkdir(exist_ok=True)
     file_handler = RotatingFileHandler(
         log_file,
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=5,
-        encoding='utf-8'
+        encoding='utf-8',
+        delay=True
     )
     file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection - SimHash 64-bit trên title + description đã chuẩn hóa
+Cùng một job đăng qua nhiều nguồn (RSS "RemoteOK - Dev Jobs" và "RemoteOK API") có job_id khác nhau
+nhưng SimHash gần nhau; index LSH (chia band) tìm ứng viên mà không phải so với mọi job.
+Chỉ gộp job khác nguồn: hai tin cùng một board giống nhau ở phần boilerplate vẫn là hai job riêng.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import struct
+import time
+from datetime import timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.job_index import encode_id
+from utils.job_store import parse_timestamp
+from utils.logger import setup_logger
+
+logger = setup_logger('near_dup')
+
+MAGIC = b'SIMHASH1'
+# magic, version (đổi layout record thì tăng version, file cũ bị dựng lại)
+HEADER = struct.Struct('<8sI')
+VERSION = 2
+# simhash, thời điểm crawl (epoch giây), job_id 12 byte, mã nguồn (hash 4 byte của tên source)
+RECORD = struct.Struct('<QI12sI')
+SIMHASH_BITS = 64
+# Text quá ngắn (vd. "React dev") thì SimHash không đủ tin cậy để gộp
+MIN_TOKENS = 8
+
+# Độ rộng mỗi lane khi cộng dồn trọng số theo bit (đủ cho tổng trọng số < 2^24)
+_LANE_BITS = 24
+_BYTE_LANES = [sum(((b >> i) & 1) << (_LANE_BITS * i) for i in range(8)) for b in range(256)]
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Bỏ thẻ HTML / entity, lowercase, tách từ"""
+    return _TOKEN_RE.findall(html.unescape(_TAG_RE.sub(' ', text or '')).lower())
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash_job(job: Dict) -> Optional[int]:
+    """
+    SimHash của job: từ trong title (trọng số 2) + cặp từ liên tiếp của title + description
+
+    Returns:
+        Số nguyên 64-bit, None nếu text quá ngắn để so sánh
+    """
+    title_tokens = tokenize(job.get('title', ''))
+    tokens = title_tokens + tokenize(job.get('description', ''))
+    if len(tokens) < MIN_TOKENS:
+        return None
+
+    weights: Dict[int, int] = {}
+    for token in title_tokens:
+        h = _feature_hash(token)
+        weights[h] = weights.get(h, 0) + 2
+    for first, second in zip(tokens, tokens[1:]):
+        h = _feature_hash(f"{first} {second}")
+        weights[h] = weights.get(h, 0) + 1
+
+    # Cộng vector ±1 của 64 bit bằng số nguyên lớn: mỗi bit của hash là một "lane" _LANE_BITS bit,
+    # tra bảng theo byte thay vì lặp 64 bit cho từng feature
+    set_counts = 0
+    for h, weight in weights.items():
+        expanded = 0
+        for k in range(8):
+            expanded |= _BYTE_LANES[(h >> (8 * k)) & 0xFF] << (8 * _LANE_BITS * k)
+        set_counts += weight * expanded
+    half = sum(weights.values())  # bit = 1 khi tổng trọng số có bit đó > một nửa tổng
+    fingerprint = 0
+    lane_mask = (1 << _LANE_BITS) - 1
+    for bit in range(SIMHASH_BITS):
+        if 2 * ((set_counts >> (_LANE_BITS * bit)) & lane_mask) > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def source_code(source: Optional[str]) -> int:
+    """Mã 32-bit của tên nguồn (lưu trong record thay cho chuỗi tên)"""
+    return int.from_bytes(hashlib.blake2b((source or '').encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+def _timestamp(job: Dict) -> int:
+    """crawled_at (UTC) thành epoch giây, không có thì lấy thời điểm hiện tại"""
+    crawled = parse_timestamp(job.get('crawled_at'))
+    if crawled is None:
+        return int(time.time())
+    return int(crawled.replace(tzinfo=timezone.utc).timestamp())
+
+
+class SimHashIndex:
+    """
+    Index LSH cho SimHash, persist thành file record cố định (append-only, tự compact)
+
+    Chia 64 bit thành max_distance + 1 band: hai hash lệch <= max_distance bit chắc chắn
+    trùng nguyên một band (pigeonhole), nên chỉ cần so với job cùng bucket.
+    Chỉ giữ job trong window_days gần nhất - bản đăng lại qua nguồn khác thường cách nhau vài giờ/ngày.
+    """
+
+    def __init__(self, path: Path, max_distance: int = 3, window_days: int = 30):
+        self.path = Path(path)
+        self.max_distance = max_distance
+        self.window_days = window_days
+        self.num_bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.num_bands
+        # (simhash, crawled_ts, job_id, mã nguồn)
+        self.records: List[Tuple[int, int, str, int]] = []
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.num_bands)]
+        self.stale = 0
+        self._pending: List[Tuple[int, int, str, int]] = []
+        # File thiếu / header sai / version cũ: save() ghi lại toàn bộ thay vì append
+        self._needs_rewrite = True
+
+    def _bands(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (i * self.band_bits)) & mask for i in range(self.num_bands)]
+
+    def _insert(self, record: Tuple[int, int, str, int]):
+        position = len(self.records)
+        self.records.append(record)
+        for bucket, band in zip(self.buckets, self._bands(record[0])):
+            bucket.setdefault(band, []).append(position)
+
+    def _cutoff(self) -> int:
+        return int(time.time()) - self.window_days * 86400
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> bool:
+        """
+        Đọc các record còn trong cửa sổ thời gian (record cũ hơn tính là stale)
+
+        Returns:
+            False nếu file thiếu, header sai hoặc layout cũ (cần rebuild từ segment)
+        """
+        self.records = []
+        self.buckets = [{} for _ in range(self.num_bands)]
+        self.stale = 0
+        self._needs_rewrite = True
+        if not self.path.exists():
+            return False
+        cutoff = self._cutoff()
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION):
+                logger.warning(f"{self.path.name} has an invalid header or old version, ignoring it")
+                return False
+            data = f.read()
+        usable = len(data) - len(data) % RECORD.size  # Bỏ record ghi dở cuối file
+        for fingerprint, crawled_ts, raw_id, source in RECORD.iter_unpack(data[:usable]):
+            if crawled_ts < cutoff:
+                self.stale += 1
+                continue
+            self._insert((fingerprint, crawled_ts, raw_id.rstrip(b' \0').decode('ascii'), source))
+        self._needs_rewrite = usable != len(data)
+        return True
+
+    def find(self, fingerprint: int, source: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """
+        Job gần nhất trong ngưỡng max_distance: (job_id, khoảng cách) hoặc None
+
+        Args:
+            source: Mã nguồn (source_code) của job đang kiểm tra - bỏ qua ứng viên cùng nguồn
+        """
+        best = None
+        seen = set()
+        for bucket, band in zip(self.buckets, self._bands(fingerprint)):
+            for position in bucket.get(band, ()):
+                if position in seen:
+                    continue
+                seen.add(position)
+                other, _, job_id, other_source = self.records[position]
+                if other_source == source:
+                    continue
+                distance = hamming(fingerprint, other)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (job_id, distance)
+        return best
+
+    def link(self, job: Dict) -> Optional[Tuple[str, int]]:
+        """
+        Kiểm tra job với index; không trùng thì thêm job vào index (pending, ghi khi save)
+
+        Chỉ so với job từ nguồn khác: job cùng nguồn có job_id khác là tin đăng khác dù text gần giống.
+
+        Returns:
+            (job_id canonical, khoảng cách) nếu là bản gần trùng, None nếu là job mới
+        """
+        fingerprint = simhash_job(job)
+        if fingerprint is None:
+            return None
+        source = source_code(job.get('source'))
+        match = self.find(fingerprint, source)
+        if match:
+            return match
+        record = (fingerprint, _timestamp(job), job['job_id'], source)
+        self._insert(record)
+        self._pending.append(record)
+        return None
+
+    def save(self):
+        """Append record mới; compact (ghi lại file) khi record quá hạn nhiều hơn record còn dùng"""
+        if self._needs_rewrite or self.stale > len(self.records) or not self.path.exists():
+            self._rewrite(self.records)
+        elif self._pending:
+            with open(self.path, 'ab') as f:
+                for fingerprint, crawled_ts, job_id, source in self._pending:
+                    f.write(RECORD.pack(fingerprint, crawled_ts, encode_id(job_id), source))
+        self._pending = []
+
+    def _rewrite(self, records: Iterable[Tuple[int, int, str, int]]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION))
+            for fingerprint, crawled_ts, job_id, source in records:
+                f.write(RECORD.pack(fingerprint, crawled_ts, encode_id(job_id), source))
+        os.replace(tmp_path, self.path)
+        self.stale = 0
+        self._needs_rewrite = False
+
+    def rebuild(self, jobs: Iterable[Dict]) -> int:
+        """Dựng lại index từ jobs (vd. JobStore.iter_jobs(since=...)), return số job đã index"""
+        self.records = []
+        self.buckets = [{} for _ in range(self.num_bands)]
+        self._pending = []
+        cutoff = self._cutoff()
+        for job in jobs:
+            if not job.get('job_id'):
+                continue
+            crawled_ts = _timestamp(job)
+            fingerprint = simhash_job(job)
+            if fingerprint is not None and crawled_ts >= cutoff:
+                self._insert((fingerprint, crawled_ts, job['job_id'], source_code(job.get('source'))))
+        self._rewrite(self.records)
+        return len(self.records)
+
+
+def append_duplicates(path: Path, links: List[Dict]):
+    """Ghi link bản trùng -> job canonical (một dòng JSON mỗi bản trùng)"""
+    if not links:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for link in links:
+            f.write(json.dumps(link, ensure_ascii=False) + '\n')
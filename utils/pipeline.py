@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Crawl Pipeline - Hai stage: tải bytes (asyncio, I/O) và parse (process pool, CPU)
+Body tải xong qua queue giới hạn sang stage parse nên tải và parse chạy chồng lên nhau;
+mỗi nguồn giữ một slot từ lúc bắt đầu tải tới khi parse xong, nên số body nằm trong RAM
+không vượt quá queue_size + số worker (stage tải tự chờ khi stage parse chậm).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from utils.fetcher import _fetch_one, open_session, overall_timeout_result, release_body
+from utils.logger import setup_logger
+
+logger = setup_logger('pipeline')
+
+
+def _noop():
+    return os.getpid()
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """
+    Số worker process cho stage parse
+
+    None = số CPU (máy 1 CPU thì parse trong process chính); 0 = parse ngay trong process chính.
+    Nền tảng không có fork cũng parse trong process chính: spawn sẽ chạy lại code top-level
+    của script crawl trong mỗi worker.
+    """
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = cpus if cpus > 1 else 0
+    if workers > 0 and 'fork' not in multiprocessing.get_all_start_methods():
+        logger.warning("fork start method not available, parsing in the main process")
+        return 0
+    return max(0, workers)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak RSS (MB) của process này và các worker đã kết thúc (resource trên POSIX, psutil trên Windows),
+    None nếu nền tảng không đo được
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        # ru_maxrss: KB trên Linux, bytes trên macOS
+        return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def start_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """
+    Tạo process pool và fork sẵn worker trước khi event loop (và thread resolver DNS) chạy
+    """
+    if workers <= 0:
+        return None
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    for future in [executor.submit(_noop) for _ in range(workers)]:
+        future.result()
+    return executor
+
+
+async def _run(requests_list: List[Dict], prepare: Callable[[Dict], Optional[Dict]],
+               parse: Callable[[Dict], Any], executor: Optional[ProcessPoolExecutor], workers: int,
+               timeout: aiohttp.ClientTimeout, retry_attempts: int, max_connections: int,
+               max_per_host: int, queue_size: int, overall_timeout: Optional[float]):
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    consumers_count = max(1, workers)
+    slots = asyncio.Semaphore(queue_size + consumers_count)
+    results: List[Optional[Dict]] = [None] * len(requests_list)
+    parsed: List[Any] = [None] * len(requests_list)
+    queued = set()
+    timings = {'fetch_done': None, 'parse_busy': 0.0}
+
+    async def produce(i: int, request: Dict):
+        await slots.acquire()
+        results[i] = await _fetch_one(session, request, timeout, retry_attempts)
+        queued.add(i)
+        await queue.put(i)
+
+    async def consume():
+        while True:
+            i = await queue.get()
+            if i is None:
+                return
+            result = results[i]
+            try:
+                task = prepare(result)
+                if task is not None:
+                    started = time.monotonic()
+                    if executor is not None:
+                        parsed[i] = await loop.run_in_executor(executor, parse, task)
+                    else:
+                        parsed[i] = parse(task)
+                    timings['parse_busy'] += time.monotonic() - started
+            except Exception as e:
+                logger.error(f"Parse stage failed for {result['name']}: {e}", exc_info=True)
+                parsed[i] = e
+            finally:
+                # Body không cần nữa sau khi parse: giải phóng RAM / file spool, trả slot
+                # (request bị cancel lúc hết deadline cũng release - không còn ai chờ slot nữa)
+                release_body(result)
+                result['body'] = None
+                slots.release()
+
+    async with open_session(max_connections, max_per_host) as session:
+        consumers = [asyncio.create_task(consume()) for _ in range(consumers_count)]
+        producers = [asyncio.create_task(produce(i, request)) for i, request in enumerate(requests_list)]
+        if producers:
+            done, pending = await asyncio.wait(producers, timeout=overall_timeout)
+            # Hết overall deadline: cancel request còn treo (hoặc còn chờ slot)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        timings['fetch_done'] = time.monotonic()
+
+        for i, (request, task) in enumerate(zip(requests_list, producers)):
+            if results[i] is None:
+                results[i] = overall_timeout_result(request, overall_timeout, task)
+            if i not in queued:
+                queued.add(i)
+                await queue.put(i)  # prepare vẫn thấy lỗi timeout (cache, health, ...)
+        for _ in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+    return results, parsed, timings
+
+
+def run_pipeline(requests_list: List[Dict], prepare: Callable[[Dict], Optional[Dict]],
+                 parse: Callable[[Dict], Any], workers: Optional[int] = None, queue_size: int = 8,
+                 connect_timeout: float = 5, read_timeout: float = 10, total_timeout: float = 15,
+                 retry_attempts: int = 1, max_connections: int = 20, max_per_host: int = 4,
+                 overall_timeout: Optional[float] = None) -> Tuple[List[Dict], List[Any], Dict]:
+    """
+    Tải và parse tất cả requests: stage tải (asyncio) -> queue giới hạn -> stage parse (process pool)
+
+    Args:
+        requests_list: Request dict (từ build_request)
+        prepare: Chạy ở process chính khi một nguồn tải xong, trả task cho parse
+                 (None = không cần parse, vd. lỗi / không đổi)
+        parse: Hàm module-level, picklable (chạy trong worker process)
+        workers: Số worker parse (None = số CPU, 0 = parse trong process chính)
+        queue_size: Số body đã tải được phép chờ parse
+        Còn lại: như utils.fetcher.fetch_all
+
+    Returns:
+        (fetch results, parse outputs, stats) theo thứ tự requests_list; parse output là None
+        nếu prepare bỏ qua, là Exception nếu stage parse lỗi.
+        stats: workers, elapsed, fetch_elapsed, parse_busy (giây)
+    """
+    workers = resolve_workers(workers)
+    start = time.monotonic()
+    executor = start_pool(workers)
+    timeout = aiohttp.ClientTimeout(total=total_timeout, sock_connect=connect_timeout, sock_read=read_timeout)
+    try:
+        results, parsed, timings = asyncio.run(_run(requests_list, prepare, parse, executor, workers, timeout, retry_attempts,
+                                           max_connections, max_per_host, queue_size, overall_timeout))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    stats = {
+        'workers': workers,
+        'elapsed': round(time.monotonic() - start, 3),
+        # Tới lúc nguồn cuối tải xong (gồm cả thời gian chờ slot khi stage parse chậm)
+        'fetch_elapsed': round(timings['fetch_done'] - start, 3),
+        # Tổng thời gian parse các nguồn (cộng dồn qua worker, có thể lớn hơn elapsed)
+        'parse_busy': round(timings['parse_busy'], 3),
+    }
+    return results, parsed, stats
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Feed Replay - Ghi lại response thật của các nguồn (cassette) và phát lại qua HTTP server local
+Dùng để đo crawler không cần mạng: cùng cassette + cùng profile (latency, lỗi, timeout theo
+nguồn) thì mỗi lần chạy nhận đúng các byte đó, kết quả so sánh được giữa các thay đổi.
+
+Cassette là một thư mục: cassette.json (index theo tên nguồn) + body từng nguồn
+(<slug>.xml cho RSS, <slug>.json cho API - đọc được trực tiếp bằng bench_parse.py --bodies).
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from aiohttp import web
+
+from utils.fetcher import release_body
+from utils.logger import setup_logger
+
+logger = setup_logger('replay')
+
+INDEX_FILE = 'cassette.json'
+
+# Header của response gốc được phát lại (còn lại do server local tự đặt)
+REPLAY_HEADERS = ('content-type', 'etag', 'last-modified')
+
+# Thời gian treo khi profile có hang: true (client timeout trước)
+HANG_SECONDS = 3600
+
+# Có file này ở gốc thư mục = bản copy tạm của crawler (data/ riêng). Crawler chỉ nhận --replay-server
+# ở đó, để jobs / index / HTTP cache / watermark từ cassette không lẫn vào data/ thật (CI sẽ commit)
+SANDBOX_MARKER = '.replay_sandbox'
+
+
+def make_sandbox(root: Path, dirs: Iterable[str], with_data: bool = False) -> Path:
+    """Copy dirs (và data/ nếu with_data, trừ cassette) của root sang thư mục tạm có SANDBOX_MARKER"""
+    workdir = Path(tempfile.mkdtemp(prefix='crawl_replay_'))
+    ignore = shutil.ignore_patterns('__pycache__', '*.pyc')
+    for name in dirs:
+        shutil.copytree(Path(root) / name, workdir / name, ignore=ignore)
+    if with_data and (Path(root) / 'data').exists():
+        shutil.copytree(Path(root) / 'data', workdir / 'data', ignore=shutil.ignore_patterns('cassettes', 'analyses'))
+    (workdir / SANDBOX_MARKER).touch()
+    return workdir
+
+
+def is_sandbox(root: Path) -> bool:
+    return (Path(root) / SANDBOX_MARKER).exists()
+
+
+def source_slug(name: str) -> str:
+    """Tên file / path an toàn cho tên nguồn (kèm hash ngắn để hai tên gần giống không đụng nhau)"""
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')[:40]
+    return f"{slug}-{hashlib.md5(name.encode()).hexdigest()[:6]}"
+
+
+def replay_url(server: str, name: str) -> str:
+    """URL của nguồn trên replay server"""
+    return f"{server.rstrip('/')}/s/{source_slug(name)}"
+
+
+def point_at_replay(request: Dict, server: str) -> Dict:
+    """Đổi fetch request (từ build_request) sang replay server, giữ nguyên tên/kind/headers"""
+    request['url'] = replay_url(server, request['name'])
+    request['params'] = {}
+    return request
+
+
+def load_cassette(cassette_dir: Path) -> Dict[str, Dict]:
+    """Index cassette: {tên nguồn: entry}"""
+    path = Path(cassette_dir) / INDEX_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"Không có {INDEX_FILE} trong {cassette_dir} (chạy record trước)")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['sources']
+
+
+def write_cassette(cassette_dir: Path, results: List[Dict]) -> Dict[str, Dict]:
+    """
+    Ghi fetch results (từ fetch_all, không gửi conditional headers) thành cassette
+
+    Nguồn lỗi cũng được ghi (status / error, không có body) để replay tái hiện đúng lỗi đó.
+
+    Returns:
+        Index vừa ghi
+    """
+    cassette_dir = Path(cassette_dir)
+    cassette_dir.mkdir(parents=True, exist_ok=True)
+    sources = {}
+    for result in results:
+        slug = source_slug(result['name'])
+        entry = {
+            'name': result['name'],
+            'kind': result['kind'],
+            'url': result['url'],
+            'slug': slug,
+            'status': result['status'],
+            'error': result['error'],
+            'headers': {k: v for k, v in result['headers'].items() if k in REPLAY_HEADERS},
+            'file': None,
+            'size': 0,
+            'sha1': None,
+        }
+        if not result['error'] and (result['body'] is not None or result.get('body_path')):
+            entry['file'] = f"{slug}{'.json' if result['kind'] == 'api' else '.xml'}"
+            path = cassette_dir / entry['file']
+            if result.get('body_path'):
+                shutil.copyfile(result['body_path'], path)
+                release_body(result)
+            else:
+                path.write_bytes(result['body'])
+            entry['size'] = path.stat().st_size
+            entry['sha1'] = hashlib.sha1(path.read_bytes()).hexdigest()
+        sources[result['name']] = entry
+
+    with open(cassette_dir / INDEX_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'recorded_at': datetime.utcnow().isoformat(), 'sources': sources},
+                  f, ensure_ascii=False, indent=1, sort_keys=True)
+    return sources
+
+
+class ReplayServer:
+    """
+    HTTP server phát lại cassette, chạy trong thread riêng (event loop riêng)
+
+    Profile (mục replay trong config.yaml): latency_ms, compress mặc định cho mọi nguồn;
+    sources: {tên nguồn: {latency_ms, status, fail_first, hang, reset}}
+        status      -> luôn trả status này (vd. 503, 404)
+        fail_first  -> N request đầu trả status (mặc định 503), sau đó trả body (test retry)
+        hang        -> giữ kết nối không trả gì (test read timeout / overall deadline)
+        reset       -> đóng kết nối không trả response (test lỗi kết nối)
+    Nguồn ghi lại bị lỗi: lỗi HTTP trả lại đúng status, timeout/lỗi kết nối thì treo.
+    """
+
+    def __init__(self, cassette_dir: Path, profile: Optional[Dict] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.cassette_dir = Path(cassette_dir)
+        self.sources = {entry['slug']: entry for entry in load_cassette(self.cassette_dir).values()}
+        self.profile = profile or {}
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.bytes_sent = 0
+        self._hits: Dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _options(self, name: str) -> Dict:
+        defaults = {k: v for k, v in self.profile.items() if k != 'sources'}
+        return {**defaults, **(self.profile.get('sources') or {}).get(name, {})}
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        entry = self.sources.get(request.match_info['slug'])
+        if entry is None:
+            raise web.HTTPNotFound()
+        self.requests += 1
+        hits = self._hits[entry['slug']] = self._hits.get(entry['slug'], 0) + 1
+        options = self._options(entry['name'])
+
+        await asyncio.sleep(options.get('latency_ms', 0) / 1000)
+        if options.get('reset'):
+            request.transport.close()
+            return web.Response(status=500)
+        if options.get('hang') or (entry['error'] and not entry['status']):
+            await asyncio.sleep(HANG_SECONDS)
+        fail_first = options.get('fail_first', 0)
+        if (options.get('status') and not fail_first) or hits <= fail_first:
+            return web.Response(status=options.get('status') or 503)
+        if entry['file'] is None:
+            return web.Response(status=entry['status'] or 503)
+
+        headers = entry['headers']
+        if headers.get('etag') and request.headers.get('If-None-Match') == headers['etag']:
+            return web.Response(status=304)
+        body = (self.cassette_dir / entry['file']).read_bytes()
+        response = web.Response(body=body, headers=headers)
+        if options.get('compress', True):
+            response.enable_compression()
+        self.bytes_sent += len(body)
+        return response
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get('/s/{slug}', self._handle)
+        # Client timeout / cancel thì handler đang treo cũng bị cancel, dừng server không phải chờ
+        self._runner = web.AppRunner(app, access_log=None, handler_cancellation=True)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port, shutdown_timeout=1)
+        await site.start()
+        self.port = self._runner.addresses[0][1]  # port=0: OS chọn port trống
+
+    def start(self) -> 'ReplayServer':
+        """Chạy server trong background thread, return khi đã nhận kết nối"""
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='replay-server', daemon=True)
+        self._thread.start()
+        ready.wait()
+        logger.info(f"Replay server on {self.url} ({len(self.sources)} sources from {self.cassette_dir})")
+        return self
+
+    def reset_counters(self):
+        """Đếm lại fail_first / số request (gọi trước mỗi lượt benchmark)"""
+        self._hits.clear()
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Adaptive Poll Scheduler - Mỗi nguồn có lịch tải riêng theo lịch sử số item mới
+Nguồn ra nhiều job mới được tải dày (tới min_interval), nguồn ít đổi giãn dần tới max_interval.
+"""
+
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.state import load_state, save_state
+
+STATE_NAME = 'schedule'
+# Cron không chạy đúng giây: nguồn đến hạn trong khoảng này vẫn tính là đến hạn
+DUE_SLACK_SECONDS = 120
+
+
+def _format_minutes(seconds: float) -> str:
+    minutes = seconds / 60
+    return f"{minutes:.0f}m" if minutes < 120 else f"{minutes / 60:.1f}h"
+
+
+class PollScheduler:
+    """
+    Lịch tải theo nguồn, persist vào data/state/schedule.json
+
+    Mỗi lần tải ghi (thời điểm, số item mới, latency); interval = target_new / tốc độ item mới,
+    kẹp trong [min_interval, max_interval], cộng jitter để các nguồn không dồn vào cùng một run.
+    """
+
+    def __init__(self, min_interval_minutes: float = 15, max_interval_minutes: float = 360,
+                 target_new_per_fetch: float = 3, jitter: float = 0.1, history_size: int = 20):
+        self.min_interval = min_interval_minutes * 60
+        self.max_interval = max_interval_minutes * 60
+        self.target_new = target_new_per_fetch
+        self.jitter = jitter
+        self.history_size = history_size
+        self.entries: Dict[str, Dict] = load_state(STATE_NAME, {}) or {}
+        self.now = time.time()
+
+    def is_due(self, name: str) -> bool:
+        entry = self.entries.get(name)
+        return entry is None or entry.get('next_due', 0) - DUE_SLACK_SECONDS <= self.now
+
+    def select(self, source_configs: List[Dict], force: bool = False) -> List[Dict]:
+        """Các nguồn đến hạn (force=True thì lấy tất cả)"""
+        return [s for s in source_configs if force or self.is_due(s['name'])]
+
+    def rate_per_hour(self, name: str) -> Optional[float]:
+        """Số item mới mỗi giờ trong lịch sử, None nếu chưa đủ 2 lần tải"""
+        history = self.entries.get(name, {}).get('history', [])
+        if len(history) < 2:
+            return None
+        span_hours = (history[-1]['at'] - history[0]['at']) / 3600
+        if span_hours <= 0:
+            return None
+        # Item của lần tải đầu tiên tích lũy từ trước cửa sổ, không tính
+        return sum(h['new'] for h in history[1:]) / span_hours
+
+    def _interval(self, name: str) -> float:
+        entry = self.entries[name]
+        rate = self.rate_per_hour(name)
+        if rate is None:
+            return self.min_interval
+        if rate <= 0:
+            # Không có gì mới trong cả cửa sổ lịch sử: giãn gấp đôi interval hiện tại
+            interval = entry.get('interval', self.min_interval) * 2
+        else:
+            interval = self.target_new / rate * 3600
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def record(self, name: str, new_items: int, latency: Optional[float], error: Optional[str] = None):
+        """Ghi kết quả một lần tải và tính lần tải kế tiếp"""
+        entry = self.entries.setdefault(name, {'history': []})
+        entry['history'].append({
+            'at': round(self.now),
+            'new': new_items,
+            'latency': latency,
+            'ok': error is None,
+        })
+        entry['history'] = entry['history'][-self.history_size:]
+        interval = self._interval(name)
+        entry['interval'] = round(interval)
+        jitter = random.uniform(-self.jitter, self.jitter) * interval
+        entry['next_due'] = round(self.now + interval + jitter)
+        entry['last_error'] = error
+
+    def table(self, source_configs: List[Dict], fetched: List[str],
+              notes: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        Các dòng bảng lịch: nguồn, tốc độ, latency gần nhất, interval, lần kế tiếp, quyết định
+
+        notes: quyết định do nơi khác đưa ra (vd. circuit breaker), ghi đè cột decision
+        """
+        notes = notes or {}
+        lines = [f"   {'source':<32} {'new/h':>6} {'latency':>8} {'interval':>8} {'next':>6}  decision"]
+        for source in source_configs:
+            name = source['name']
+            entry = self.entries.get(name, {})
+            history = entry.get('history', [])
+            rate = self.rate_per_hour(name)
+            latency = history[-1]['latency'] if history else None
+            next_due = entry.get('next_due')
+            if name in notes:
+                decision = notes[name]
+            elif name not in fetched:
+                decision = f"skip (đến hạn lúc {datetime.fromtimestamp(next_due).strftime('%H:%M')})"
+            elif len(history) < 2:
+                decision = 'fetch (chưa đủ lịch sử)'
+            elif rate and rate > 0:
+                decision = 'fetch (interval theo tốc độ job mới)'
+            else:
+                decision = 'fetch (không có gì mới, giãn interval)'
+            lines.append(
+                f"   {name[:32]:<32} "
+                f"{(f'{rate:.2f}' if rate is not None else '-'):>6} "
+                f"{(f'{latency:.2f}s' if latency is not None else '-'):>8} "
+                f"{(_format_minutes(entry['interval']) if 'interval' in entry else '-'):>8} "
+                f"{(_format_minutes(max(0, next_due - self.now)) if next_due else '-'):>6}  {decision}"
+            )
+        return lines
+
+    def save(self):
+        save_state(STATE_NAME, self.entries)
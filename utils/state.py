@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+State Utility - Lưu/đọc state JSON của crawler trong data/state/
+Ghi atomic (file tạm + os.replace) để crash giữa chừng không làm hỏng state cũ
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+# State chỉ nằm local (gitignore, không commit); CI mang sang run sau bằng actions/cache trong crawl.yml
+STATE_DIR = Path(__file__).parent.parent / 'data' / 'state'
+
+def load_state(name: str, default: Any = None) -> Any:
+    """
+    Load state JSON theo tên
+    
+    Args:
+        name: Tên state (file data/state/<name>.json)
+        default: Giá trị trả về nếu chưa có hoặc file hỏng
+        
+    Returns:
+        Dữ liệu state
+    """
+    path = STATE_DIR / f"{name}.json"
+    if not path.exists():
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return default
+
+def save_state(name: str, data: Any) -> None:
+    """
+    Lưu state JSON theo tên (atomic)
+    
+    Args:
+        name: Tên state (file data/state/<name>.json)
+        data: Dữ liệu JSON-serializable
+    """
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    path = STATE_DIR / f"{name}.json"
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
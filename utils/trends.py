@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Trend Archive - Bài viết tech blog lưu theo ngày trong data/feeds/trends_YYYYMMDD.jsonl
+Mỗi bài có article_id (hash của link đã chuẩn hóa); các file ngày nối tiếp nhau là nguồn
+append-only cho JobIndex, nên mỗi run chỉ ghi bài chưa thấy (delta) thay vì lặp lại top 5.
+File của các ngày trước được nén thành trends_YYYYMMDD.jsonl.gz (compact), đọc trong suốt.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from utils.file_lock import fsync_dir
+from utils.job_index import EMPTY_FINGERPRINT, FINGERPRINT_WINDOW, complete_size, fingerprint_bytes, open_jsonl
+from utils.job_store import COMPRESS_LEVEL
+from utils.logger import setup_logger
+
+logger = setup_logger('trends')
+
+FEEDS_DIR = Path(__file__).parent.parent / 'data' / 'feeds'
+
+# Query param chỉ để tracking, không đổi nội dung bài
+TRACKING_PARAMS = {'ref', 'source', 'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid', 'sr_share'}
+
+
+def canonical_link(link: str) -> str:
+    """
+    Chuẩn hóa link bài viết: https, host lowercase bỏ www., bỏ fragment / utm_* / tracking param,
+    sort query còn lại, bỏ dấu / cuối path
+    """
+    link = (link or '').strip()
+    if not link:
+        return ''
+    parts = urlsplit(link)
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    scheme = 'https' if parts.scheme in ('http', 'https', '') else parts.scheme.lower()
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip('/') or '/', urlencode(query), ''))
+
+
+def article_id(link: str) -> str:
+    """ID 12 ký tự của bài (cùng cỡ job_id để dùng chung JobIndex)"""
+    return hashlib.md5(canonical_link(link).encode()).hexdigest()[:12]
+
+
+class TrendArchive:
+    """
+    Các file trends_YYYYMMDD.jsonl theo thứ tự ngày, dùng như một luồng byte append-only
+
+    Cài đặt giao diện nguồn của JobIndex (exists, complete_size, iter_ids, fingerprint);
+    dòng cũ chưa có article_id thì tính từ link.
+    """
+
+    def __init__(self, base_dir: Path = FEEDS_DIR):
+        self.base_dir = Path(base_dir)
+        self.name = f"{self.base_dir.name}/"
+        self.default_index_path = self.base_dir / 'articles.idx'
+
+    def files(self) -> List[Path]:
+        """File theo thứ tự ngày; ngày đã nén dùng bản .gz (kể cả lúc bản thường chưa kịp xóa)"""
+        by_name = {path.name: path for path in self.base_dir.glob('trends_*.jsonl')}
+        by_name.update({path.name[:-3]: path for path in self.base_dir.glob('trends_*.jsonl.gz')})
+        return [by_name[name] for name in sorted(by_name)]
+
+    def exists(self) -> bool:
+        return bool(self.files())
+
+    @staticmethod
+    def _logical_name(path: Path) -> str:
+        return path.name[:-3] if path.suffix == '.gz' else path.name
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        """Số byte (chưa nén) tính tới dòng hoàn chỉnh cuối"""
+        if path.suffix != '.gz':
+            return complete_size(path)
+        # File .gz do compact ghi từ các dòng hoàn chỉnh; ISIZE ở 4 byte cuối (file < 4GB)
+        with open(path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            return struct.unpack('<I', f.read(4))[0]
+
+    def _sizes(self) -> List[Tuple[Path, int]]:
+        return [(path, self._size(path)) for path in self.files()]
+
+    def complete_size(self) -> int:
+        return sum(size for _, size in self._sizes())
+
+    def iter_ids(self, offset: int = 0) -> Iterator[Tuple[str, int]]:
+        """article_id kèm offset trên luồng byte nối tiếp các file ngày"""
+        base = 0
+        for path, size in self._sizes():
+            if offset < base + size:
+                local_offset = max(0, offset - base)
+                with open_jsonl(path) as f:
+                    f.seek(local_offset)
+                    for raw_line in f:
+                        if local_offset + len(raw_line) > size:
+                            break
+                        local_offset += len(raw_line)
+                        try:
+                            record = json.loads(raw_line)
+                        except json.JSONDecodeError:
+                            logger.warning(f"Invalid JSON in {path.name} (byte {local_offset})")
+                            continue
+                        key = record.get('article_id') or (article_id(record['link']) if record.get('link') else '')
+                        if key:
+                            yield key, base + local_offset
+            base += size
+
+    def fingerprint(self, size: int) -> bytes:
+        """Hash đoạn cuối của phần [0, size) (trong file chứa byte cuối đó)"""
+        if size == 0:
+            return EMPTY_FINGERPRINT
+        base = 0
+        for path, file_size in self._sizes():
+            if size <= base + file_size:
+                local_end = size - base
+                with open_jsonl(path) as f:
+                    start = max(0, local_end - FINGERPRINT_WINDOW)
+                    f.seek(start)
+                    data = f.read(local_end - start)
+                # Tên không có .gz: nén file không làm index articles.idx phải dựng lại
+                return fingerprint_bytes(self._logical_name(path).encode() + data)
+            base += file_size
+        return EMPTY_FINGERPRINT
+
+    def append(self, articles: Iterable[Dict]) -> int:
+        """Ghi bài mới vào file của ngày hiện tại (UTC), return số bài đã ghi"""
+        articles = list(articles)
+        if not articles:
+            return 0
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        path = self.base_dir / f"trends_{datetime.utcnow().strftime('%Y%m%d')}.jsonl"
+        with open(path, 'a', encoding='utf-8') as f:
+            for article in articles:
+                f.write(json.dumps(article, ensure_ascii=False) + '\n')
+        return len(articles)
+
+    def compact(self, level: int = COMPRESS_LEVEL) -> Dict:
+        """
+        Nén file các ngày trước (mọi file trừ file mới nhất) thành .gz, xóa bản thường
+
+        Returns:
+            {'segments': số file vừa nén, 'bytes_in': byte JSONL, 'bytes_out': byte .gz}
+        """
+        stats = {'segments': 0, 'bytes_in': 0, 'bytes_out': 0}
+        for path in self.files()[:-1]:
+            if path.suffix == '.gz':
+                continue
+            size = complete_size(path)
+            packed = path.with_name(path.name + '.gz')
+            tmp_path = packed.with_name(packed.name + '.tmp')
+            with open(path, 'rb') as src, open(tmp_path, 'wb') as raw:
+                with gzip.GzipFile(filename=path.name, mode='wb', fileobj=raw, compresslevel=level, mtime=0) as dst:
+                    dst.write(src.read(size))
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, packed)
+            fsync_dir(self.base_dir)
+            path.unlink()
+            stats['segments'] += 1
+            stats['bytes_in'] += size
+            stats['bytes_out'] += packed.stat().st_size
+        return stats
@@ -75,6 +75,18 @@ def validate_job(job_data: Dict) -> Tuple[bool, List[str]]:
         if not isinstance(budget, (str, int, float)):
             errors.append("budget must be string, int, or float")
     
+    # Validate budget_min / budget_max (optional, số để lọc theo khoảng)
+    for field in ('budget_min', 'budget_max'):
+        value = job_data.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            errors.append(f"{field} must be a number")
+    
+    # Validate created_ts / crawled_ts (optional, epoch giây)
+    for field in ('created_ts', 'crawled_ts'):
+        value = job_data.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            errors.append(f"{field} must be an integer epoch")
+    
     # Validate proposals (optional but should be int if present)
     proposals = job_data.get('proposals')
     if proposals is not None:
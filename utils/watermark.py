@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+High-Water Marks - Mỗi nguồn nhớ các entry mới nhất đã xử lý (id/link) và published lớn nhất
+Feed thường xếp mới trước cũ: gặp vùng đã xử lý thì dừng, không normalize (MD5, regex,
+keyword, validate) lại các entry cũ chỉ để dedup loại bỏ.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.job_fields import to_epoch
+from utils.state import load_state, save_state
+
+STATE_NAME = 'watermarks'
+
+
+def entry_key(entry: Dict) -> Optional[str]:
+    """Khóa ổn định của entry RSS / item API: id (guid) > slug > link"""
+    for field in ('id', 'guid', 'slug', 'link', 'url'):
+        value = entry.get(field)
+        if value:
+            return str(value)
+    return None
+
+
+def entry_timestamp(entry: Dict) -> Optional[int]:
+    """Thời điểm đăng (epoch giây UTC), None nếu entry không có / không parse được"""
+    for field in ('published_parsed', 'updated_parsed', 'epoch', 'published', 'created_at', 'date'):
+        timestamp = to_epoch(entry.get(field))
+        if timestamp is not None:
+            return timestamp
+    return None
+
+
+class HighWaterMarks:
+    """
+    High-water mark theo nguồn, persist vào data/state/watermarks.json
+
+    Dừng khi gặp margin_entries entry đã thấy liên tiếp, hoặc entry cũ hơn published của
+    mark trừ margin_hours - chừa chỗ cho feed đẩy lại / đổi thứ tự vài entry.
+    """
+
+    def __init__(self, margin_entries: int = 3, margin_hours: float = 24, keep_keys: int = 50,
+                 marks: Optional[Dict[str, Dict]] = None):
+        """marks: dùng mark có sẵn (vd. trong worker process) thay vì đọc data/state/watermarks.json"""
+        self.margin_entries = margin_entries
+        self.margin_hours = margin_hours
+        self.margin = margin_hours * 3600
+        self.keep_keys = keep_keys
+        self.entries: Dict[str, Dict] = marks if marks is not None else (load_state(STATE_NAME, {}) or {})
+        self.skipped = 0
+
+    def iter_fresh(self, name: str, entries: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Yield entry cần xử lý (chưa thấy, trước vùng đã xử lý); nguồn chưa có mark thì yield tất cả
+
+        Dừng lấy từ entries ngay khi chạm vùng đã xử lý - stream phía sau không bị đọc tiếp.
+        """
+        mark = self.entries.get(name)
+        if not mark:
+            yield from entries
+            return
+        known = set(mark.get('keys', []))
+        cutoff = mark['published'] - self.margin if mark.get('published') else None
+
+        seen_in_row = 0
+        for entry in entries:
+            if entry_key(entry) in known:
+                seen_in_row += 1
+                self.skipped += 1
+                if seen_in_row >= self.margin_entries:
+                    return
+                continue  # Đã xử lý run trước, bỏ qua nhưng chưa dừng hẳn
+            seen_in_row = 0
+            published = entry_timestamp(entry)
+            if cutoff is not None and published is not None and published < cutoff:
+                self.skipped += 1
+                return
+            yield entry
+
+    def fresh(self, name: str, entries: List[Dict]) -> List[Dict]:
+        """Như iter_fresh cho list; phần sau điểm dừng cũng tính vào skipped"""
+        skipped = self.skipped
+        fresh = list(self.iter_fresh(name, entries))
+        self.skipped = skipped + len(entries) - len(fresh)
+        return fresh
+
+    def advance(self, name: str, entries: List[Dict]):
+        """Ghi các entry đầu feed và published mới nhất làm mark cho run sau"""
+        keys = [key for key in map(entry_key, entries[:self.keep_keys]) if key]
+        if not keys:
+            return
+        mark = self.entries.get(name, {})
+        # Giữ cả key cũ: feed bị đẩy lùi tạm thời vẫn nhận ra entry đã xử lý
+        merged = list(dict.fromkeys(keys + mark.get('keys', [])))[:self.keep_keys]
+        timestamps = [ts for ts in map(entry_timestamp, entries) if ts is not None]
+        published = max(timestamps + ([mark['published']] if mark.get('published') else []), default=None)
+        self.entries[name] = {'keys': merged, 'published': published}
+
+    def options(self) -> Dict:
+        """Tham số để dựng lại HighWaterMarks trong worker process"""
+        return {'margin_entries': self.margin_entries, 'margin_hours': self.margin_hours,
+                'keep_keys': self.keep_keys}
+
+    def save(self):
+        save_state(STATE_NAME, self.entries)